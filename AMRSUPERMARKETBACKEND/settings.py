@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 # ----------------------------
 # BASE DIRECTORY
 # ----------------------------
@@ -26,7 +28,7 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "django-insecure-default-key")
 DEBUG = os.environ.get("DJANGO_DEBUG", "False") == "True"
 
 # Allowed hosts for production
-ALLOWED_HOSTS = ["amrsupermarketbackend.onrender.com"]  # Add Render backend URL
+ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "amrsupermarketbackend.onrender.com").split(",")  # Add Render backend URL
 
 # ----------------------------
 # APPLICATION DEFINITION
@@ -45,6 +47,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # must be first
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
+    "api.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,6 +67,12 @@ CORS_ALLOWED_ORIGINS = [
     "https://amrsupermarket.vercel.app",
 ]
 
+# POS clients send Idempotency-Key on retried writes; list endpoints answer
+# If-None-Match against their ETag; the frontend echoes the Primary-Pin a
+# write returned so its next reads skip the replica (api/middleware.py)
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "if-none-match", "primary-pin")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "ETag", "Retry-After", "Primary-Pin"]
+
 # ----------------------------
 # URLS & TEMPLATES
 # ----------------------------
@@ -91,10 +102,31 @@ WSGI_APPLICATION = "AMRSUPERMARKETBACKEND.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.environ.get("DJANGO_DB_NAME", BASE_DIR / "db.sqlite3"),
+        # Background jobs write concurrently with requests: WAL lets reads
+        # proceed during a write, IMMEDIATE takes the write lock up front
+        # instead of failing on upgrade, and timeout waits for it
+        "OPTIONS": {
+            "timeout": 20,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=WAL;",
+        },
     }
 }
 
+# Optional read replica for reports and lists (see api/routers.py): a SQLite
+# snapshot refreshed by `manage.py snapshot_replica`, e.g. from cron
+if os.environ.get("DJANGO_REPLICA_DB_NAME"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["DJANGO_REPLICA_DB_NAME"],
+        "OPTIONS": {"timeout": 20, "init_command": "PRAGMA query_only=1;"},
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_ROUTERS = ["api.routers.ReplicaRouter"]
+# Older replica data is not served; writers read from the primary this long
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get("REPLICA_MAX_LAG_SECONDS", "300"))
+
 # ----------------------------
 # PASSWORD VALIDATORS
 # ----------------------------
@@ -130,5 +162,89 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
-    ]
+    ],
+    # Per-client request-cost budgets, see api/throttling.py
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.CostBudgetThrottle",
+    ],
+    # An empty budget disables throttling for that scope
+    "DEFAULT_THROTTLE_RATES": {
+        # Point reads, writes and syncs from the tills
+        "till": os.environ.get("API_TILL_BUDGET", "1200/min") or None,
+        # Lists, summaries and exports
+        "reports": os.environ.get("API_REPORTS_BUDGET", "600/min") or None,
+    },
+    # Proxies in front of the app; clients are then told apart by X-Forwarded-For
+    "NUM_PROXIES": int(os.environ["DJANGO_NUM_PROXIES"]) if os.environ.get("DJANGO_NUM_PROXIES") else None,
+}
+
+# Tokens each kind of request takes from its budget
+API_THROTTLE_COSTS = {"read": 1, "write": 1, "batch": 10, "list": 10, "report": 20, "export": 50}
+
+# Throttle buckets live in each process's memory; with several workers a
+# client's effective budget is up to one budget per worker
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api",
+    }
+}
+
+# ----------------------------
+# PAYROLL
+# ----------------------------
+# Incentive paid as a fraction of an employee's sales (0.01 = 1%)
+PAYROLL_INCENTIVE_RATE = os.environ.get("PAYROLL_INCENTIVE_RATE", "0.01")
+
+# ----------------------------
+# IDEMPOTENT WRITES
+# ----------------------------
+# How long a stored Idempotency-Key response can be replayed
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Largest offline backlog accepted by POST /api/billing/batch/
+BILLING_BATCH_MAX_SIZE = int(os.environ.get("BILLING_BATCH_MAX_SIZE", "10000"))
+
+# Months of bills kept in Billing by `manage.py archive_billing`, the current
+# one included; older months move to ArchivedBilling (see api/archive.py)
+BILLING_HOT_MONTHS = int(os.environ.get("BILLING_HOT_MONTHS", "12"))
+
+# ----------------------------
+# BACKGROUND JOBS
+# ----------------------------
+# Run queued jobs in a thread pool inside each web worker; set to False
+# when a separate `manage.py run_jobs` process drains the queue instead.
+# gunicorn recycles workers (GUNICORN_MAX_REQUESTS) and kills jobs still
+# running after GUNICORN_GRACEFUL_TIMEOUT, so long imports and exports need
+# run_jobs
+JOBS_RUN_IN_PROCESS = os.environ.get("JOBS_RUN_IN_PROCESS", "True") == "True"
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# A job running (or, in process, queued) for longer than this is taken for
+# abandoned by a dead worker and run again: when a worker starts its job
+# pool, when a client polls the job, and when `manage.py run_jobs` starts
+JOB_STALE_MINUTES = int(os.environ.get("JOB_STALE_MINUTES", "60"))
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(BASE_DIR, "exports"))
+
+# ----------------------------
+# PERFORMANCE METRICS
+# ----------------------------
+# Requests slower than this (in ms) are logged with their SQL; 0 disables
+SLOW_REQUEST_MS = int(os.environ.get("DJANGO_SLOW_REQUEST_MS", "0"))
+
+# /api/metrics/ is open to staff sessions and to scrapers sending
+# "Authorization: Bearer <METRICS_TOKEN>"; empty disables the token
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Responses smaller than this (in bytes) are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.performance": {"handlers": ["console"], "level": "WARNING"},
+    },
 }
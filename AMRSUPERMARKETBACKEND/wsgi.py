@@ -10,7 +10,13 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMRSUPERMARKETBACKEND.settings")
 
 application = get_wsgi_application()
+
+# Import the URLconf (views, serializers, DRF) now instead of on the first
+# request. Under `gunicorn --preload` this happens once in the master and the
+# forked workers share it; no database connection is opened here.
+get_resolver().url_patterns
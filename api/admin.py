@@ -1,13 +1,130 @@
 from django.contrib import admin
-from .models import Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, Employee, Customer
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .models import Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, ArchivedBilling, BillingMonthSummary, Employee, Customer
+
+
+# ----------------- Helpers for large tables -----------------
+class CappedCountPaginator(Paginator):
+    """
+    Paginator that stops counting after ``limit`` rows.
+
+    A changelist of a big table (or a date_hierarchy year of it) would run a
+    full COUNT(*) on every page view. Here the count is exact up to
+    ``limit`` and a bounded scan past it; rows beyond the last page are
+    reached through search, filters or the date hierarchy. Table statistics
+    (MAX(rowid), pg_class) were not used: they over-count after deletes and
+    show pages that don't exist.
+    """
+
+    limit = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query"):
+            return super().count
+        return queryset.order_by()[:self.limit].count()
+
+
+class IdInputFilter(admin.SimpleListFilter):
+    """
+    List filter rendered as a text box taking a primary key, instead of a
+    link per related row (which means loading every customer/employee).
+    """
+
+    template = "admin/api/id_input_filter.html"
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        # No lookups to list, but the text box is always shown
+        return True
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        # Keep the other active filters when the box is submitted
+        all_choice["query_parts"] = [
+            (key, value)
+            for key, values in changelist.get_filters_params().items()
+            if key != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.field_name: int(value)})
+        return queryset
+
+
+class EmployeeIdFilter(IdInputFilter):
+    title = "employee id"
+    parameter_name = "employee_id"
+    field_name = "EMPLOYEE_id"
+
+
+class CustomerIdFilter(IdInputFilter):
+    title = "customer id"
+    parameter_name = "customer_id"
+    field_name = "CUSTOMER_id"
+
 
 # ----------------- Product, Stock, Supplier, etc -----------------
-admin.site.register(Product)
-admin.site.register(Stock)
-admin.site.register(Supplier)
-admin.site.register(PurchaseOrder)
-admin.site.register(ItemEntry)
-admin.site.register(Customer)  # ✅ register Customer to manage from admin
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('id', 'PRODUCT_NAME', 'BRAND_NAME', 'CATEGORY', 'STOCK', 'MRP')
+    search_fields = ('PRODUCT_NAME', 'BRAND_NAME')
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Stock)
+class StockAdmin(admin.ModelAdmin):
+    list_display = ('id', 'PRODUCT', 'STOCK')
+    list_select_related = ('PRODUCT',)
+    autocomplete_fields = ('PRODUCT',)
+    search_fields = ('PRODUCT__PRODUCT_NAME',)
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    list_display = ('SUPPLIER_ID', 'NAME', 'COMPANY_NAME', 'MOBILE_NO', 'CATEGORY')
+    search_fields = ('NAME', 'COMPANY_NAME')
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ('ORDERID', 'SUPPLIER_NAME', 'PRODUCTNAME', 'QUANTITY_REQUIRED', 'TOTAL_PRICE', 'ORDER_DATETIME')
+    autocomplete_fields = ('SUPPLIER',)
+    date_hierarchy = 'ORDER_DATETIME'
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ItemEntry)
+class ItemEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'ORDER', 'PRODUCTNAME', 'SUPPLIER_NAME', 'ORDERED_QUANTITY', 'RECEIVED_QUANTITY', 'RECEIVED_DATE')
+    list_select_related = ('ORDER',)
+    raw_id_fields = ('ORDER',)
+    search_fields = ('PRODUCTNAME', 'SUPPLIER_NAME')
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ('CUSTOMER_ID', 'NAME', 'MOBILE_NO', 'CITY', 'PINCODE')
+    search_fields = ('NAME', 'MOBILE_NO')
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
 
 # ----------------- Employee -----------------
 @admin.register(Employee)
@@ -19,5 +136,41 @@ class EmployeeAdmin(admin.ModelAdmin):
 @admin.register(Billing)
 class BillingAdmin(admin.ModelAdmin):
     list_display = ('BILL_NO', 'PRODUCT', 'CUSTOMER', 'EMPLOYEE', 'QUANTITY', 'TOTAL_PRICE', 'BILL_DATE')
-    list_filter = ('BILL_DATE', 'EMPLOYEE', 'CUSTOMER')
+    list_select_related = ('PRODUCT', 'CUSTOMER', 'EMPLOYEE')
+    list_filter = (EmployeeIdFilter, CustomerIdFilter)
+    date_hierarchy = 'BILL_DATE'
+    autocomplete_fields = ('PRODUCT', 'CUSTOMER', 'EMPLOYEE')
+    search_fields = ('PRODUCT__PRODUCT_NAME', 'CUSTOMER__NAME', 'EMPLOYEE__NAME')
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Archived data is written only by api/archive.py."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedBilling)
+class ArchivedBillingAdmin(ReadOnlyAdmin):
+    list_display = ('BILL_NO', 'PRODUCT', 'CUSTOMER', 'EMPLOYEE', 'QUANTITY', 'TOTAL_PRICE', 'BILL_DATE')
+    list_select_related = ('PRODUCT', 'CUSTOMER', 'EMPLOYEE')
+    list_filter = (EmployeeIdFilter, CustomerIdFilter)
+    date_hierarchy = 'BILL_DATE'
     search_fields = ('PRODUCT__PRODUCT_NAME', 'CUSTOMER__NAME', 'EMPLOYEE__NAME')
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(BillingMonthSummary)
+class BillingMonthSummaryAdmin(ReadOnlyAdmin):
+    list_display = ('MONTH', 'CATEGORY', 'LINES', 'QUANTITY', 'TOTAL_SALES')
+    list_filter = ('CATEGORY',)
+    date_hierarchy = 'MONTH'
@@ -0,0 +1,197 @@
+"""
+Hot/cold split of the bill lines.
+
+archive_billing() moves closed months out of Billing (hot) into
+ArchivedBilling (cold) and rolls each of them up into BillingMonthSummary.
+Everything dated before the archive boundary is archived and new bills for
+those months are refused, so the two tables never hold the same dates:
+billing_sources() maps a BILL_DATE range onto one or both of them, and
+aggregates over the two simply add up.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedBilling, Billing, BillingMonthSummary
+from .versions import table_versions
+
+ARCHIVE_BATCH_SIZE = 1000
+COPIED_FIELDS = [
+    'BILL_NO', 'PRODUCT_id', 'CUSTOMER_id', 'EMPLOYEE_id', 'CATEGORY', 'QUANTITY', 'PRICE', 'BILL_DATE', 'TERMINAL', 'CLIENT_ID',
+]
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def hot_months():
+    return getattr(settings, 'BILLING_HOT_MONTHS', 12)
+
+
+def default_cutoff(today=None):
+    """First day of the oldest month kept hot: the current one and the BILLING_HOT_MONTHS - 1 before it."""
+    today = today or timezone.localdate()
+    index = today.year * 12 + today.month - 1 - (hot_months() - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_boundary():
+    """
+    First day after the archived months, or None when nothing is archived.
+    Bills dated before it live in ArchivedBilling.
+
+    Every bill validation and list asks for it, and it only moves when
+    ArchivedBilling is written, so it is cached under that table's change
+    counter (api/versions.py) and the MAX(BILL_DATE) runs once per change.
+    Without the counter (databases other than SQLite) it is read every time.
+    """
+    version = table_versions([ArchivedBilling]).get(ArchivedBilling._meta.db_table)
+    if version is None:
+        return _read_boundary()
+    key = f'archive-boundary:{version}'
+    cached = cache.get(key)
+    if cached is None:
+        # Stored as a tuple so "nothing archived" is cached too
+        cached = (_read_boundary(),)
+        cache.set(key, cached, None)
+    return cached[0]
+
+
+def _read_boundary():
+    last = ArchivedBilling.objects.aggregate(last=Max('BILL_DATE'))['last']
+    return next_month(last) if last else None
+
+
+def is_archived(bill_date, boundary):
+    return bill_date is not None and boundary is not None and bill_date < boundary
+
+
+def _in_range(queryset, date_from, date_to):
+    if date_from:
+        queryset = queryset.filter(BILL_DATE__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(BILL_DATE__lte=date_to)
+    return queryset
+
+
+def billing_sources(date_from=None, date_to=None):
+    """
+    Querysets over the tables holding bills dated within [date_from,
+    date_to], oldest first and already filtered to the range. A range that
+    starts on or after the archive boundary reads Billing only.
+    """
+    boundary = archive_boundary()
+    sources = [_in_range(Billing.objects.all(), date_from, date_to)]
+    if boundary is not None and (date_from is None or date_from < boundary):
+        sources.insert(0, _in_range(ArchivedBilling.objects.all(), date_from, date_to))
+    return sources
+
+
+def category_totals(queryset):
+    return queryset.values('CATEGORY').annotate(
+        LINES=Count('BILL_NO'),
+        QUANTITY=Coalesce(Sum('QUANTITY'), 0),
+        TOTAL_SALES=Coalesce(Sum('TOTAL_PRICE'), Value(Decimal('0.00'))),
+    ).order_by()
+
+
+def archived_category_totals(date_from, date_to, boundary):
+    """
+    Per-category rows for the archived part of [date_from, date_to]: months
+    it covers whole come from BillingMonthSummary, only the partial months
+    at either end are summed from ArchivedBilling.
+    """
+    last_day = boundary - timedelta(days=1)
+    if date_to is not None and date_to < last_day:
+        last_day = date_to
+    if date_from is not None and date_from > last_day:
+        return []
+
+    # Whole months are [first_whole, end_whole); first_whole None means from the start
+    first_whole = date_from if date_from is None or date_from.day == 1 else next_month(date_from)
+    end_whole = next_month(last_day) if next_month(last_day) - timedelta(days=1) == last_day else last_day.replace(day=1)
+    if first_whole is not None and first_whole >= end_whole:
+        return list(category_totals(_in_range(ArchivedBilling.objects.all(), date_from, last_day)))
+
+    summaries = BillingMonthSummary.objects.filter(MONTH__lt=end_whole)
+    if first_whole is not None:
+        summaries = summaries.filter(MONTH__gte=first_whole)
+    rows = list(summaries.values('CATEGORY', 'LINES', 'QUANTITY', 'TOTAL_SALES'))
+    if first_whole is not None and date_from < first_whole:
+        rows += category_totals(_in_range(ArchivedBilling.objects.all(), date_from, first_whole - timedelta(days=1)))
+    if end_whole <= last_day:
+        rows += category_totals(_in_range(ArchivedBilling.objects.all(), end_whole, last_day))
+    return rows
+
+
+def summary_rows(date_from=None, date_to=None):
+    """Per-category rows covering [date_from, date_to], from Billing and, for archived months, their rollups."""
+    rows = list(category_totals(_in_range(Billing.objects.all(), date_from, date_to)))
+    boundary = archive_boundary()
+    if boundary is not None and (date_from is None or date_from < boundary):
+        rows += archived_category_totals(date_from, date_to, boundary)
+    return rows
+
+
+def archive_billing(before=None, progress=None):
+    """
+    Move every bill dated before ``before`` (default: default_cutoff()) to
+    ArchivedBilling, one month per transaction, and roll each month up into
+    BillingMonthSummary. Returns [{'MONTH', 'LINES'}] for the months moved.
+
+    Rows are removed from Billing without the delete signals (see
+    _delete_month()): archived bills stay part of their customers' loyalty
+    aggregates.
+    """
+    before = (before or default_cutoff()).replace(day=1)
+    months = sorted(
+        Billing.objects.filter(BILL_DATE__lt=before)
+        .annotate(MONTH=TruncMonth('BILL_DATE'))
+        .values_list('MONTH', flat=True)
+        .distinct()
+    )
+
+    moved = []
+    for done, month in enumerate(months):
+        if progress:
+            progress(done, len(months), f'{month:%Y-%m}')
+        with transaction.atomic():
+            bills = Billing.objects.filter(BILL_DATE__gte=month, BILL_DATE__lt=next_month(month))
+            rows = list(bills.values(*COPIED_FIELDS))
+            ArchivedBilling.objects.bulk_create((ArchivedBilling(**row) for row in rows), batch_size=ARCHIVE_BATCH_SIZE)
+            _delete_month(Billing, month)
+
+            archived = ArchivedBilling.objects.filter(BILL_DATE__gte=month, BILL_DATE__lt=next_month(month))
+            BillingMonthSummary.objects.filter(MONTH=month).delete()
+            BillingMonthSummary.objects.bulk_create(
+                BillingMonthSummary(MONTH=month, **row) for row in category_totals(archived)
+            )
+        moved.append({'MONTH': f'{month:%Y-%m}', 'LINES': len(rows)})
+    return moved
+
+
+def _delete_month(model, month):
+    """
+    Delete ``model``'s rows dated in ``month`` with one DELETE statement.
+
+    QuerySet.delete() would load every row to send post_delete for it, and
+    the loyalty receivers would then take the archived bills out of their
+    customers' aggregates. Nothing references bill lines, so there is no
+    cascade to run; the change-counter triggers still fire.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field('BILL_DATE').column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {column} >= %s AND {column} < %s",
+            [month, next_month(month)],
+        )
+        return cursor.rowcount
@@ -0,0 +1,182 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from .archive import archive_boundary, is_archived
+from .loyalty import rebuild_customer_stats
+from .models import ArchivedBilling, Billing, Customer, Employee, Product, Stock
+from .sync import record_changes
+
+# Stay under SQLite's bound-parameter limit in __in lookups
+IN_BATCH_SIZE = 500
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+INSUFFICIENT_STOCK = 'insufficient_stock'
+INVALID = 'invalid'
+
+
+class OfflineBillSerializer(serializers.Serializer):
+    """One queued bill; validation is field-level only, lookups are batched."""
+    CLIENT_ID = serializers.CharField(max_length=200)
+    CLIENT_TIMESTAMP = serializers.DateTimeField()
+    PRODUCT = serializers.IntegerField()
+    QUANTITY = serializers.IntegerField(min_value=1)
+    # No default: a bill the till sent without a price is rejected, not recorded as free
+    PRICE = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    BILL_DATE = serializers.DateField(required=False, allow_null=True)
+    CUSTOMER = serializers.IntegerField(required=False, allow_null=True)
+    EMPLOYEE = serializers.IntegerField(required=False, allow_null=True)
+
+
+def max_batch_size():
+    return getattr(settings, 'BILLING_BATCH_MAX_SIZE', 10000)
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), IN_BATCH_SIZE):
+        yield values[start:start + IN_BATCH_SIZE]
+
+
+def _existing(queryset, field, values):
+    found = set()
+    for chunk in _chunks(set(values)):
+        found.update(queryset.filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+    return found
+
+
+def _uploaded(terminal, client_ids):
+    """BILL_NO of the bills ``terminal`` already uploaded, by CLIENT_ID, archived ones included."""
+    found = {}
+    for model in (Billing, ArchivedBilling):
+        for chunk in _chunks(client_ids):
+            found.update(
+                model.objects.filter(TERMINAL=terminal, CLIENT_ID__in=chunk).values_list('CLIENT_ID', 'BILL_NO')
+            )
+    return found
+
+
+def ingest_bills(terminal, items):
+    """
+    Apply ``terminal``'s queued bills in one transaction and return one
+    outcome per input bill, in input order:
+
+        {"CLIENT_ID", "STATUS": created|duplicate|insufficient_stock|invalid,
+         "BILL_NO", "ERRORS"}
+
+    Bills are deduplicated by (terminal, CLIENT_ID), within the batch and
+    against every bill stored from earlier batches, then applied in
+    CLIENT_TIMESTAMP order so the earliest sale wins when stock runs out.
+    Lookups, inserts and stock updates are all batched, so the query count
+    does not grow with the number of bills.
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = OfflineBillSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            client_id = item.get('CLIENT_ID') if isinstance(item, dict) else None
+            results[index] = {'CLIENT_ID': client_id, 'STATUS': INVALID, 'ERRORS': serializer.errors}
+
+    with transaction.atomic():
+        # Earlier batches: the bills themselves carry (TERMINAL, CLIENT_ID)
+        previous = _uploaded(terminal, {data['CLIENT_ID'] for _, data in valid})
+
+        pending, first_seen, repeats = [], {}, []
+        for index, data in valid:
+            key = data['CLIENT_ID']
+            if key in previous:
+                results[index] = {'CLIENT_ID': key, 'STATUS': DUPLICATE, 'BILL_NO': previous[key]}
+            elif key in first_seen:
+                repeats.append((index, first_seen[key]))
+            else:
+                first_seen[key] = index
+                pending.append((index, data))
+
+        product_ids = {data['PRODUCT'] for _, data in pending}
+        products = {}
+        for chunk in _chunks(product_ids):
+            products.update((p.id, p) for p in Product.objects.select_for_update().filter(id__in=chunk))
+        customers = _existing(Customer.objects, 'CUSTOMER_ID', {d['CUSTOMER'] for _, d in pending if d.get('CUSTOMER')})
+        employees = _existing(Employee.objects, 'EMPLOYEE_ID', {d['EMPLOYEE'] for _, d in pending if d.get('EMPLOYEE')})
+        boundary = archive_boundary()
+
+        accepted = []
+        for index, data in sorted(pending, key=lambda pair: pair[1]['CLIENT_TIMESTAMP']):
+            errors = {}
+            product = products.get(data['PRODUCT'])
+            if product is None:
+                errors['PRODUCT'] = [f"Product {data['PRODUCT']} does not exist."]
+            if data.get('CUSTOMER') and data['CUSTOMER'] not in customers:
+                errors['CUSTOMER'] = [f"Customer {data['CUSTOMER']} does not exist."]
+            if data.get('EMPLOYEE') and data['EMPLOYEE'] not in employees:
+                errors['EMPLOYEE'] = [f"Employee {data['EMPLOYEE']} does not exist."]
+            bill_date = data.get('BILL_DATE') or data['CLIENT_TIMESTAMP'].date()
+            if is_archived(bill_date, boundary):
+                errors['BILL_DATE'] = [f"Bills before {boundary} are archived and can no longer be added."]
+            if errors:
+                results[index] = {'CLIENT_ID': data['CLIENT_ID'], 'STATUS': INVALID, 'ERRORS': errors}
+                continue
+            if product.STOCK < data['QUANTITY']:
+                results[index] = {
+                    'CLIENT_ID': data['CLIENT_ID'],
+                    'STATUS': INSUFFICIENT_STOCK,
+                    'ERRORS': {'QUANTITY': [f"Only {product.STOCK} in stock."]},
+                }
+                continue
+            product.STOCK -= data['QUANTITY']
+            accepted.append((index, data, Billing(
+                PRODUCT_id=product.id,
+                CUSTOMER_id=data.get('CUSTOMER'),
+                EMPLOYEE_id=data.get('EMPLOYEE'),
+                CATEGORY=product.CATEGORY,
+                QUANTITY=data['QUANTITY'],
+                PRICE=data['PRICE'],
+                BILL_DATE=bill_date,
+                TERMINAL=terminal,
+                CLIENT_ID=data['CLIENT_ID'],
+            )))
+
+        if accepted:
+            Billing.objects.bulk_create([bill for _, _, bill in accepted], batch_size=IN_BATCH_SIZE)
+            touched_products = {bill.PRODUCT_id for _, _, bill in accepted}
+            Product.objects.bulk_update([products[pid] for pid in touched_products], ['STOCK'], batch_size=IN_BATCH_SIZE)
+            touched_stock = _deduct_stock_records(accepted)
+
+            for index, data, bill in accepted:
+                results[index] = {'CLIENT_ID': data['CLIENT_ID'], 'STATUS': CREATED, 'BILL_NO': bill.BILL_NO}
+
+            # bulk writes skip the model signals, so update their side tables here
+            customer_ids = {bill.CUSTOMER_id for _, _, bill in accepted if bill.CUSTOMER_id}
+            if customer_ids:
+                rebuild_customer_stats(customer_ids)
+            record_changes('product', touched_products)
+            record_changes('stock', touched_stock)
+
+    # Repeats within this batch point at whatever their first copy became
+    for index, first in repeats:
+        results[index] = {'CLIENT_ID': results[first]['CLIENT_ID'], 'STATUS': DUPLICATE, 'BILL_NO': results[first].get('BILL_NO')}
+    return results
+
+
+def _deduct_stock_records(accepted):
+    """Take each product's sold quantity from its Stock rows, oldest first, like BillingSerializer.create."""
+    sold = {}
+    for _, _, bill in accepted:
+        sold[bill.PRODUCT_id] = sold.get(bill.PRODUCT_id, 0) + bill.QUANTITY
+
+    changed = []
+    for chunk in _chunks(sold):
+        for stock in Stock.objects.select_for_update().filter(PRODUCT_id__in=chunk).order_by('PRODUCT_id', 'id'):
+            remaining = sold[stock.PRODUCT_id]
+            if remaining <= 0 or stock.STOCK <= 0:
+                continue
+            taken = min(stock.STOCK, remaining)
+            stock.STOCK -= taken
+            sold[stock.PRODUCT_id] = remaining - taken
+            changed.append(stock)
+    Stock.objects.bulk_update(changed, ['STOCK'], batch_size=IN_BATCH_SIZE)
+    return [stock.id for stock in changed]
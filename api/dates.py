@@ -0,0 +1,37 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+
+# Formats found in the legacy data/*.json exports
+DATE_FORMATS = ("%d-%m-%Y %H:%M:%S", "%d-%m-%Y", "%Y-%m-%d")
+TIME_FORMATS = ("%d-%m-%Y %H:%M:%S", "%H:%M:%S", "%H:%M")
+
+
+def _parse(value, formats):
+    if not value:
+        return None
+    value = str(value).strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(date_str):
+    parsed = _parse(date_str, DATE_FORMATS)
+    return parsed.date() if parsed else None
+
+
+def parse_time(time_str):
+    # Legacy TIME values are spreadsheet datetimes on 30-12-1899; only the clock matters
+    parsed = _parse(time_str, TIME_FORMATS)
+    return parsed.time() if parsed else None
+
+
+def parse_datetime(date_str, time_str=None):
+    day = parse_date(date_str)
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, parse_time(time_str) or time.min))
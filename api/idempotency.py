@@ -0,0 +1,96 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def key_ttl():
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def purge_expired_keys():
+    """Delete keys older than the TTL; returns how many were removed."""
+    deleted, _ = IdempotencyKey.objects.filter(CREATED_AT__lt=timezone.now() - key_ttl()).delete()
+    return deleted
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.FINGERPRINT != fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used for a different request."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = HttpResponse(record.RESPONSE_BODY, status=record.STATUS_CODE, content_type='application/json')
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _find(key):
+    record = IdempotencyKey.objects.filter(KEY=key).first()
+    if record is not None and record.CREATED_AT < timezone.now() - key_ttl():
+        record.delete()
+        return None
+    return record
+
+
+def idempotent(handler):
+    """
+    Make a DRF write handler safe to retry.
+
+    When the request carries an Idempotency-Key header, the handler runs in
+    one transaction together with storing its rendered response under that
+    key. A retry with the same key gets the stored response back (with an
+    Idempotent-Replayed header) without running the handler again, so stock
+    is only ever deducted once. Reusing a key for a different body is a 409.
+    Errors are not stored: they roll the key back and the retry runs again.
+    """
+
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+
+        fingerprint = _fingerprint(request)
+        record = _find(key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        try:
+            with transaction.atomic():
+                response = handler(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    IdempotencyKey.objects.create(
+                        KEY=key,
+                        FINGERPRINT=fingerprint,
+                        STATUS_CODE=response.status_code,
+                        RESPONSE_BODY=JSONRenderer().render(response.data).decode(),
+                    )
+        except IntegrityError:
+            # A concurrent retry with the same key committed first
+            record = _find(key)
+            if record is None:
+                raise
+            return _replay(record, fingerprint)
+        return response
+
+    wrapper.__name__ = handler.__name__
+    wrapper.__doc__ = handler.__doc__
+    return wrapper
@@ -0,0 +1,280 @@
+import inspect
+import io
+import json
+import logging
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .archive import archive_billing
+from .models import ArchivedBilling, Billing, Customer, Job, Product, PurchaseOrder, Stock
+from .payroll import run_payroll
+from .reports import billing_summary
+from .routers import replica_reads
+from .serializers import (
+    BillingSerializer, CustomerSerializer, PayrollSerializer, ProductSerializer, PurchaseOrderSerializer, StockSerializer,
+)
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+# Tasks that overwrite or move data; only staff may queue them over the API
+ADMIN_ONLY = set()
+
+
+def task(name, admin_only=False):
+    """Register ``fn(job, **params)`` as a task that can be queued by name."""
+    def register(fn):
+        TASKS[name] = fn
+        if admin_only:
+            ADMIN_ONLY.add(name)
+        return fn
+    return register
+
+
+# ----------------- Queue -----------------
+def enqueue(task_name, params=None):
+    """
+    Store a queued Job and return it. With settings.JOBS_RUN_IN_PROCESS the
+    job is also handed to this process's worker pool once the transaction
+    commits; otherwise it waits for `manage.py run_jobs`.
+    """
+    if task_name not in TASKS:
+        raise KeyError(task_name)
+    job = Job.objects.create(TASK=task_name, PARAMS=params or {})
+    if runs_in_process():
+        transaction.on_commit(lambda: executor().submit(run_job, job.JOB_ID))
+    return job
+
+
+def runs_in_process():
+    return getattr(settings, 'JOBS_RUN_IN_PROCESS', True)
+
+
+def stale_after():
+    """How long a job may stay running before it is taken for abandoned by a dead worker."""
+    return timedelta(minutes=getattr(settings, 'JOB_STALE_MINUTES', 60))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """
+    This process's job pool, started on first use. Starting it also picks up
+    jobs a dead worker left behind (see recover()), since in-process jobs
+    have no `run_jobs` to requeue them.
+    """
+    global _executor
+    started = False
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JOB_WORKERS', 2),
+                thread_name_prefix='api-job',
+            )
+            started = True
+    if started:
+        recover(_executor)
+    return _executor
+
+
+def recover(pool):
+    """Requeue stale running jobs and submit every queued job to ``pool``; claim() keeps each to one worker."""
+    requeued = requeue_stale(stale_after())
+    if requeued:
+        logger.warning("Requeued %s stale jobs", requeued)
+    for job_id in Job.objects.filter(STATUS=Job.QUEUED).order_by('CREATED_AT').values_list('JOB_ID', flat=True):
+        pool.submit(run_job, job_id)
+
+
+def resume_stale(job):
+    """
+    Hand ``job`` to this process's pool if it was abandoned: still queued, or
+    still running, for longer than stale_after(). Used when a client polls
+    it, so a job lost with a recycled worker finishes anyway. True if resumed.
+    """
+    cutoff = timezone.now() - stale_after()
+    if job.STATUS == Job.RUNNING and job.STARTED_AT and job.STARTED_AT < cutoff:
+        stale = Job.objects.filter(JOB_ID=job.JOB_ID, STATUS=Job.RUNNING, STARTED_AT=job.STARTED_AT)
+        if stale.update(STATUS=Job.QUEUED) != 1:
+            return False
+    elif not (job.STATUS == Job.QUEUED and job.CREATED_AT < cutoff):
+        return False
+    executor().submit(run_job, job.JOB_ID)
+    return True
+
+
+def claim(job_id):
+    """Atomically move a queued job to running; False if another worker got it."""
+    return Job.objects.filter(JOB_ID=job_id, STATUS=Job.QUEUED).update(
+        STATUS=Job.RUNNING, STARTED_AT=timezone.now(), PROGRESS=0,
+    ) == 1
+
+
+def claim_next():
+    """Claim the oldest queued job, or return None."""
+    for job_id in Job.objects.filter(STATUS=Job.QUEUED).order_by('CREATED_AT').values_list('JOB_ID', flat=True)[:10]:
+        if claim(job_id):
+            return job_id
+    return None
+
+
+def requeue_stale(older_than):
+    """Put jobs left running by a crashed worker back in the queue."""
+    return Job.objects.filter(STATUS=Job.RUNNING, STARTED_AT__lt=timezone.now() - older_than).update(STATUS=Job.QUEUED)
+
+
+def set_progress(job, progress, message=''):
+    job.PROGRESS = max(0, min(100, int(progress)))
+    job.MESSAGE = message[:255]
+    Job.objects.filter(JOB_ID=job.JOB_ID).update(PROGRESS=job.PROGRESS, MESSAGE=job.MESSAGE)
+
+
+def run_job(job_id, claimed=False):
+    """Run one job to completion, recording its result or traceback."""
+    close_old_connections()
+    try:
+        if not claimed and not claim(job_id):
+            return
+        job = Job.objects.get(JOB_ID=job_id)
+        try:
+            result = TASKS[job.TASK](job, **job.PARAMS)
+        except Exception:
+            logger.exception("Job %s (%s) failed", job.JOB_ID, job.TASK)
+            Job.objects.filter(JOB_ID=job.JOB_ID).update(
+                STATUS=Job.FAILED, ERROR=traceback.format_exc(), FINISHED_AT=timezone.now(),
+            )
+            return
+        Job.objects.filter(JOB_ID=job.JOB_ID).update(
+            STATUS=Job.SUCCEEDED,
+            PROGRESS=100,
+            RESULT=json.loads(json.dumps(result, cls=DjangoJSONEncoder)),
+            FINISHED_AT=timezone.now(),
+        )
+    finally:
+        # Worker threads own their connections; don't leak them
+        connections.close_all()
+
+
+# ----------------- Tasks -----------------
+@task('import_data', admin_only=True)
+def import_data_task(job):
+    import import_data
+
+    # Its own stream: other jobs in this pool keep the real stdout
+    output = io.StringIO()
+    rejections = import_data.run(
+        progress=lambda done, total, step: set_progress(job, 100 * done / total, step), out=output,
+    )
+    return {'rejections': rejections, 'log_tail': output.getvalue()[-2000:]}
+
+
+@task('billing_summary')
+def billing_summary_task(job, date_from=None, date_to=None):
+    with replica_reads():
+        return billing_summary(parse_date(date_from or ''), parse_date(date_to or ''))
+
+
+@task('payroll', admin_only=True)
+def payroll_task(job, month, rate=None, dry_run=False):
+    params = PayrollSerializer(data={'month': month, 'rate': rate, 'dry_run': dry_run})
+    params.is_valid(raise_exception=True)
+    date_from, date_to = params.validated_data['date_from'], params.validated_data['date_to']
+    rows = run_payroll(date_from, date_to, rate=params.validated_data['rate'], commit=not params.validated_data['dry_run'])
+    return {'DATE_FROM': date_from, 'DATE_TO': date_to, 'EMPLOYEES': rows}
+
+
+@task('archive_billing', admin_only=True)
+def archive_billing_task(job, before=None):
+    moved = archive_billing(
+        before=parse_date(before or ''),
+        progress=lambda done, total, month: set_progress(job, 100 * done / total, month),
+    )
+    return {'MONTHS': moved}
+
+
+EXPORTS = {
+    'product': (Product.objects.all(), ProductSerializer),
+    'stock': (Stock.objects.select_related('PRODUCT'), StockSerializer),
+    'customer': (Customer.objects.all(), CustomerSerializer),
+    'purchaseorder': (PurchaseOrder.objects.all(), PurchaseOrderSerializer),
+    'billing': (Billing.objects.select_related('PRODUCT', 'CUSTOMER', 'EMPLOYEE'), BillingSerializer),
+    'billingarchive': (ArchivedBilling.objects.select_related('PRODUCT', 'CUSTOMER', 'EMPLOYEE'), BillingSerializer),
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_path(job_id):
+    return os.path.join(settings.EXPORT_DIR, f'export-{job_id}.json')
+
+
+@task('export')
+def export_task(job, model):
+    """Write every row of ``model`` to a JSON file, a chunk at a time."""
+    with replica_reads():
+        return _export(job, model)
+
+
+def _export(job, model):
+    queryset, serializer_class = EXPORTS[model]
+    total = queryset.count()
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    path = export_path(job.JOB_ID)
+
+    written, last_pk = 0, None
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        while True:
+            # Keyset pagination: no read cursor stays open while progress is written
+            page = queryset.order_by('pk')
+            if last_pk is not None:
+                page = page.filter(pk__gt=last_pk)
+            rows = list(page[:EXPORT_CHUNK_SIZE])
+            if not rows:
+                break
+            written = _write_chunk(f, serializer_class, rows, written)
+            last_pk = rows[-1].pk
+            set_progress(job, 100 * written / max(total, 1), f'{written}/{total} rows')
+        f.write(']')
+    return {'model': model, 'rows': written, 'file': os.path.basename(path)}
+
+
+def _write_chunk(f, serializer_class, rows, written):
+    for row in serializer_class(rows, many=True).data:
+        if written:
+            f.write(',')
+        f.write(json.dumps(row, cls=DjangoJSONEncoder))
+        written += 1
+    return written
+
+
+def validate_params(task_name, params):
+    """Cheap checks done at enqueue time so obviously bad jobs are rejected with a 400."""
+    if task_name not in TASKS:
+        return f"task must be one of: {', '.join(TASKS)}"
+    if not isinstance(params, dict):
+        return "params must be an object"
+    try:
+        inspect.signature(TASKS[task_name]).bind(None, **params)
+    except TypeError as exc:
+        return str(exc)
+    if task_name == 'export' and params.get('model') not in EXPORTS:
+        return f"model must be one of: {', '.join(EXPORTS)}"
+    if task_name == 'payroll':
+        serializer = PayrollSerializer(data=params)
+        if not serializer.is_valid():
+            return PayrollSerializer.describe(serializer.errors)
+    if task_name == 'archive_billing' and params.get('before') and not parse_date(str(params['before'])):
+        return "before must be YYYY-MM-DD"
+    return None
+
@@ -0,0 +1,172 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ArchivedBilling, Billing, CustomerCategoryStats, CustomerStats
+
+TOP_CATEGORIES = 5
+
+# What a bill contributed to its customer's aggregates
+BillSnapshot = namedtuple('BillSnapshot', 'BILL_NO CUSTOMER_id CATEGORY QUANTITY LINE_TOTAL BILL_DATE')
+
+
+def snapshot(bill):
+    # TOTAL_PRICE is generated by the database and not reloaded after save()
+    line_total = (Decimal(bill.PRICE or 0) * (bill.QUANTITY or 0)).quantize(Decimal('0.01'))
+    return BillSnapshot(bill.BILL_NO, bill.CUSTOMER_id, bill.CATEGORY, bill.QUANTITY or 0, line_total, bill.BILL_DATE)
+
+
+def _other_bills_on(bill):
+    return Billing.objects.filter(
+        CUSTOMER_id=bill.CUSTOMER_id, BILL_DATE=bill.BILL_DATE
+    ).exclude(BILL_NO=bill.BILL_NO).exists()
+
+
+def top_category(category, spend, quantity):
+    """A TOP_CATEGORIES entry; SPEND is kept as a decimal string, JSON has no exact decimals."""
+    return {'CATEGORY': category, 'SPEND': str(Decimal(spend).quantize(Decimal('0.01'))), 'QUANTITY': quantity}
+
+
+def _refresh_top_categories(customer_id):
+    top = CustomerCategoryStats.objects.filter(CUSTOMER_id=customer_id).order_by('-SPEND', 'CATEGORY')[:TOP_CATEGORIES]
+    CustomerStats.objects.filter(CUSTOMER_id=customer_id).update(TOP_CATEGORIES=[
+        top_category(row.CATEGORY, row.SPEND, row.QUANTITY) for row in top
+    ])
+
+
+def add_bill(bill):
+    """Fold one bill (a BillSnapshot) into its customer's aggregates."""
+    if bill.CUSTOMER_id is None:
+        return
+    with transaction.atomic():
+        CustomerStats.objects.get_or_create(CUSTOMER_id=bill.CUSTOMER_id)
+        new_visit = bill.BILL_DATE is not None and not _other_bills_on(bill)
+        updates = {
+            'TOTAL_SPEND': F('TOTAL_SPEND') + bill.LINE_TOTAL,
+            'LINES': F('LINES') + 1,
+            'VISITS': F('VISITS') + int(new_visit),
+        }
+        if bill.BILL_DATE is not None:
+            updates['LAST_VISIT'] = Greatest(Coalesce('LAST_VISIT', Value(bill.BILL_DATE)), Value(bill.BILL_DATE))
+        CustomerStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id).update(**updates)
+
+        CustomerCategoryStats.objects.get_or_create(CUSTOMER_id=bill.CUSTOMER_id, CATEGORY=bill.CATEGORY)
+        CustomerCategoryStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id, CATEGORY=bill.CATEGORY).update(
+            SPEND=F('SPEND') + bill.LINE_TOTAL,
+            QUANTITY=F('QUANTITY') + bill.QUANTITY,
+            LINES=F('LINES') + 1,
+        )
+        _refresh_top_categories(bill.CUSTOMER_id)
+
+
+def remove_bill(bill):
+    """Take one bill (a BillSnapshot) back out of its customer's aggregates."""
+    if bill.CUSTOMER_id is None:
+        return
+    with transaction.atomic():
+        stats = CustomerStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id).first()
+        if stats is None:
+            return
+        last_visit_of_day = bill.BILL_DATE is not None and not _other_bills_on(bill)
+        updates = {
+            'TOTAL_SPEND': F('TOTAL_SPEND') - bill.LINE_TOTAL,
+            'LINES': F('LINES') - 1,
+            'VISITS': F('VISITS') - int(last_visit_of_day),
+        }
+        if last_visit_of_day and bill.BILL_DATE == stats.LAST_VISIT:
+            # The previous visit may be in an archived month
+            updates['LAST_VISIT'] = (
+                Billing.objects.filter(CUSTOMER_id=bill.CUSTOMER_id)
+                .exclude(BILL_NO=bill.BILL_NO)
+                .aggregate(last=Max('BILL_DATE'))['last']
+                or ArchivedBilling.objects.filter(CUSTOMER_id=bill.CUSTOMER_id).aggregate(last=Max('BILL_DATE'))['last']
+            )
+        CustomerStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id).update(**updates)
+
+        CustomerCategoryStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id, CATEGORY=bill.CATEGORY).update(
+            SPEND=F('SPEND') - bill.LINE_TOTAL,
+            QUANTITY=F('QUANTITY') - bill.QUANTITY,
+            LINES=F('LINES') - 1,
+        )
+        CustomerCategoryStats.objects.filter(CUSTOMER_id=bill.CUSTOMER_id, CATEGORY=bill.CATEGORY, LINES__lte=0).delete()
+        _refresh_top_categories(bill.CUSTOMER_id)
+
+
+def rebuild_customer_stats(customer_ids=None):
+    """
+    Recompute the aggregates from Billing and ArchivedBilling with two
+    grouped queries per table.
+
+    Used after bulk loads that bypass model signals. The two tables never
+    hold bills of the same date (see api/archive.py), so their aggregates
+    simply add up.
+    """
+    sources = [Billing, ArchivedBilling]
+
+    stats = CustomerStats.objects.all()
+    category_stats = CustomerCategoryStats.objects.all()
+    if customer_ids is not None:
+        stats = stats.filter(CUSTOMER_id__in=customer_ids)
+        category_stats = category_stats.filter(CUSTOMER_id__in=customer_ids)
+
+    categories = {}
+    totals = {}
+    for model in sources:
+        bills = model.objects.filter(CUSTOMER__isnull=False)
+        if customer_ids is not None:
+            bills = bills.filter(CUSTOMER_id__in=customer_ids)
+
+        for row in bills.values('CUSTOMER_id', 'CATEGORY').annotate(
+            SPEND=Coalesce(Sum('TOTAL_PRICE'), Value(Decimal('0.00'))),
+            QUANTITY=Coalesce(Sum('QUANTITY'), 0),
+            LINES=Count('BILL_NO'),
+        ).order_by():
+            merged = categories.setdefault(row['CUSTOMER_id'], {}).setdefault(
+                row['CATEGORY'],
+                {'CUSTOMER_id': row['CUSTOMER_id'], 'CATEGORY': row['CATEGORY'], 'SPEND': Decimal('0.00'), 'QUANTITY': 0, 'LINES': 0},
+            )
+            for field in ('SPEND', 'QUANTITY', 'LINES'):
+                merged[field] += row[field]
+
+        for row in bills.values('CUSTOMER_id').annotate(
+            TOTAL_SPEND=Coalesce(Sum('TOTAL_PRICE'), Value(Decimal('0.00'))),
+            LINES=Count('BILL_NO'),
+            VISITS=Count('BILL_DATE', distinct=True),
+            LAST_VISIT=Max('BILL_DATE'),
+        ).order_by():
+            merged = totals.setdefault(
+                row['CUSTOMER_id'],
+                {'TOTAL_SPEND': Decimal('0.00'), 'LINES': 0, 'VISITS': 0, 'LAST_VISIT': None},
+            )
+            for field in ('TOTAL_SPEND', 'LINES', 'VISITS'):
+                merged[field] += row[field]
+            if row['LAST_VISIT'] is not None:
+                merged['LAST_VISIT'] = max(merged['LAST_VISIT'] or row['LAST_VISIT'], row['LAST_VISIT'])
+
+    with transaction.atomic():
+        stats.delete()
+        category_stats.delete()
+        CustomerCategoryStats.objects.bulk_create(
+            (CustomerCategoryStats(**row) for rows in categories.values() for row in rows.values()),
+            batch_size=1000,
+        )
+        CustomerStats.objects.bulk_create(
+            (
+                CustomerStats(
+                    CUSTOMER_id=customer_id,
+                    TOTAL_SPEND=row['TOTAL_SPEND'],
+                    LINES=row['LINES'],
+                    VISITS=row['VISITS'],
+                    LAST_VISIT=row['LAST_VISIT'],
+                    TOP_CATEGORIES=[
+                        top_category(c['CATEGORY'], c['SPEND'], c['QUANTITY'])
+                        for c in sorted(categories[customer_id].values(), key=lambda c: (-c['SPEND'], c['CATEGORY']))[:TOP_CATEGORIES]
+                    ],
+                )
+                for customer_id, row in totals.items()
+            ),
+            batch_size=1000,
+        )
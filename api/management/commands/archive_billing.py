@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.archive import archive_billing, default_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move bills of closed months from Billing to ArchivedBilling and roll them up per month."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="YYYY-MM-DD; archive the months before this date's month (default: keep settings.BILLING_HOT_MONTHS months)",
+        )
+
+    def handle(self, *args, **options):
+        before = default_cutoff()
+        if options["before"]:
+            before = parse_date(options["before"])
+            if before is None:
+                raise CommandError("--before must be a YYYY-MM-DD date.")
+
+        moved = archive_billing(before)
+        for month in moved:
+            self.stdout.write(f"{month['MONTH']}  {month['LINES']:>8} lines")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {sum(month['LINES'] for month in moved)} bill lines from {len(moved)} months before {before:%Y-%m}."
+        ))
@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.jobs import claim_next, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (imports, reports, exports) in a worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--poll", type=float, default=1.0, help="seconds between queue polls")
+        parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+        parser.add_argument(
+            "--requeue-stale", type=int, default=settings.JOB_STALE_MINUTES, metavar="MINUTES",
+            help="requeue jobs stuck in 'running' for longer than this at startup",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale(timedelta(minutes=options["requeue_stale"]))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="api-job") as pool:
+            while True:
+                running = {future for future in running if not future.done()}
+                while len(running) < options["workers"]:
+                    job_id = claim_next()
+                    if job_id is None:
+                        break
+                    self.stdout.write(f"Running job {job_id}")
+                    running.add(pool.submit(run_job, job_id, claimed=True))
+
+                if options["once"] and not running:
+                    break
+                if running:
+                    wait(running, timeout=options["poll"], return_when="FIRST_COMPLETED")
+                else:
+                    time.sleep(options["poll"])
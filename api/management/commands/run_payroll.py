@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.payroll import run_payroll
+from api.serializers import PayrollSerializer
+
+
+class Command(BaseCommand):
+    help = "Compute INCENTIVE and NET_PAY for every employee from their sales in a period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (default: the current month)")
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD, instead of --month")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD, instead of --month")
+        parser.add_argument("--rate", help="incentive as a fraction of sales (default: settings.PAYROLL_INCENTIVE_RATE)")
+        parser.add_argument("--dry-run", action="store_true", help="print the result without saving it")
+
+    def handle(self, *args, **options):
+        data = {"rate": options["rate"], "dry_run": options["dry_run"]}
+        if options["date_from"] or options["date_to"]:
+            data.update(date_from=options["date_from"] or "", date_to=options["date_to"] or "")
+        else:
+            data["month"] = options["month"] or date.today().strftime("%Y-%m")
+        # The same checks as POST /api/employee/payroll/
+        params = PayrollSerializer(data=data)
+        if not params.is_valid():
+            raise CommandError(PayrollSerializer.describe(params.errors))
+        date_from, date_to = params.validated_data["date_from"], params.validated_data["date_to"]
+
+        rows = run_payroll(date_from, date_to, rate=params.validated_data["rate"], commit=not options["dry_run"])
+        for row in rows:
+            self.stdout.write(
+                f"{row['EMPLOYEE_ID']:>6}  {row['NAME']:<24} sales {row['SALES']:>12}  "
+                f"incentive {row['INCENTIVE']:>10}  net {row['NET_PAY']:>10}"
+            )
+        action = "Computed" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(f"{action} payroll for {len(rows)} employees, {date_from} to {date_to}."))
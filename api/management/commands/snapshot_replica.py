@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.routers import REPLICA, replica_configured
+
+
+class Command(BaseCommand):
+    help = "Refresh the SQLite read replica with a consistent copy of the primary database."
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError("No replica database is configured (set DJANGO_REPLICA_DB_NAME).")
+        primary, replica = connections["default"], connections[REPLICA]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("Snapshots are for SQLite; a Postgres replica is kept current by streaming replication.")
+
+        target = str(replica.settings_dict["NAME"])
+        partial = f"{target}.partial"
+        started = time.time()
+        primary.ensure_connection()
+        copy = sqlite3.connect(partial)
+        try:
+            # The online backup API copies a consistent state without blocking writers for long
+            primary.connection.backup(copy)
+            # Readers open the replica read-only; WAL would need a writable -shm file
+            copy.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            copy.close()
+        # Dated to the start of the copy: the router's lag guard reads the mtime
+        os.utime(partial, (started, started))
+        # Atomic swap; open replica connections keep the old file until they close
+        os.replace(partial, target)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replica {target} refreshed in {time.time() - started:.2f} s."
+        ))
@@ -0,0 +1,90 @@
+import threading
+from collections import defaultdict, deque
+
+# Upper bounds (seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# How many recent durations per endpoint are kept for the rolling quantiles
+RECENT_SAMPLES = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration_sum = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.response_bytes = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, duration, db_queries, db_time, response_bytes):
+        self.count += 1
+        self.duration_sum += duration
+        self.db_queries += db_queries
+        self.db_time += db_time
+        self.response_bytes += response_bytes
+        self.recent.append(duration)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+
+
+class MetricsRegistry:
+    """Per-process request metrics keyed by (route, method)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(EndpointStats)
+
+    def observe(self, route, method, duration, db_queries, db_time, response_bytes):
+        with self._lock:
+            self._stats[(route, method)].observe(duration, db_queries, db_time, response_bytes)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def render_prometheus(self):
+        """Render all endpoints in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            lines = [
+                "# HELP api_request_duration_seconds Wall time spent handling the request.",
+                "# TYPE api_request_duration_seconds histogram",
+            ]
+            for (route, method), stats in items:
+                labels = f'route="{route}",method="{method}"'
+                for bound, hits in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {hits}')
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"api_request_duration_seconds_sum{{{labels}}} {stats.duration_sum:.6f}")
+                lines.append(f"api_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+            lines += [
+                "# HELP api_request_duration_recent_seconds Duration quantiles over the most recent requests.",
+                "# TYPE api_request_duration_recent_seconds gauge",
+            ]
+            for (route, method), stats in items:
+                recent = sorted(stats.recent)
+                for q in QUANTILES:
+                    value = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+                    lines.append(
+                        f'api_request_duration_recent_seconds{{route="{route}",method="{method}",quantile="{q}"}} {value:.6f}'
+                    )
+
+            counters = (
+                ("api_request_db_queries_total", "Database queries executed.", "db_queries", "{}"),
+                ("api_request_db_time_seconds_total", "Time spent in database queries.", "db_time", "{:.6f}"),
+                ("api_response_bytes_total", "Response body bytes sent.", "response_bytes", "{}"),
+            )
+            for name, help_text, attr, fmt in counters:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (route, method), stats in items:
+                    value = fmt.format(getattr(stats, attr))
+                    lines.append(f'{name}{{route="{route}",method="{method}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
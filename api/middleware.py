@@ -0,0 +1,189 @@
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .metrics import metrics_registry
+from .routers import max_lag, replica_configured, replica_reads
+
+try:
+    import brotli
+except ImportError:  # optional; without it responses are gzip only
+    brotli = None
+
+logger = logging.getLogger("api.performance")
+
+# Cap on SQL statements kept per request for the slow-request log
+MAX_LOGGED_QUERIES = 50
+
+re_accepts_brotli = re.compile(r"\bbr\b")
+# Responses are compressed per request; brotli's default quality (11) costs
+# many times the CPU for a few percent smaller bodies
+BROTLI_QUALITY = 5
+
+
+class QueryRecorder:
+    """execute_wrapper that counts and times every query on a connection."""
+
+    def __init__(self, keep_sql):
+        self.count = 0
+        self.time = 0.0
+        self.keep_sql = keep_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.time += elapsed
+            if self.keep_sql and len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, DB query count, DB time and response size for every
+    request, per route and method, into api.metrics.metrics_registry.
+
+    Requests slower than settings.SLOW_REQUEST_MS (0 disables) are logged to
+    the "api.performance" logger together with their SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "SLOW_REQUEST_MS", 0)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(keep_sql=bool(self.slow_ms))
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        if route == "metrics":
+            return response
+
+        if response.streaming:
+            size = int(response.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        metrics_registry.observe(route, request.method, duration, recorder.count, recorder.time, size)
+
+        if self.slow_ms and duration * 1000 >= self.slow_ms:
+            sql = "\n".join(f"  [{elapsed * 1000:.1f} ms] {statement}" for elapsed, statement in recorder.queries)
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms in DB, %d bytes\n%s",
+                request.method, request.path, route, duration * 1000,
+                recorder.count, recorder.time * 1000, size, sql,
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serves safe requests (GET, HEAD, OPTIONS) inside api.routers.replica_reads(),
+    so their report and list queries can go to the read replica.
+
+    A successful write pins the client to the primary for
+    REPLICA_MAX_LAG_SECONDS, long enough for the replica to catch up with
+    it. The pin is sent two ways: a Primary-Pin response header holding its
+    expiry (Unix time), which the cross-origin frontend echoes back on its
+    requests, and a cookie for same-site browsers (admin, browsable API),
+    which send it by themselves. Requests carrying an unexpired pin read
+    from the primary only.
+    """
+
+    PIN_HEADER = "Primary-Pin"
+    PIN_COOKIE = "primary_pin"
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+        if request.method not in self.SAFE_METHODS:
+            response = self.get_response(request)
+            # A failed write changed nothing worth reading back
+            if 200 <= response.status_code < 300:
+                response[self.PIN_HEADER] = str(int(time.time()) + max_lag())
+                response.set_cookie(self.PIN_COOKIE, "1", max_age=max_lag(), httponly=True, samesite="Lax")
+            return response
+        if self.PIN_COOKIE in request.COOKIES or self.pinned_by_header(request):
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
+
+    def pinned_by_header(self, request):
+        try:
+            return float(request.headers.get(self.PIN_HEADER, "")) > time.time()
+        except ValueError:
+            return False
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses of at least settings.COMPRESS_MIN_SIZE bytes: with
+    brotli when the client accepts it and the brotli package is installed,
+    with gzip otherwise. Streaming responses (export downloads) are
+    compressed chunk by chunk as they are sent.
+
+    HTML (the admin and the browsable API) stays on gzip, which Django pads
+    with random bytes against BREACH; brotli output has no such padding.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, "COMPRESS_MIN_SIZE", 1024)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        if (
+            brotli is None
+            or response.has_header("Content-Encoding")
+            or (response.streaming and response.is_async)
+            or "html" in response.get("Content-Type", "")
+            or not re_accepts_brotli.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.streaming:
+            response.streaming_content = brotli_sequence(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+
+def brotli_sequence(chunks):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        # Flushed per chunk so each reaches the client as soon as it is produced
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
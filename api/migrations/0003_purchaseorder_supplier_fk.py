@@ -0,0 +1,50 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clean_supplier_ids(apps, schema_editor):
+    """Null out orders pointing at missing suppliers and resync SUPPLIER_NAME."""
+    PurchaseOrder = apps.get_model("api", "PurchaseOrder")
+    Supplier = apps.get_model("api", "Supplier")
+
+    names = dict(Supplier.objects.values_list("SUPPLIER_ID", "NAME"))
+    orders = list(PurchaseOrder.objects.only("ORDERID", "SUPPLIER_ID", "SUPPLIER_NAME"))
+    for order in orders:
+        if order.SUPPLIER_ID in names:
+            order.SUPPLIER_NAME = names[order.SUPPLIER_ID]
+        else:
+            order.SUPPLIER_ID = None
+    PurchaseOrder.objects.bulk_update(orders, ["SUPPLIER_ID", "SUPPLIER_NAME"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_billing_employee"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="purchaseorder",
+            name="SUPPLIER_ID",
+            field=models.IntegerField(db_column="SUPPLIER_ID", null=True),
+        ),
+        migrations.RunPython(clean_supplier_ids, migrations.RunPython.noop),
+        migrations.RenameField(
+            model_name="purchaseorder",
+            old_name="SUPPLIER_ID",
+            new_name="SUPPLIER",
+        ),
+        migrations.AlterField(
+            model_name="purchaseorder",
+            name="SUPPLIER",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="SUPPLIER_ID",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="PURCHASEORDERS",
+                to="api.supplier",
+            ),
+        ),
+    ]
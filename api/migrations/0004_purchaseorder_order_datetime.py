@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:02
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+# Frozen copy of api/dates.py as of this migration; later parser changes must not alter it
+DATE_FORMATS = ("%d-%m-%Y %H:%M:%S", "%d-%m-%Y", "%Y-%m-%d")
+TIME_FORMATS = ("%d-%m-%Y %H:%M:%S", "%H:%M:%S", "%H:%M")
+
+
+def _parse(value, formats):
+    if not value:
+        return None
+    value = str(value).strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_datetime(date_str, time_str=None):
+    day = _parse(date_str, DATE_FORMATS)
+    if day is None:
+        return None
+    clock = _parse(time_str, TIME_FORMATS)
+    return timezone.make_aware(datetime.combine(day.date(), clock.time() if clock else time.min))
+
+
+def backfill_order_datetime(apps, schema_editor):
+    """Parse the legacy DATE/TIME strings into ORDER_DATETIME in pk-ordered batches."""
+    PurchaseOrder = apps.get_model("api", "PurchaseOrder")
+
+    last_pk = 0
+    while True:
+        batch = list(
+            PurchaseOrder.objects.filter(ORDERID__gt=last_pk)
+            .order_by("ORDERID")
+            .only("ORDERID", "DATE", "TIME")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for order in batch:
+            order.ORDER_DATETIME = parse_datetime(order.DATE, order.TIME)
+        PurchaseOrder.objects.bulk_update(batch, ["ORDER_DATETIME"])
+        last_pk = batch[-1].ORDERID
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_purchaseorder_supplier_fk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="purchaseorder",
+            name="ORDER_DATETIME",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_order_datetime, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:03
+
+from django.db import migrations, models
+from django.db.models.functions import Round
+
+
+def round_money_columns(apps, schema_editor):
+    """Round existing float values to paise so they convert to DECIMAL without drift."""
+    Product = apps.get_model("api", "Product")
+    Billing = apps.get_model("api", "Billing")
+    Employee = apps.get_model("api", "Employee")
+
+    Product.objects.update(MRP=Round("MRP", 2))
+    Billing.objects.update(PRICE=Round("PRICE", 2))
+    Employee.objects.update(
+        BASIC_PAY=Round("BASIC_PAY", 2),
+        INCENTIVE=Round("INCENTIVE", 2),
+        NET_PAY=Round("NET_PAY", 2),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_purchaseorder_order_datetime"),
+    ]
+
+    operations = [
+        migrations.RunPython(round_money_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="product",
+            name="MRP",
+            field=models.DecimalField(
+                db_column="MRP", decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        migrations.AlterField(
+            model_name="billing",
+            name="PRICE",
+            field=models.DecimalField(
+                db_column="PRICE", decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        # A column cannot be altered into a generated one, so drop and re-add it.
+        # Legacy rows carried the whole bill's total on every line; after this
+        # TOTALPRICE is always PRICE * QUANTITY for the line.
+        migrations.RemoveField(
+            model_name="billing",
+            name="TOTAL_PRICE",
+        ),
+        migrations.AddField(
+            model_name="billing",
+            name="TOTAL_PRICE",
+            field=models.GeneratedField(
+                db_column="TOTALPRICE",
+                db_persist=True,
+                expression=models.F("PRICE") * models.F("QUANTITY"),
+                output_field=models.DecimalField(decimal_places=2, max_digits=12),
+            ),
+        ),
+        migrations.AlterField(
+            model_name="billing",
+            name="BILL_DATE",
+            field=models.DateField(
+                blank=True, db_column="BILLDATE", db_index=True, null=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="employee",
+            name="BASIC_PAY",
+            field=models.DecimalField(
+                db_column="BASICPAY", decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        migrations.AlterField(
+            model_name="employee",
+            name="INCENTIVE",
+            field=models.DecimalField(
+                db_column="INCENTIVE", decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        migrations.AlterField(
+            model_name="employee",
+            name="NET_PAY",
+            field=models.DecimalField(
+                db_column="NETPAY", decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+    ]
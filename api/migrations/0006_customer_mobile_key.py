@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:20
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_mobile(value):
+    """Frozen copy of api.models.normalize_mobile as of this migration: the last 10 digits, None for blanks/zeros."""
+    digits = re.sub(r"\D", "", str(value or ""))[-10:]
+    if not digits.strip("0"):
+        return None
+    return digits
+
+
+def backfill_mobile_key(apps, schema_editor):
+    """Fill MOBILE_KEY; when numbers collide the oldest customer keeps the key."""
+    Customer = apps.get_model("api", "Customer")
+
+    seen = set()
+    customers = list(Customer.objects.order_by("CUSTOMER_ID").only("CUSTOMER_ID", "MOBILE_NO"))
+    for customer in customers:
+        key = normalize_mobile(customer.MOBILE_NO)
+        if key in seen:
+            key = None
+        seen.add(key)
+        customer.MOBILE_KEY = key
+    Customer.objects.bulk_update(customers, ["MOBILE_KEY"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_money_decimal_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="MOBILE_KEY",
+            field=models.CharField(
+                blank=True, db_column="MOBILEKEY", editable=False, max_length=10, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_mobile_key, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="customer",
+            name="MOBILE_KEY",
+            field=models.CharField(
+                blank=True,
+                db_column="MOBILEKEY",
+                editable=False,
+                max_length=10,
+                null=True,
+                unique=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="billing",
+            index=models.Index(
+                fields=["CUSTOMER", "BILL_DATE"], name="billing_customer_date_idx"
+            ),
+        ),
+    ]
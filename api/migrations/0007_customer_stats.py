@@ -0,0 +1,143 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:08
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum, Value
+from django.db.models.functions import Coalesce
+
+TOP_CATEGORIES = 5
+
+
+def backfill_customer_stats(apps, schema_editor):
+    """Aggregate the existing bills per customer; a frozen copy of api.loyalty.rebuild_customer_stats."""
+    Billing = apps.get_model("api", "Billing")
+    CustomerStats = apps.get_model("api", "CustomerStats")
+    CustomerCategoryStats = apps.get_model("api", "CustomerCategoryStats")
+    bills = Billing.objects.filter(CUSTOMER__isnull=False)
+
+    categories = {}
+    for row in bills.values("CUSTOMER_id", "CATEGORY").annotate(
+        SPEND=Coalesce(Sum("TOTAL_PRICE"), Value(Decimal("0.00"))),
+        QUANTITY=Coalesce(Sum("QUANTITY"), 0),
+        LINES=Count("BILL_NO"),
+    ).order_by():
+        categories.setdefault(row["CUSTOMER_id"], []).append(row)
+    CustomerCategoryStats.objects.bulk_create(
+        (CustomerCategoryStats(**row) for rows in categories.values() for row in rows),
+        batch_size=1000,
+    )
+
+    CustomerStats.objects.bulk_create(
+        (
+            CustomerStats(
+                CUSTOMER_id=row["CUSTOMER_id"],
+                TOTAL_SPEND=row["TOTAL_SPEND"],
+                LINES=row["LINES"],
+                VISITS=row["VISITS"],
+                LAST_VISIT=row["LAST_VISIT"],
+                TOP_CATEGORIES=[
+                    {
+                        "CATEGORY": c["CATEGORY"],
+                        "SPEND": str(Decimal(c["SPEND"]).quantize(Decimal("0.01"))),
+                        "QUANTITY": c["QUANTITY"],
+                    }
+                    for c in sorted(categories[row["CUSTOMER_id"]], key=lambda c: (-c["SPEND"], c["CATEGORY"]))[:TOP_CATEGORIES]
+                ],
+            )
+            for row in bills.values("CUSTOMER_id").annotate(
+                TOTAL_SPEND=Coalesce(Sum("TOTAL_PRICE"), Value(Decimal("0.00"))),
+                LINES=Count("BILL_NO"),
+                VISITS=Count("BILL_DATE", distinct=True),
+                LAST_VISIT=Max("BILL_DATE"),
+            ).order_by()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_customer_mobile_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomerStats",
+            fields=[
+                (
+                    "CUSTOMER",
+                    models.OneToOneField(
+                        db_column="CUSTOMERID",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="STATS",
+                        serialize=False,
+                        to="api.customer",
+                    ),
+                ),
+                (
+                    "TOTAL_SPEND",
+                    models.DecimalField(
+                        db_column="TOTALSPEND",
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                    ),
+                ),
+                ("LINES", models.IntegerField(db_column="LINES", default=0)),
+                ("VISITS", models.IntegerField(db_column="VISITS", default=0)),
+                (
+                    "LAST_VISIT",
+                    models.DateField(blank=True, db_column="LASTVISIT", null=True),
+                ),
+                (
+                    "TOP_CATEGORIES",
+                    models.JSONField(db_column="TOPCATEGORIES", default=list),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CustomerCategoryStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("CATEGORY", models.CharField(db_column="CATEGORY", max_length=50)),
+                (
+                    "SPEND",
+                    models.DecimalField(
+                        db_column="SPEND", decimal_places=2, default=0, max_digits=14
+                    ),
+                ),
+                ("QUANTITY", models.IntegerField(db_column="QUANTITY", default=0)),
+                ("LINES", models.IntegerField(db_column="LINES", default=0)),
+                (
+                    "CUSTOMER",
+                    models.ForeignKey(
+                        db_column="CUSTOMERID",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="CATEGORY_STATS",
+                        to="api.customer",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("CUSTOMER", "CATEGORY"),
+                        name="customer_category_stats_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_customer_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_customer_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "KEY",
+                    models.CharField(
+                        db_column="IDEMPOTENCYKEY", max_length=255, unique=True
+                    ),
+                ),
+                (
+                    "FINGERPRINT",
+                    models.CharField(db_column="FINGERPRINT", max_length=64),
+                ),
+                ("STATUS_CODE", models.IntegerField(db_column="STATUSCODE")),
+                ("RESPONSE_BODY", models.TextField(db_column="RESPONSEBODY")),
+                (
+                    "CREATED_AT",
+                    models.DateTimeField(
+                        auto_now_add=True, db_column="CREATEDAT", db_index=True
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:11
+
+from django.db import migrations, models
+
+# label -> (model name, key field); mirrors api.sync.SYNC_MODELS
+SYNCED = {
+    "product": ("Product", "id"),
+    "stock": ("Stock", "id"),
+    "customer": ("Customer", "CUSTOMER_ID"),
+    "pincode": ("Pincode", "PINCODE"),
+}
+
+
+def backfill_changelog(apps, schema_editor):
+    """Give every existing row a SEQ so a first sync from 0 returns everything."""
+    ChangeLog = apps.get_model("api", "ChangeLog")
+    for label, (model_name, key_field) in SYNCED.items():
+        model = apps.get_model("api", model_name)
+        keys = model.objects.order_by(key_field).values_list(key_field, flat=True)
+        ChangeLog.objects.bulk_create(
+            (ChangeLog(MODEL=label, OBJECT_KEY=str(key)) for key in keys.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLog",
+            fields=[
+                (
+                    "SEQ",
+                    models.BigAutoField(
+                        db_column="SEQ", primary_key=True, serialize=False
+                    ),
+                ),
+                ("MODEL", models.CharField(db_column="MODEL", max_length=20)),
+                ("OBJECT_KEY", models.CharField(db_column="OBJECTKEY", max_length=50)),
+                ("DELETED", models.BooleanField(db_column="DELETED", default=False)),
+                (
+                    "CHANGED_AT",
+                    models.DateTimeField(auto_now=True, db_column="CHANGEDAT"),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("MODEL", "OBJECT_KEY"),
+                        name="changelog_model_object_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_changelog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_changelog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "JOB_ID",
+                    models.BigAutoField(
+                        db_column="JOBID", primary_key=True, serialize=False
+                    ),
+                ),
+                ("TASK", models.CharField(db_column="TASK", max_length=50)),
+                (
+                    "PARAMS",
+                    models.JSONField(blank=True, db_column="PARAMS", default=dict),
+                ),
+                (
+                    "STATUS",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                        ],
+                        db_column="STATUS",
+                        default="queued",
+                        max_length=10,
+                    ),
+                ),
+                ("PROGRESS", models.IntegerField(db_column="PROGRESS", default=0)),
+                (
+                    "MESSAGE",
+                    models.CharField(
+                        blank=True, db_column="MESSAGE", default="", max_length=255
+                    ),
+                ),
+                ("RESULT", models.JSONField(blank=True, db_column="RESULT", null=True)),
+                ("ERROR", models.TextField(blank=True, db_column="ERROR", default="")),
+                (
+                    "CREATED_AT",
+                    models.DateTimeField(auto_now_add=True, db_column="CREATEDAT"),
+                ),
+                (
+                    "STARTED_AT",
+                    models.DateTimeField(blank=True, db_column="STARTEDAT", null=True),
+                ),
+                (
+                    "FINISHED_AT",
+                    models.DateTimeField(blank=True, db_column="FINISHEDAT", null=True),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["STATUS", "CREATED_AT"], name="job_status_created_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableVersion",
+            fields=[
+                (
+                    "TABLE_NAME",
+                    models.CharField(
+                        db_column="TABLENAME",
+                        max_length=100,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("VERSION", models.BigIntegerField(db_column="VERSION", default=0)),
+            ],
+        ),
+    ]
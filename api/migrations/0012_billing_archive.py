@@ -0,0 +1,129 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:38
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_table_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingMonthSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("MONTH", models.DateField(db_column="MONTH")),
+                ("CATEGORY", models.CharField(db_column="CATEGORY", max_length=50)),
+                ("LINES", models.IntegerField(db_column="LINES", default=0)),
+                ("QUANTITY", models.IntegerField(db_column="QUANTITY", default=0)),
+                (
+                    "TOTAL_SALES",
+                    models.DecimalField(
+                        db_column="TOTALSALES",
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("MONTH", "CATEGORY"),
+                        name="billing_month_summary_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedBilling",
+            fields=[
+                (
+                    "BILL_NO",
+                    models.AutoField(
+                        db_column="BILLNO", primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "CATEGORY",
+                    models.CharField(
+                        db_column="CATEGORY", default="GENERAL", max_length=50
+                    ),
+                ),
+                ("QUANTITY", models.IntegerField(db_column="QUANTITY", default=0)),
+                (
+                    "PRICE",
+                    models.DecimalField(
+                        db_column="PRICE", decimal_places=2, default=0, max_digits=10
+                    ),
+                ),
+                (
+                    "TOTAL_PRICE",
+                    models.GeneratedField(
+                        db_column="TOTALPRICE",
+                        db_persist=True,
+                        expression=django.db.models.expressions.CombinedExpression(
+                            models.F("PRICE"), "*", models.F("QUANTITY")
+                        ),
+                        output_field=models.DecimalField(
+                            decimal_places=2, max_digits=12
+                        ),
+                    ),
+                ),
+                (
+                    "BILL_DATE",
+                    models.DateField(
+                        blank=True, db_column="BILLDATE", db_index=True, null=True
+                    ),
+                ),
+                (
+                    "CUSTOMER",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="CUSTOMERID",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="api.customer",
+                    ),
+                ),
+                (
+                    "EMPLOYEE",
+                    models.ForeignKey(
+                        blank=True,
+                        db_column="EMPLOYEEID",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="api.employee",
+                    ),
+                ),
+                (
+                    "PRODUCT",
+                    models.ForeignKey(
+                        db_column="PRODUCTID",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["CUSTOMER", "BILL_DATE"],
+                        name="archivedbilling_cust_date_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:10
+
+from decimal import Decimal
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def spend_to_decimal_strings(apps, schema_editor):
+    """TOP_CATEGORIES used to store SPEND as a float; store the 2-place decimal string instead."""
+    CustomerStats = apps.get_model("api", "CustomerStats")
+
+    changed = []
+    for stats in CustomerStats.objects.only("CUSTOMER_id", "TOP_CATEGORIES").iterator(chunk_size=BATCH_SIZE):
+        if not any(isinstance(entry.get("SPEND"), float) for entry in stats.TOP_CATEGORIES):
+            continue
+        for entry in stats.TOP_CATEGORIES:
+            # repr() of a float read back from 2 decimal places round-trips exactly
+            entry["SPEND"] = str(Decimal(repr(entry["SPEND"])).quantize(Decimal("0.01")))
+        changed.append(stats)
+        if len(changed) >= BATCH_SIZE:
+            CustomerStats.objects.bulk_update(changed, ["TOP_CATEGORIES"])
+            changed = []
+    if changed:
+        CustomerStats.objects.bulk_update(changed, ["TOP_CATEGORIES"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_billing_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(spend_to_decimal_strings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_top_categories_decimal_spend"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedbilling",
+            name="CLIENT_ID",
+            field=models.CharField(
+                blank=True, db_column="CLIENTID", max_length=200, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedbilling",
+            name="TERMINAL",
+            field=models.CharField(
+                blank=True, db_column="TERMINAL", max_length=50, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="billing",
+            name="CLIENT_ID",
+            field=models.CharField(
+                blank=True, db_column="CLIENTID", max_length=200, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="billing",
+            name="TERMINAL",
+            field=models.CharField(
+                blank=True, db_column="TERMINAL", max_length=50, null=True
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="archivedbilling",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("CLIENT_ID__isnull", False)),
+                fields=("TERMINAL", "CLIENT_ID"),
+                name="archivedbilling_terminal_client_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="billing",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("CLIENT_ID__isnull", False)),
+                fields=("TERMINAL", "CLIENT_ID"),
+                name="billing_terminal_client_unique",
+            ),
+        ),
+    ]
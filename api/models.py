@@ -1,12 +1,16 @@
+import re
+
 from django.db import models
 
+from .dates import parse_datetime
+
 class Product(models.Model):
     id = models.AutoField(primary_key=True)
     CATEGORY = models.CharField(max_length=50, default='GENERAL', db_column='CATEGORY')
     PRODUCT_NAME = models.CharField(max_length=100, default='UNKNOWN', db_column='PRODUCTNAME')
     BRAND_NAME = models.CharField(max_length=100, default='UNKNOWN', db_column='BRANDNAME')
     STOCK = models.IntegerField(default=0, db_column='STOCK')
-    MRP = models.FloatField(default=0.0, db_column='MRP')
+    MRP = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_column='MRP')
 
     def __str__(self):
         return self.PRODUCT_NAME
@@ -31,7 +35,7 @@ class Supplier(models.Model):
 
 class PurchaseOrder(models.Model):
     ORDERID = models.AutoField(primary_key=True)
-    SUPPLIER_ID = models.IntegerField(db_column="SUPPLIER_ID", default=0)
+    SUPPLIER = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, blank=True, db_column="SUPPLIER_ID", related_name='PURCHASEORDERS')
     SUPPLIER_NAME = models.CharField(max_length=100, db_column="SUPPLIER_NAME", default='UNKNOWN')
     CATEGORY = models.CharField(max_length=100, default="GENERAL")
     PRODUCTNAME = models.CharField(max_length=100, default="UNKNOWN")
@@ -40,11 +44,21 @@ class PurchaseOrder(models.Model):
     TOTAL_PRICE = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     DATE = models.CharField(max_length=50, default="N/A")
     TIME = models.CharField(max_length=50, default="N/A")
+    ORDER_DATETIME = models.DateTimeField(null=True, blank=True, db_index=True)
     PENDING_QUANTITY = models.IntegerField(default=0)
 
     def __str__(self):
         return f"Order {self.ORDERID}"
 
+    def sync_order_datetime(self):
+        # DATE/TIME stay as the raw strings clients send; ORDER_DATETIME is the indexed copy,
+        # cleared when DATE no longer parses so date-range filters don't match a stale day
+        self.ORDER_DATETIME = parse_datetime(self.DATE, self.TIME)
+
+    def save(self, *args, **kwargs):
+        self.sync_order_datetime()
+        super().save(*args, **kwargs)
+
 class ItemEntry(models.Model):
     ORDER = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, db_column='ORDERID', related_name='ITEMENTRIES')
     SUPPLIER_NAME = models.CharField(max_length=100, db_column="SUPPLIERNAME", default='UNKNOWN')
@@ -57,13 +71,26 @@ class ItemEntry(models.Model):
     PENDING_QUANTITY = models.IntegerField(default=0, db_column='PENDINGQUANTITY')
 
     def __str__(self):
-        return f"Item Entry for Order {self.ORDER.ORDERID} - {self.PRODUCTNAME}"
+        return f"Item Entry for Order {self.ORDER_id} - {self.PRODUCTNAME}"
+
+
+def normalize_mobile(value):
+    """
+    Reduce a phone number to the key customers are looked up by: its last
+    10 digits, so "+91 96542-84717", "096542 84717" and "9654284717" match.
+    Returns None for blanks and the all-zero placeholder.
+    """
+    digits = re.sub(r'\D', '', str(value or ''))[-10:]
+    if not digits.strip('0'):
+        return None
+    return digits
 
 
 class Customer(models.Model):
     CUSTOMER_ID = models.AutoField(primary_key=True, db_column='CUSTOMERID')
     NAME = models.CharField(max_length=100, db_column='CUSTOMERNAME', default='UNKNOWN')
     MOBILE_NO = models.CharField(max_length=15, db_column='MOBILE', default='0000000000')
+    MOBILE_KEY = models.CharField(max_length=10, db_column='MOBILEKEY', unique=True, null=True, blank=True, editable=False)
     ADDRESS = models.TextField(db_column='ADDRESS', default='N/A')
     CITY = models.CharField(max_length=50, db_column='CITY', default='N/A')
     TOWN = models.CharField(max_length=50, db_column='TOWN', default='N/A')
@@ -72,22 +99,136 @@ class Customer(models.Model):
     def __str__(self):
         return self.NAME
 
+    # MOBILE_NO as loaded from the database; see save()
+    _loaded_mobile = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_mobile = instance.__dict__.get('MOBILE_NO')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Derive the key only for new customers and changed numbers: a later
+        # duplicate whose key the 0006 backfill cleared keeps it cleared
+        if self._state.adding or (
+            'MOBILE_NO' in self.__dict__ and normalize_mobile(self.MOBILE_NO) != normalize_mobile(self._loaded_mobile)
+        ):
+            self.MOBILE_KEY = normalize_mobile(self.MOBILE_NO)
+        super().save(*args, **kwargs)
+        self._loaded_mobile = self.MOBILE_NO
+
+
+class CustomerStats(models.Model):
+    """
+    Lifetime billing aggregates for one customer, kept up to date as bills are
+    created, changed and deleted (see api/loyalty.py), so loyalty screens read
+    one row instead of scanning the customer's Billing history.
+    """
+    CUSTOMER = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='STATS', db_column='CUSTOMERID')
+    TOTAL_SPEND = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='TOTALSPEND')
+    LINES = models.IntegerField(default=0, db_column='LINES')
+    VISITS = models.IntegerField(default=0, db_column='VISITS')
+    LAST_VISIT = models.DateField(null=True, blank=True, db_column='LASTVISIT')
+    TOP_CATEGORIES = models.JSONField(default=list, db_column='TOPCATEGORIES')
+
+    def __str__(self):
+        return f"Stats for customer {self.CUSTOMER_id}"
+
 
-class Billing(models.Model):
+class CustomerCategoryStats(models.Model):
+    CUSTOMER = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='CATEGORY_STATS', db_column='CUSTOMERID')
+    CATEGORY = models.CharField(max_length=50, db_column='CATEGORY')
+    SPEND = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='SPEND')
+    QUANTITY = models.IntegerField(default=0, db_column='QUANTITY')
+    LINES = models.IntegerField(default=0, db_column='LINES')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['CUSTOMER', 'CATEGORY'], name='customer_category_stats_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.CATEGORY} stats for customer {self.CUSTOMER_id}"
+
+
+class BillingLine(models.Model):
+    """Columns of a bill line, shared by the hot Billing table and its archive."""
     BILL_NO = models.AutoField(primary_key=True, db_column='BILLNO')
     PRODUCT = models.ForeignKey(Product, on_delete=models.CASCADE, db_column='PRODUCTID')
     CUSTOMER = models.ForeignKey('Customer', on_delete=models.SET_NULL, null=True, blank=True, db_column='CUSTOMERID')
     EMPLOYEE = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, blank=True, db_column='EMPLOYEEID')  # ✅ new
     CATEGORY = models.CharField(max_length=50, default='GENERAL', db_column='CATEGORY')
     QUANTITY = models.IntegerField(default=0, db_column='QUANTITY')
-    PRICE = models.FloatField(default=0.0, db_column='PRICE')
-    TOTAL_PRICE = models.FloatField(default=0.0, db_column='TOTALPRICE')
-    BILL_DATE = models.DateField(null=True, blank=True, db_column='BILLDATE')
+    PRICE = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_column='PRICE')
+    # Line total, computed by the database so clients cannot send a mismatching value
+    TOTAL_PRICE = models.GeneratedField(
+        expression=models.F('PRICE') * models.F('QUANTITY'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+        db_column='TOTALPRICE',
+    )
+    BILL_DATE = models.DateField(null=True, blank=True, db_column='BILLDATE', db_index=True)
+    # Set on bills uploaded by POST /api/billing/batch/: the till and its own id for the
+    # bill, unique together so a resent upload is recognised however late it comes
+    TERMINAL = models.CharField(max_length=50, null=True, blank=True, db_column='TERMINAL')
+    CLIENT_ID = models.CharField(max_length=200, null=True, blank=True, db_column='CLIENTID')
+
+    class Meta:
+        abstract = True
 
     def __str__(self):
         return f"Bill {self.BILL_NO}"
 
 
+class Billing(BillingLine):
+    class Meta:
+        indexes = [
+            # A customer's recent bills (lookup endpoint) without touching other rows
+            models.Index(fields=['CUSTOMER', 'BILL_DATE'], name='billing_customer_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['TERMINAL', 'CLIENT_ID'], condition=models.Q(CLIENT_ID__isnull=False),
+                name='billing_terminal_client_unique',
+            ),
+        ]
+
+
+class ArchivedBilling(BillingLine):
+    """
+    Bills of closed months, moved out of Billing with their BILL_NO by
+    api/archive.py so that day-to-day queries only scan recent rows.
+    """
+    class Meta:
+        indexes = [
+            models.Index(fields=['CUSTOMER', 'BILL_DATE'], name='archivedbilling_cust_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['TERMINAL', 'CLIENT_ID'], condition=models.Q(CLIENT_ID__isnull=False),
+                name='archivedbilling_terminal_client_unique',
+            ),
+        ]
+
+
+class BillingMonthSummary(models.Model):
+    """Per-category totals of an archived month, rolled up when it is archived."""
+    MONTH = models.DateField(db_column='MONTH')  # first day of the month
+    CATEGORY = models.CharField(max_length=50, db_column='CATEGORY')
+    LINES = models.IntegerField(default=0, db_column='LINES')
+    QUANTITY = models.IntegerField(default=0, db_column='QUANTITY')
+    TOTAL_SALES = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='TOTALSALES')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['MONTH', 'CATEGORY'], name='billing_month_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.MONTH:%Y-%m} {self.CATEGORY}"
+
+
 class Employee(models.Model):
     EMPLOYEE_ID = models.AutoField(primary_key=True, db_column='EMPLOYEEID')
     NAME = models.CharField(max_length=100, default='UNKNOWN', db_column='EMPLOYEENAME')
@@ -100,9 +241,9 @@ class Employee(models.Model):
     EMAIL_ID = models.EmailField(default='unknown@example.com', db_column='EMAILID')
     QUALIFICATION = models.CharField(max_length=100, default='N/A', db_column='QUALIFICATION')
     DESIGNATION = models.CharField(max_length=100, default='STAFF', db_column='DESIGNATION')
-    BASIC_PAY = models.FloatField(default=0.0, db_column='BASICPAY')
-    INCENTIVE = models.FloatField(default=0.0, db_column='INCENTIVE')
-    NET_PAY = models.FloatField(default=0.0, db_column='NETPAY')
+    BASIC_PAY = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_column='BASICPAY')
+    INCENTIVE = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_column='INCENTIVE')
+    NET_PAY = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_column='NETPAY')
 
     def __str__(self):
         return self.NAME
@@ -115,3 +256,83 @@ class Pincode(models.Model):
 
     def __str__(self):
         return str(self.PINCODE)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response of a write made with an Idempotency-Key header, replayed when a
+    client retries with the same key (see api/idempotency.py).
+    """
+    KEY = models.CharField(max_length=255, unique=True, db_column='IDEMPOTENCYKEY')
+    FINGERPRINT = models.CharField(max_length=64, db_column='FINGERPRINT')
+    STATUS_CODE = models.IntegerField(db_column='STATUSCODE')
+    RESPONSE_BODY = models.TextField(db_column='RESPONSEBODY')
+    CREATED_AT = models.DateTimeField(auto_now_add=True, db_index=True, db_column='CREATEDAT')
+
+    def __str__(self):
+        return self.KEY
+
+
+class ChangeLog(models.Model):
+    """
+    Latest change to each synced row, ordered by a monotonically increasing
+    SEQ. Saving or deleting a row replaces its entry with a new, higher SEQ,
+    so the table holds one entry per row and /api/sync/?since=<SEQ> returns
+    only what changed after a client's last sync.
+    """
+    SEQ = models.BigAutoField(primary_key=True, db_column='SEQ')
+    MODEL = models.CharField(max_length=20, db_column='MODEL')
+    OBJECT_KEY = models.CharField(max_length=50, db_column='OBJECTKEY')
+    DELETED = models.BooleanField(default=False, db_column='DELETED')
+    CHANGED_AT = models.DateTimeField(auto_now=True, db_column='CHANGEDAT')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['MODEL', 'OBJECT_KEY'], name='changelog_model_object_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.SEQ}: {self.MODEL} {self.OBJECT_KEY}{' (deleted)' if self.DELETED else ''}"
+
+
+class TableVersion(models.Model):
+    """
+    Change counter per table, bumped by database triggers on every insert,
+    update and delete, so bulk writes and queryset.update() count too. List
+    endpoints build their ETags from it (see api/versions.py).
+    """
+    TABLE_NAME = models.CharField(max_length=100, primary_key=True, db_column='TABLENAME')
+    VERSION = models.BigIntegerField(default=0, db_column='VERSION')
+
+    def __str__(self):
+        return f"{self.TABLE_NAME} v{self.VERSION}"
+
+
+class Job(models.Model):
+    """A background task queued through /api/jobs/ and run by api/jobs.py."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    JOB_ID = models.BigAutoField(primary_key=True, db_column='JOBID')
+    TASK = models.CharField(max_length=50, db_column='TASK')
+    PARAMS = models.JSONField(default=dict, blank=True, db_column='PARAMS')
+    STATUS = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_column='STATUS')
+    PROGRESS = models.IntegerField(default=0, db_column='PROGRESS')
+    MESSAGE = models.CharField(max_length=255, blank=True, default='', db_column='MESSAGE')
+    RESULT = models.JSONField(null=True, blank=True, db_column='RESULT')
+    ERROR = models.TextField(blank=True, default='', db_column='ERROR')
+    CREATED_AT = models.DateTimeField(auto_now_add=True, db_column='CREATEDAT')
+    STARTED_AT = models.DateTimeField(null=True, blank=True, db_column='STARTEDAT')
+    FINISHED_AT = models.DateTimeField(null=True, blank=True, db_column='FINISHEDAT')
+
+    class Meta:
+        indexes = [
+            # Workers pick the oldest queued job
+            models.Index(fields=['STATUS', 'CREATED_AT'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.JOB_ID} ({self.TASK}, {self.STATUS})"
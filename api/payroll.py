@@ -0,0 +1,64 @@
+from calendar import monthrange
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from .archive import billing_sources
+from .models import Employee
+
+
+def month_period(month):
+    """'2024-03' -> (date(2024, 3, 1), date(2024, 3, 31))."""
+    year, month = (int(part) for part in month.split('-'))
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def incentive_rate():
+    return Decimal(str(getattr(settings, 'PAYROLL_INCENTIVE_RATE', '0.01')))
+
+
+def run_payroll(date_from, date_to, rate=None, commit=True):
+    """
+    Derive every employee's INCENTIVE (rate x their sales in the period) and
+    NET_PAY (BASIC_PAY + INCENTIVE).
+
+    Sales come from one grouped query per billing table the period touches
+    (see api.archive) and all employees are written with a single bulk_update, so the cost does not depend on how
+    many bills were made. Returns one dict per employee.
+    """
+    rate = incentive_rate() if rate is None else Decimal(str(rate))
+
+    sales = {}
+    for source in billing_sources(date_from, date_to):
+        rows = (
+            source.filter(EMPLOYEE__isnull=False)
+            .values('EMPLOYEE_id')
+            .annotate(SALES=Sum('TOTAL_PRICE'))
+            .order_by()
+            .values_list('EMPLOYEE_id', 'SALES')
+        )
+        for employee_id, amount in rows:
+            sales[employee_id] = sales.get(employee_id, Decimal('0')) + amount
+
+    employees = list(Employee.objects.only('EMPLOYEE_ID', 'NAME', 'BASIC_PAY', 'INCENTIVE', 'NET_PAY').order_by('EMPLOYEE_ID'))
+    rows = []
+    for employee in employees:
+        employee_sales = (sales.get(employee.EMPLOYEE_ID) or Decimal('0')).quantize(Decimal('0.01'))
+        employee.INCENTIVE = (employee_sales * rate).quantize(Decimal('0.01'))
+        employee.NET_PAY = employee.BASIC_PAY + employee.INCENTIVE
+        rows.append({
+            'EMPLOYEE_ID': employee.EMPLOYEE_ID,
+            'NAME': employee.NAME,
+            'SALES': employee_sales,
+            'BASIC_PAY': employee.BASIC_PAY,
+            'INCENTIVE': employee.INCENTIVE,
+            'NET_PAY': employee.NET_PAY,
+        })
+
+    if commit:
+        with transaction.atomic():
+            Employee.objects.bulk_update(employees, ['INCENTIVE', 'NET_PAY'], batch_size=500)
+    return rows
@@ -0,0 +1,112 @@
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .models import Supplier, TableVersion
+
+
+class _Snapshot:
+    def __init__(self, names, version):
+        self.names = names
+        # Ids looked up and not found while this snapshot is current
+        self.missing = set()
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+
+class SupplierRegistry:
+    """
+    In-process map of SUPPLIER_ID -> NAME used to validate purchase orders
+    without a Supplier query per order.
+
+    Freshness comes from the api_supplier change counter (api/versions.py),
+    which every worker's writes bump: each lookup reads that one row and
+    reloads the map when it moved, so a supplier deleted by another worker
+    is rejected at once. Unknown ids are remembered until the next change.
+    Where the counter is not installed (databases other than SQLite) the map
+    is reloaded after SUPPLIER_REGISTRY_TTL seconds and unknown ids are
+    looked up in the database instead.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._pinned = ContextVar('supplier_registry_pinned', default=None)
+
+    def _ttl(self):
+        return getattr(settings, "SUPPLIER_REGISTRY_TTL", 300)
+
+    def _version(self):
+        return (
+            TableVersion.objects.filter(TABLE_NAME=Supplier._meta.db_table)
+            .values_list("VERSION", flat=True)
+            .first()
+        )
+
+    def _load(self):
+        return dict(Supplier.objects.values_list("SUPPLIER_ID", "NAME"))
+
+    def _is_current(self, snapshot, version):
+        if snapshot is None:
+            return False
+        if version is None:
+            return snapshot.version is None and time.monotonic() - snapshot.loaded_at <= self._ttl()
+        return snapshot.version == version
+
+    def snapshot(self):
+        pinned = self._pinned.get()
+        if pinned is not None:
+            return pinned
+        version = self._version()
+        snapshot = self._snapshot
+        if not self._is_current(snapshot, version):
+            with self._lock:
+                # Another thread may have reloaded while we waited
+                snapshot = self._snapshot
+                if not self._is_current(snapshot, version):
+                    snapshot = _Snapshot(self._load(), version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Check the change counter once for every lookup in the block, e.g. one request's orders."""
+        token = self._pinned.set(self.snapshot())
+        try:
+            yield
+        finally:
+            self._pinned.reset(token)
+
+    def names(self):
+        return self.snapshot().names
+
+    def get_name(self, supplier_id):
+        if supplier_id is None:
+            return None
+        snapshot = self.snapshot()
+        if supplier_id in snapshot.names:
+            return snapshot.names[supplier_id]
+        if supplier_id in snapshot.missing or snapshot.version is not None:
+            # With the counter, a supplier missing from a current map does not exist
+            snapshot.missing.add(supplier_id)
+            return None
+
+        # No counter: created by another worker since the last load?
+        name = Supplier.objects.filter(SUPPLIER_ID=supplier_id).values_list("NAME", flat=True).first()
+        if name is None:
+            snapshot.missing.add(supplier_id)
+        else:
+            snapshot.names[supplier_id] = name
+        return name
+
+    def exists(self, supplier_id):
+        return self.get_name(supplier_id) is not None
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+supplier_registry = SupplierRegistry()
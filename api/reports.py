@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+from .archive import summary_rows
+
+
+def billing_summary(date_from=None, date_to=None):
+    """
+    Line count, quantity and sales, overall and per category. Recent bills are
+    summed in the database and archived months read from their rollups.
+    """
+    by_category = {}
+    for row in summary_rows(date_from, date_to):
+        merged = by_category.setdefault(
+            row['CATEGORY'],
+            {'CATEGORY': row['CATEGORY'], 'LINES': 0, 'QUANTITY': 0, 'TOTAL_SALES': Decimal('0.00')},
+        )
+        merged['LINES'] += row['LINES']
+        merged['QUANTITY'] += row['QUANTITY']
+        merged['TOTAL_SALES'] += row['TOTAL_SALES']
+
+    categories = [by_category[category] for category in sorted(by_category)]
+    for row in categories:
+        row['TOTAL_SALES'] = row['TOTAL_SALES'].quantize(Decimal('0.01'))
+    return {
+        'LINES': sum(row['LINES'] for row in categories),
+        'QUANTITY': sum(row['QUANTITY'] for row in categories),
+        'TOTAL_SALES': sum((row['TOTAL_SALES'] for row in categories), Decimal('0.00')),
+        'BY_CATEGORY': categories,
+    }
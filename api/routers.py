@@ -0,0 +1,121 @@
+"""
+Routing of reporting reads to a read replica.
+
+Inside replica_reads() (safe API requests, see ReplicaRoutingMiddleware, and
+report/export jobs) reads of the large reporting tables go to the "replica"
+database: a periodic SQLite snapshot of the primary (manage.py
+snapshot_replica) or a streaming Postgres standby. Everything else, and
+every write, uses "default".
+
+The lag guard sends reads back to the primary whenever the replica is
+further behind than settings.REPLICA_MAX_LAG_SECONDS, or its lag cannot be
+told. Clients that just wrote are pinned to the primary for that long, so
+they read their own writes.
+"""
+import contextlib
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = 'replica'
+# Rows that only reports and lists read in bulk; checkout reads stock and products from the primary
+REPLICATED_MODELS = {'billing', 'archivedbilling', 'billingmonthsummary', 'purchaseorder', 'itementry'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """
+    Let reads of REPLICATED_MODELS in this block use the replica. The lag
+    guard is checked once on entry, so a response is read from one database.
+    """
+    token = _replica_reads.set(replica_configured() and lag_guard.replica_is_fresh())
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def max_lag():
+    return getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 300)
+
+
+def replica_lag(alias=REPLICA):
+    """Seconds the replica is behind the primary, or None when unknown."""
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        # snapshot_replica dates the file to the moment the copy started
+        try:
+            return max(0.0, time.time() - os.path.getmtime(connection.settings_dict['NAME']))
+        except OSError:
+            return None
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )
+            row = cursor.fetchone()
+        return None if row is None or row[0] is None else float(row[0])
+    return None
+
+
+class LagGuard:
+    """replica_lag() checked at most every LAG_CHECK_SECONDS per process."""
+
+    LAG_CHECK_SECONDS = 1.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.fresh = False
+
+    def replica_is_fresh(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < self.LAG_CHECK_SECONDS:
+                return self.fresh
+            self.checked_at = now
+        try:
+            lag = replica_lag()
+        except Exception:
+            lag = None
+        fresh = lag is not None and lag <= max_lag()
+        with self.lock:
+            self.fresh = fresh
+        return fresh
+
+
+lag_guard = LagGuard()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and model._meta.model_name in REPLICATED_MODELS
+            # Reads inside a write transaction see that transaction's rows
+            and not connections['default'].in_atomic_block
+        ):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary's schema, never migrated itself
+        return db != REPLICA
@@ -1,9 +1,17 @@
+from decimal import Decimal
+
+from django.db import transaction
+
 from rest_framework import serializers
-from .models import Pincode, Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, Employee, Customer
+from .models import Pincode, Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, Employee, Customer, CustomerStats, Job, normalize_mobile
+from .archive import archive_boundary, is_archived
+from .payroll import month_period
+from .registry import supplier_registry
 
 class ProductSerializer(serializers.ModelSerializer):
     PRODUCTNAME = serializers.CharField(source='PRODUCT_NAME')
     BRANDNAME = serializers.CharField(source='BRAND_NAME')
+    MRP = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, required=False)
 
     class Meta:
         model = Product
@@ -23,16 +31,54 @@ class SupplierSerializer(serializers.ModelSerializer):
         model = Supplier
         fields = '__all__'
 
+class PurchaseOrderListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # One supplier change-counter read for the whole batch
+        with supplier_registry.pinned():
+            return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        orders = [PurchaseOrder(**item) for item in validated_data]
+        for order in orders:
+            order.sync_order_datetime()  # bulk_create skips Model.save()
+        return PurchaseOrder.objects.bulk_create(orders, batch_size=500)
+
 class PurchaseOrderSerializer(serializers.ModelSerializer):
+    # Exposed as a plain id so validation goes through the supplier registry
+    # instead of a PrimaryKeyRelatedField lookup per order.
+    SUPPLIER_ID = serializers.IntegerField(source='SUPPLIER_id', allow_null=True)
+    SUPPLIER_NAME = serializers.CharField(read_only=True)
+
     def validate(self, data):
-        supplier_id = data.get("SUPPLIER_ID")
-        if not Supplier.objects.filter(SUPPLIER_ID=supplier_id).exists():
+        if 'SUPPLIER_id' not in data and self.instance is not None:
+            return data
+        supplier_id = data.get("SUPPLIER_id")
+        supplier_name = supplier_registry.get_name(supplier_id)
+        if supplier_name is None:
             raise serializers.ValidationError(f"Supplier {supplier_id} does not exist.")
+        data["SUPPLIER_NAME"] = supplier_name
         return data
 
+    def create(self, validated_data):
+        order = PurchaseOrder(**validated_data)
+        # validate() set SUPPLIER_NAME; the pre_save signal needn't look it up again
+        order._supplier_name_set = True
+        order.save()
+        return order
+
+    def update(self, instance, validated_data):
+        instance._supplier_name_set = 'SUPPLIER_NAME' in validated_data
+        return super().update(instance, validated_data)
+
     class Meta:
         model = PurchaseOrder
-        fields = '__all__'
+        fields = [
+            'ORDERID', 'SUPPLIER_ID', 'SUPPLIER_NAME', 'CATEGORY', 'PRODUCTNAME',
+            'PRICE', 'QUANTITY_REQUIRED', 'TOTAL_PRICE', 'DATE', 'TIME', 'ORDER_DATETIME',
+            'PENDING_QUANTITY'
+        ]
+        read_only_fields = ['ORDER_DATETIME']
+        list_serializer_class = PurchaseOrderListSerializer
 
 class ItemEntrySerializer(serializers.ModelSerializer):
     ORDERID = serializers.IntegerField(source='ORDER.ORDERID', read_only=True)
@@ -52,6 +98,9 @@ class BillingSerializer(serializers.ModelSerializer):
     CUSTOMER_NAME = serializers.CharField(source='CUSTOMER.NAME', read_only=True)
     CUSTOMER_MOBILE = serializers.CharField(source='CUSTOMER.MOBILE_NO', read_only=True)
     EMPLOYEE_NAME = serializers.CharField(source='EMPLOYEE.NAME', read_only=True)
+    # Money is DECIMAL in the database but still rendered as JSON numbers
+    PRICE = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, required=False)
+    TOTAL_PRICE = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
 
     class Meta:
         model = Billing
@@ -62,6 +111,13 @@ class BillingSerializer(serializers.ModelSerializer):
             'EMPLOYEE', 'EMPLOYEE_NAME'
         ]
 
+    def validate_BILL_DATE(self, value):
+        # Archived months are closed; their totals are already rolled up
+        boundary = archive_boundary()
+        if is_archived(value, boundary):
+            raise serializers.ValidationError(f"Bills before {boundary} are archived and can no longer be added or moved there.")
+        return value
+
     def create(self, validated_data):
         product = validated_data['PRODUCT']
         quantity = validated_data['QUANTITY']
@@ -69,27 +125,33 @@ class BillingSerializer(serializers.ModelSerializer):
         if product.STOCK < quantity:
             raise serializers.ValidationError("Insufficient product stock.")
 
-        # Create the billing instance
-        bill = super().create(validated_data)
-
-        # Deduct from Product main stock
-        product.STOCK -= quantity
-        product.save()
-
-        remaining_qty = quantity
-
-        # Deduct from Stock records
-        stock_records = Stock.objects.filter(PRODUCT=product).order_by('id')
-        for stock in stock_records:
-            if remaining_qty <= 0:
-                break
-            if stock.STOCK >= remaining_qty:
-                stock.STOCK -= remaining_qty
-                remaining_qty = 0
-            else:
-                remaining_qty -= stock.STOCK
-                stock.STOCK = 0
-            stock.save()
+        # CATEGORY is read-only on the API; store the product's so per-category reports work
+        validated_data['CATEGORY'] = product.CATEGORY
+
+        # The bill, its stock deductions and the loyalty/sync rows its signals
+        # write are kept or rolled back together
+        with transaction.atomic():
+            # Create the billing instance
+            bill = super().create(validated_data)
+
+            # Deduct from Product main stock
+            product.STOCK -= quantity
+            product.save()
+
+            remaining_qty = quantity
+
+            # Deduct from Stock records
+            stock_records = Stock.objects.filter(PRODUCT=product).order_by('id')
+            for stock in stock_records:
+                if remaining_qty <= 0:
+                    break
+                if stock.STOCK >= remaining_qty:
+                    stock.STOCK -= remaining_qty
+                    remaining_qty = 0
+                else:
+                    remaining_qty -= stock.STOCK
+                    stock.STOCK = 0
+                stock.save()
 
         # ✅ Must return the created object instance
         return bill
@@ -97,7 +159,10 @@ class BillingSerializer(serializers.ModelSerializer):
 class EmployeeSerializer(serializers.ModelSerializer):
     DOB = serializers.DateField(allow_null=True, required=False)
     DOJ = serializers.DateField(allow_null=True, required=False)
-    
+    BASIC_PAY = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, required=False)
+    INCENTIVE = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, required=False)
+    NET_PAY = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False, required=False)
+
     class Meta:
         model = Employee
         fields = '__all__'
@@ -107,7 +172,84 @@ class CustomerSerializer(serializers.ModelSerializer):
         model = Customer
         fields = ['CUSTOMER_ID', 'NAME', 'MOBILE_NO', 'ADDRESS', 'CITY', 'TOWN', 'PINCODE']
 
+    def validate_MOBILE_NO(self, value):
+        key = normalize_mobile(value)
+        if self.instance is not None and key == normalize_mobile(self.instance.MOBILE_NO):
+            # Unchanged number, MOBILE_KEY stays as it is
+            return value
+        duplicates = Customer.objects.filter(MOBILE_KEY=key)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if key and duplicates.exists():
+            raise serializers.ValidationError("A customer with this mobile number already exists.")
+        return value
+
+class CustomerLookupSerializer(CustomerSerializer):
+    """Customer plus the RECENT_* billing aggregates annotated by CustomerViewSet.lookup."""
+    RECENT_VISITS = serializers.IntegerField(read_only=True)
+    RECENT_LINES = serializers.IntegerField(read_only=True)
+    RECENT_SPEND = serializers.DecimalField(max_digits=12, decimal_places=2, coerce_to_string=False, read_only=True)
+    LAST_VISIT = serializers.DateField(read_only=True)
+
+    class Meta(CustomerSerializer.Meta):
+        fields = CustomerSerializer.Meta.fields + ['RECENT_VISITS', 'RECENT_LINES', 'RECENT_SPEND', 'LAST_VISIT']
+
+class TopCategorySerializer(serializers.Serializer):
+    CATEGORY = serializers.CharField()
+    SPEND = serializers.DecimalField(max_digits=14, decimal_places=2, coerce_to_string=False)
+    QUANTITY = serializers.IntegerField()
+
+class CustomerStatsSerializer(serializers.ModelSerializer):
+    CUSTOMER_ID = serializers.IntegerField(source='CUSTOMER_id', read_only=True)
+    TOTAL_SPEND = serializers.DecimalField(max_digits=14, decimal_places=2, coerce_to_string=False, read_only=True)
+    TOP_CATEGORIES = TopCategorySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = CustomerStats
+        fields = ['CUSTOMER_ID', 'TOTAL_SPEND', 'LINES', 'VISITS', 'LAST_VISIT', 'TOP_CATEGORIES']
+
+class PayrollSerializer(serializers.Serializer):
+    """A payroll run: a month or date_from/date_to, plus the incentive rate and dry_run."""
+    month = serializers.CharField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    # A fraction of sales; DecimalField refuses NaN and Infinity
+    rate = serializers.DecimalField(
+        max_digits=5, decimal_places=4, min_value=Decimal('0'), max_value=Decimal('1'), required=False, allow_null=True,
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data.get('month'):
+            try:
+                data['date_from'], data['date_to'] = month_period(data['month'])
+            except ValueError:
+                raise serializers.ValidationError({'month': "Must be YYYY-MM."})
+        elif not (data.get('date_from') and data.get('date_to')):
+            raise serializers.ValidationError("Give a month (YYYY-MM) or date_from and date_to (YYYY-MM-DD).")
+        if data['date_from'] > data['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return data
+
+    @staticmethod
+    def describe(errors):
+        """Flatten ``errors`` into one line for job and command messages."""
+        return '; '.join(
+            f"{field}: {' '.join(str(message) for message in messages)}" if field != 'non_field_errors'
+            else ' '.join(str(message) for message in messages)
+            for field, messages in errors.items()
+        )
+
 class PincodeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Pincode
-        fields = ['PINCODE', 'CITY', 'STATE', 'TOWN']
\ No newline at end of file
+        fields = ['PINCODE', 'CITY', 'STATE', 'TOWN']
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'JOB_ID', 'TASK', 'PARAMS', 'STATUS', 'PROGRESS', 'MESSAGE',
+            'RESULT', 'ERROR', 'CREATED_AT', 'STARTED_AT', 'FINISHED_AT'
+        ]
+        read_only_fields = [field for field in fields if field not in ('TASK', 'PARAMS')]
@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import loyalty, sync
+from .models import Billing, Customer, Pincode, Product, PurchaseOrder, Stock, Supplier
+from .registry import supplier_registry
+
+
+# ----------------- Supplier registry -----------------
+@receiver(post_save, sender=Supplier)
+def supplier_saved(sender, instance, **kwargs):
+    supplier_registry.invalidate()
+    # Keep the denormalised name on purchase orders in sync
+    PurchaseOrder.objects.filter(SUPPLIER=instance).exclude(
+        SUPPLIER_NAME=instance.NAME
+    ).update(SUPPLIER_NAME=instance.NAME)
+
+
+@receiver(post_delete, sender=Supplier)
+def supplier_deleted(sender, instance, **kwargs):
+    supplier_registry.invalidate()
+
+
+@receiver(pre_save, sender=PurchaseOrder)
+def purchase_order_supplier_name(sender, instance, **kwargs):
+    if instance.__dict__.pop('_supplier_name_set', False):
+        return
+    name = supplier_registry.get_name(instance.SUPPLIER_id)
+    if name is not None:
+        instance.SUPPLIER_NAME = name
+
+
+# ----------------- Customer loyalty aggregates -----------------
+@receiver(pre_save, sender=Billing)
+def billing_remember_previous(sender, instance, **kwargs):
+    instance._loyalty_previous = None
+    if not instance._state.adding and instance.BILL_NO is not None:
+        previous = Billing.objects.filter(BILL_NO=instance.BILL_NO).first()
+        if previous is not None:
+            instance._loyalty_previous = loyalty.snapshot(previous)
+
+
+@receiver(post_save, sender=Billing)
+def billing_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_loyalty_previous', None)
+    if previous is not None:
+        loyalty.remove_bill(previous)
+    loyalty.add_bill(loyalty.snapshot(instance))
+
+
+@receiver(post_delete, sender=Billing)
+def billing_deleted(sender, instance, **kwargs):
+    loyalty.remove_bill(loyalty.snapshot(instance))
+
+
+# ----------------- POS delta sync -----------------
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Pincode)
+def synced_row_remember_previous(sender, instance, **kwargs):
+    sync.remember_previous(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Stock)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Pincode)
+def synced_row_saved(sender, instance, **kwargs):
+    sync.record_instance(instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Stock)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Pincode)
+def synced_row_deleted(sender, instance, **kwargs):
+    sync.record_instance(instance, deleted=True)
@@ -0,0 +1,111 @@
+from django.db import transaction
+
+from .models import ChangeLog, Customer, Pincode, Product, Stock
+
+# label -> (model, serializer name, field the client identifies rows by).
+# Serializers are looked up by name when a page is built: this module is
+# imported from the signals at django.setup(), and importing them there would
+# load DRF into every manage.py command.
+SYNC_MODELS = {
+    'product': (Product, 'ProductSerializer', 'id'),
+    'stock': (Stock, 'StockSerializer', 'id'),
+    'customer': (Customer, 'CustomerSerializer', 'CUSTOMER_ID'),
+    'pincode': (Pincode, 'PincodeSerializer', 'PINCODE'),
+}
+LABELS = {model: label for label, (model, _, _) in SYNC_MODELS.items()}
+# label -> (its fields other synced rows embed, label of those rows, their FK to it).
+# StockSerializer carries PRODUCTNAME, BRANDNAME and CATEGORY of its product.
+EMBEDDED = {
+    'product': (('PRODUCT_NAME', 'BRAND_NAME', 'CATEGORY'), 'stock', 'PRODUCT'),
+}
+RECORD_BATCH_SIZE = 500
+
+
+def record_changes(label, keys, deleted=False):
+    """
+    Give each of ``keys`` a new SEQ. Called from the save/delete signals and
+    directly by bulk writes that bypass them.
+    """
+    keys = [str(key) for key in keys]
+    with transaction.atomic():
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), RECORD_BATCH_SIZE):
+            chunk = keys[start:start + RECORD_BATCH_SIZE]
+            ChangeLog.objects.filter(MODEL=label, OBJECT_KEY__in=chunk).delete()
+            ChangeLog.objects.bulk_create([ChangeLog(MODEL=label, OBJECT_KEY=key, DELETED=deleted) for key in chunk])
+
+
+def remember_previous(instance):
+    """
+    pre_save: keep the stored values record_instance() compares against, the
+    client-facing key when it is not the pk and the fields other rows embed.
+    """
+    label = LABELS[type(instance)]
+    model, _, key_field = SYNC_MODELS[label]
+    fields = list(EMBEDDED[label][0]) if label in EMBEDDED else []
+    if key_field != model._meta.pk.attname:
+        fields.append(key_field)
+    instance._sync_previous = None
+    if fields and not instance._state.adding and instance.pk is not None:
+        instance._sync_previous = model.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def record_instance(instance, deleted=False):
+    label = LABELS[type(instance)]
+    key_field = SYNC_MODELS[label][2]
+    key = getattr(instance, key_field)
+    previous = None if deleted else getattr(instance, '_sync_previous', None)
+    with transaction.atomic():
+        if previous and key_field in previous and previous[key_field] != key:
+            # Clients hold the row under its old key; tell them it is gone
+            record_changes(label, [previous[key_field]], deleted=True)
+        record_changes(label, [key], deleted=deleted)
+
+        if previous and label in EMBEDDED:
+            fields, dependent, foreign_key = EMBEDDED[label]
+            if any(previous[field] != getattr(instance, field) for field in fields):
+                dependent_model, _, dependent_key = SYNC_MODELS[dependent]
+                record_changes(
+                    dependent,
+                    dependent_model.objects.filter(**{foreign_key: instance.pk}).values_list(dependent_key, flat=True),
+                )
+
+
+def changes_since(since, limit):
+    """
+    Rows changed after ``since``, at most ``limit`` of them:
+
+        {"SEQ": <pass as since next time>, "HAS_MORE": bool,
+         "CHANGED": {"product": [...], ...}, "DELETED": {"product": [ids], ...}}
+
+    Each model's changed rows are read with one pk__in query.
+    """
+    entries = list(ChangeLog.objects.filter(SEQ__gt=since).order_by('SEQ')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changed = {label: [] for label in SYNC_MODELS}
+    deleted = {label: [] for label in SYNC_MODELS}
+    for entry in entries:
+        (deleted if entry.DELETED else changed)[entry.MODEL].append(entry.OBJECT_KEY)
+
+    from . import serializers
+
+    rows = {}
+    for label, keys in changed.items():
+        model, serializer_name, key_field = SYNC_MODELS[label]
+        serializer_class = getattr(serializers, serializer_name)
+        queryset = model.objects.filter(**{f'{key_field}__in': keys}) if keys else model.objects.none()
+        if model is Stock:
+            queryset = queryset.select_related('PRODUCT')
+        rows[label] = serializer_class(queryset, many=True).data
+
+    # Every synced model is keyed by an integer
+    deleted = {label: [int(key) for key in keys] for label, keys in deleted.items()}
+
+    return {
+        'SEQ': entries[-1].SEQ if entries else since,
+        'HAS_MORE': has_more,
+        'CHANGED': rows,
+        'DELETED': deleted,
+    }
@@ -0,0 +1,48 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from ..admin import CappedCountPaginator
+from ..models import Billing, Customer, Product
+
+
+class CappedCountPaginatorTests(TestCase):
+    def setUp(self):
+        Product.objects.bulk_create(Product(PRODUCT_NAME=f'PRODUCT {i}') for i in range(30))
+
+    def test_exact_below_limit(self):
+        self.assertEqual(CappedCountPaginator(Product.objects.order_by('id'), 10).count, 30)
+
+    def test_exact_after_deletes(self):
+        # MAX(rowid) would still say 30 and show a page that doesn't exist
+        Product.objects.filter(id__in=list(Product.objects.order_by('id').values_list('id', flat=True)[:25])).delete()
+        paginator = CappedCountPaginator(Product.objects.order_by('id'), 10)
+        self.assertEqual((paginator.count, paginator.num_pages), (5, 1))
+
+    def test_capped_at_limit(self):
+        paginator = CappedCountPaginator(Product.objects.order_by('id'), 10)
+        paginator.limit = 20
+        self.assertEqual((paginator.count, paginator.num_pages), (20, 2))
+
+
+class BillingChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        product = Product.objects.create(PRODUCT_NAME='MILK')
+        self.customer = Customer.objects.create(NAME='PRIYA', MOBILE_NO='9000000001')
+        Billing.objects.create(PRODUCT=product, CUSTOMER=self.customer, QUANTITY=1, PRICE=Decimal('10'), BILL_DATE=date(2024, 3, 1))
+        Billing.objects.create(PRODUCT=product, QUANTITY=2, PRICE=Decimal('10'), BILL_DATE=date(2024, 3, 2))
+
+    def test_id_filters_render_as_text_boxes(self):
+        response = self.client.get(reverse('admin:api_billing_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'name="customer_id"')
+        self.assertContains(response, 'name="employee_id"')
+
+    def test_customer_id_filter(self):
+        response = self.client.get(reverse('admin:api_billing_changelist'), {'customer_id': self.customer.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..archive import archive_billing, archive_boundary
+from ..models import ArchivedBilling, Billing, BillingMonthSummary, Customer, CustomerStats, Product
+from ..reports import billing_summary
+
+# (day, category, quantity, price); everything before April is archived
+BILLS = [
+    (date(2024, 1, 10), 'DAIRY', 1, '10.00'),
+    (date(2024, 1, 20), 'DAIRY', 2, '10.00'),
+    (date(2024, 2, 5), 'DAIRY', 1, '12.50'),
+    (date(2024, 2, 14), 'SNACKS', 2, '5.00'),
+    (date(2024, 2, 29), 'DAIRY', 3, '10.00'),
+    (date(2024, 3, 3), 'SNACKS', 1, '5.00'),
+    (date(2024, 3, 31), 'DAIRY', 1, '10.00'),
+    (date(2024, 4, 10), 'DAIRY', 4, '10.00'),
+]
+CUTOFF = date(2024, 4, 1)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(NAME='ASHA', MOBILE_NO='9000000001')
+        products = {
+            category: Product.objects.create(PRODUCT_NAME=category, CATEGORY=category, STOCK=100)
+            for category in ('DAIRY', 'SNACKS')
+        }
+        for day, category, quantity, price in BILLS:
+            Billing.objects.create(
+                PRODUCT=products[category], CATEGORY=category, CUSTOMER=self.customer,
+                QUANTITY=quantity, PRICE=Decimal(price), BILL_DATE=day,
+            )
+
+    def test_moves_closed_months_and_rolls_them_up(self):
+        stats = CustomerStats.objects.get(CUSTOMER=self.customer)
+        progress = []
+        moved = archive_billing(before=CUTOFF, progress=lambda done, total, month: progress.append(month))
+
+        self.assertEqual(moved, [{'MONTH': '2024-01', 'LINES': 2}, {'MONTH': '2024-02', 'LINES': 3}, {'MONTH': '2024-03', 'LINES': 2}])
+        self.assertEqual(progress, ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual(list(Billing.objects.values_list('BILL_DATE', flat=True)), [date(2024, 4, 10)])
+        self.assertEqual(ArchivedBilling.objects.count(), 7)
+        february = BillingMonthSummary.objects.get(MONTH=date(2024, 2, 1), CATEGORY='DAIRY')
+        self.assertEqual((february.LINES, february.QUANTITY, february.TOTAL_SALES), (2, 4, Decimal('42.50')))
+        # Archived bills still count towards the customer's aggregates
+        self.assertEqual(CustomerStats.objects.get(CUSTOMER=self.customer).TOTAL_SPEND, stats.TOTAL_SPEND)
+
+    def test_archiving_again_is_a_no_op(self):
+        archive_billing(before=CUTOFF)
+        self.assertEqual(archive_billing(before=CUTOFF), [])
+        self.assertEqual(ArchivedBilling.objects.count(), 7)
+
+    def test_boundary_is_cached_until_the_archive_changes(self):
+        self.assertIsNone(archive_boundary())
+        with self.assertNumQueries(1):
+            self.assertIsNone(archive_boundary())
+        archive_billing(before=date(2024, 2, 1))
+        self.assertEqual(archive_boundary(), date(2024, 2, 1))
+        archive_billing(before=CUTOFF)
+        self.assertEqual(archive_boundary(), CUTOFF)
+        with self.assertNumQueries(1):
+            self.assertEqual(archive_boundary(), CUTOFF)
+
+    def test_summary_is_unchanged_by_archiving(self):
+        ranges = [
+            (None, None),
+            (date(2024, 1, 1), date(2024, 3, 31)),  # whole months only
+            (date(2024, 1, 15), date(2024, 3, 10)),  # partial first and last month
+            (date(2024, 2, 1), date(2024, 2, 29)),  # one whole leap month
+            (date(2024, 2, 10), date(2024, 2, 20)),  # inside one month
+            (date(2024, 1, 20), date(2024, 1, 20)),  # a single day
+            (None, date(2024, 2, 14)),
+            (date(2024, 2, 14), None),
+            (date(2024, 3, 31), date(2024, 4, 10)),  # across the boundary
+            (date(2024, 4, 1), date(2024, 4, 30)),  # hot months only
+            (date(2023, 6, 1), date(2023, 12, 31)),  # before any bill
+        ]
+        expected = {bounds: billing_summary(*bounds) for bounds in ranges}
+        archive_billing(before=CUTOFF)
+        for bounds in ranges:
+            with self.subTest(date_from=bounds[0], date_to=bounds[1]):
+                self.assertEqual(billing_summary(*bounds), expected[bounds])
+
+    def test_whole_months_are_read_from_their_rollups(self):
+        archive_billing(before=CUTOFF)
+        BillingMonthSummary.objects.filter(MONTH=date(2024, 2, 1), CATEGORY='DAIRY').update(LINES=100)
+        # February is whole: its rollup is used
+        self.assertEqual(billing_summary(date(2024, 1, 15), date(2024, 3, 10))['LINES'], 1 + 100 + 1 + 1)
+        # February is partial: its bills are summed instead
+        self.assertEqual(billing_summary(date(2024, 2, 2), date(2024, 2, 29))['LINES'], 3)
+
+
+class ArchivedBillApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        product = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY', STOCK=100)
+        self.old = Billing.objects.create(PRODUCT=product, QUANTITY=1, PRICE=Decimal('10.00'), BILL_DATE=date(2024, 1, 10))
+        self.new = Billing.objects.create(PRODUCT=product, QUANTITY=2, PRICE=Decimal('10.00'), BILL_DATE=date(2024, 4, 10))
+        self.product = product
+        archive_billing(before=CUTOFF)
+
+    def test_retrieve_falls_back_to_the_archive(self):
+        for bill in (self.old, self.new):
+            response = self.client.get(reverse('billing-detail', args=[bill.BILL_NO]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['BILL_DATE'], str(bill.BILL_DATE))
+
+    def test_retrieve_unknown_or_malformed_id_is_404(self):
+        for pk in (999, 'abc'):
+            self.assertEqual(self.client.get(f'/api/billing/{pk}/').status_code, 404)
+
+    def test_list_merges_both_tables(self):
+        response = self.client.get(reverse('billing-list'))
+        self.assertEqual([bill['BILL_NO'] for bill in response.json()], [self.old.BILL_NO, self.new.BILL_NO])
+
+    def test_archived_months_are_closed(self):
+        # Only January had bills to archive, so the boundary is 1 February
+        body = {'PRODUCT': self.product.pk, 'QUANTITY': 1, 'PRICE': '10.00', 'BILL_DATE': '2024-01-31'}
+        response = self.client.post(reverse('billing-list'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('BILL_DATE', response.json())
+        body['BILL_DATE'] = '2024-02-01'
+        self.assertEqual(self.client.post(reverse('billing-list'), body, content_type='application/json').status_code, 201)
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import idempotency
+from ..batch import ingest_bills
+from ..models import ArchivedBilling, Billing, Product, Stock
+
+
+def bill(client_id, quantity=1, minutes=0, **extra):
+    stamp = timezone.now().replace(microsecond=0) + timedelta(minutes=minutes)
+    return {
+        'CLIENT_ID': client_id, 'CLIENT_TIMESTAMP': stamp.isoformat(), 'PRODUCT': extra.pop('product'),
+        'QUANTITY': quantity, 'PRICE': '25.00', **extra,
+    }
+
+
+class IngestBillsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY', STOCK=5)
+        Stock.objects.create(PRODUCT=self.product, STOCK=5)
+
+    def bill(self, client_id, **extra):
+        return bill(client_id, product=self.product.pk, **extra)
+
+    def test_created_bills_remember_terminal_and_client_id(self):
+        [result] = ingest_bills('till-1', [self.bill('a')])
+        self.assertEqual(result['STATUS'], 'created')
+        stored = Billing.objects.get(BILL_NO=result['BILL_NO'])
+        self.assertEqual((stored.TERMINAL, stored.CLIENT_ID, stored.CATEGORY), ('till-1', 'a', 'DAIRY'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.STOCK, 4)
+
+    def test_duplicates_within_and_across_batches(self):
+        first, repeat = ingest_bills('till-1', [self.bill('a'), self.bill('a')])
+        self.assertEqual(repeat, {'CLIENT_ID': 'a', 'STATUS': 'duplicate', 'BILL_NO': first['BILL_NO']})
+        [resent] = ingest_bills('till-1', [self.bill('a')])
+        self.assertEqual((resent['STATUS'], resent['BILL_NO']), ('duplicate', first['BILL_NO']))
+        self.assertEqual(Billing.objects.count(), 1)
+
+    def test_client_ids_are_scoped_per_terminal(self):
+        ingest_bills('till-1', [self.bill('a')])
+        [other] = ingest_bills('till-2', [self.bill('a')])
+        self.assertEqual(other['STATUS'], 'created')
+        self.assertEqual(Billing.objects.count(), 2)
+
+    def test_duplicate_found_after_idempotency_keys_expire(self):
+        [first] = ingest_bills('till-1', [self.bill('a')])
+        with self.settings(IDEMPOTENCY_KEY_TTL_HOURS=0):
+            idempotency.purge_expired_keys()
+        [resent] = ingest_bills('till-1', [self.bill('a')])
+        self.assertEqual((resent['STATUS'], resent['BILL_NO']), ('duplicate', first['BILL_NO']))
+
+    def test_duplicate_of_an_archived_bill(self):
+        ArchivedBilling.objects.create(
+            BILL_NO=900, PRODUCT=self.product, QUANTITY=1, PRICE=1, BILL_DATE=date(2020, 1, 1),
+            TERMINAL='till-1', CLIENT_ID='old',
+        )
+        [resent] = ingest_bills('till-1', [self.bill('old')])
+        self.assertEqual((resent['STATUS'], resent['BILL_NO']), ('duplicate', 900))
+
+    def test_missing_or_negative_price_is_invalid(self):
+        missing = self.bill('a')
+        del missing['PRICE']
+        results = ingest_bills('till-1', [missing, self.bill('b', PRICE='-1')])
+        self.assertEqual([r['STATUS'] for r in results], ['invalid', 'invalid'])
+        self.assertIn('PRICE', results[0]['ERRORS'])
+        self.assertFalse(Billing.objects.exists())
+
+    def test_earliest_sale_wins_when_stock_runs_out(self):
+        late, early = ingest_bills('till-1', [self.bill('late', quantity=3, minutes=5), self.bill('early', quantity=3)])
+        self.assertEqual((early['STATUS'], late['STATUS']), ('created', 'insufficient_stock'))
+        self.assertEqual(Stock.objects.get().STOCK, 2)
+
+
+class BatchEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('billing-batch')
+        self.product = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY', STOCK=5)
+
+    def test_terminal_is_required(self):
+        for body in ({'BILLS': []}, {'TERMINAL': ' ', 'BILLS': []}, [bill('a', product=self.product.pk)]):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_summary(self):
+        body = {'TERMINAL': 'till-1', 'BILLS': [bill('a', product=self.product.pk), bill('a', product=self.product.pk)]}
+        response = self.client.post(self.url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['SUMMARY'], {'created': 1, 'duplicate': 1})
@@ -0,0 +1,122 @@
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Billing, Customer, Product, normalize_mobile
+from ..serializers import CustomerSerializer
+
+migration_0006 = importlib.import_module('api.migrations.0006_customer_mobile_key')
+
+
+class NormalizeMobileTests(SimpleTestCase):
+    def test_formats_share_a_key(self):
+        for value in ['+91 96542-84717', '096542 84717', '9654284717']:
+            self.assertEqual(normalize_mobile(value), '9654284717')
+            self.assertEqual(migration_0006.normalize_mobile(value), '9654284717')
+
+    def test_blanks_and_placeholder(self):
+        for value in [None, '', '0000000000', 'n/a']:
+            self.assertIsNone(normalize_mobile(value))
+            self.assertIsNone(migration_0006.normalize_mobile(value))
+
+
+class MobileKeyBackfillTests(TestCase):
+    def test_oldest_customer_keeps_a_shared_key(self):
+        # bulk_create skips Customer.save(), as rows predating the migration did
+        first, second = Customer.objects.bulk_create([
+            Customer(NAME='PRIYA', MOBILE_NO='+91 96542 84717'),
+            Customer(NAME='PRIYA K', MOBILE_NO='9654284717'),
+        ])
+        migration_0006.backfill_mobile_key(apps, None)
+        self.assertEqual(
+            list(Customer.objects.order_by('CUSTOMER_ID').values_list('MOBILE_KEY', flat=True)),
+            ['9654284717', None],
+        )
+
+
+class BackfilledDuplicateEditTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first, self.second = Customer.objects.bulk_create([
+            Customer(NAME='PRIYA', MOBILE_NO='+91 96542 84717'),
+            Customer(NAME='PRIYA K', MOBILE_NO='9654284717'),
+        ])
+        migration_0006.backfill_mobile_key(apps, None)
+        self.url = reverse('customer-detail', args=[self.second.pk])
+
+    def patch(self, data):
+        return self.client.patch(self.url, data, content_type='application/json')
+
+    def test_editing_other_fields_keeps_the_cleared_key(self):
+        self.assertEqual(self.patch({'NAME': 'B2'}).status_code, 200)
+        customer = Customer.objects.get(pk=self.second.pk)
+        self.assertEqual((customer.NAME, customer.MOBILE_KEY), ('B2', None))
+
+    def test_full_update_with_the_same_number(self):
+        data = {'NAME': 'B2', 'MOBILE_NO': '9654284717', 'ADDRESS': 'N/A', 'CITY': 'N/A', 'TOWN': 'N/A', 'PINCODE': 0}
+        self.assertEqual(self.client.put(self.url, data, content_type='application/json').status_code, 200)
+        self.assertIsNone(Customer.objects.get(pk=self.second.pk).MOBILE_KEY)
+
+    def test_changing_to_a_taken_number_is_a_400(self):
+        Customer.objects.create(NAME='RAVI', MOBILE_NO='9000000002')
+        response = self.patch({'MOBILE_NO': '+91 90000 00002'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('MOBILE_NO', response.json())
+
+    def test_changing_to_a_new_number_sets_the_key(self):
+        self.assertEqual(self.patch({'MOBILE_NO': '9000000001'}).status_code, 200)
+        self.assertEqual(Customer.objects.get(pk=self.second.pk).MOBILE_KEY, '9000000001')
+
+
+class CustomerLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('customer-lookup')
+
+    def test_invalid_mobile(self):
+        self.assertEqual(self.client.get(self.url, {'mobile': '000'}).status_code, 400)
+
+    def test_unknown_mobile(self):
+        self.assertEqual(self.client.get(self.url, {'mobile': '9654284717'}).status_code, 404)
+
+    def test_recent_summary(self):
+        customer = Customer.objects.create(NAME='PRIYA', MOBILE_NO='9654284717')
+        product = Product.objects.create(PRODUCT_NAME='MILK')
+        today = timezone.localdate()
+        Billing.objects.create(PRODUCT=product, CUSTOMER=customer, QUANTITY=2, PRICE=Decimal('25.00'), BILL_DATE=today)
+        Billing.objects.create(
+            PRODUCT=product, CUSTOMER=customer, QUANTITY=1, PRICE=Decimal('25.00'), BILL_DATE=today - timedelta(days=200)
+        )
+        data = self.client.get(self.url, {'mobile': '+91 96542 84717'}).json()
+        self.assertEqual((data['CUSTOMER_ID'], data['RECENT_LINES']), (customer.pk, 1))
+        self.assertEqual(Decimal(str(data['RECENT_SPEND'])), Decimal('50.00'))
+
+    def test_post_creates_then_updates(self):
+        response = self.client.post(self.url, {'MOBILE_NO': '9654284717', 'NAME': 'PRIYA'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(self.url, {'MOBILE_NO': '096542 84717', 'CITY': 'CHENNAI'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        customer = Customer.objects.get()
+        self.assertEqual((customer.NAME, customer.CITY), ('PRIYA', 'CHENNAI'))
+
+    def test_post_racing_another_till_updates_their_customer(self):
+        is_valid = CustomerSerializer.is_valid
+
+        def racing_is_valid(serializer, **kwargs):
+            valid = is_valid(serializer, **kwargs)
+            if serializer.instance is None:
+                # The other till's insert lands between our read and our write
+                Customer.objects.create(NAME='FROM OTHER TILL', MOBILE_NO='9654284717')
+            return valid
+
+        with mock.patch.object(CustomerSerializer, 'is_valid', racing_is_valid):
+            response = self.client.post(self.url, {'MOBILE_NO': '9654284717', 'NAME': 'PRIYA'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(list(Customer.objects.values_list('NAME', flat=True)), ['PRIYA'])
@@ -0,0 +1,58 @@
+import importlib
+from datetime import date, datetime, time
+
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from ..dates import parse_date, parse_datetime, parse_time
+from ..models import PurchaseOrder, Supplier
+
+migration_0004 = importlib.import_module('api.migrations.0004_purchaseorder_order_datetime')
+
+
+class ParseTests(SimpleTestCase):
+    def test_date_formats(self):
+        self.assertEqual(parse_date('05-03-2024'), date(2024, 3, 5))
+        self.assertEqual(parse_date('2024-03-05'), date(2024, 3, 5))
+        self.assertEqual(parse_date('05-03-2024 10:30:00'), date(2024, 3, 5))
+        self.assertIsNone(parse_date('next tuesday'))
+        self.assertIsNone(parse_date(''))
+
+    def test_time_from_spreadsheet_datetime(self):
+        self.assertEqual(parse_time('30-12-1899 14:05:00'), time(14, 5))
+        self.assertEqual(parse_time('14:05'), time(14, 5))
+        self.assertIsNone(parse_time('2pm'))
+
+    def test_datetime_defaults_to_midnight(self):
+        self.assertEqual(
+            parse_datetime('05-03-2024', 'garbage'), timezone.make_aware(datetime(2024, 3, 5))
+        )
+        self.assertIsNone(parse_datetime('garbage', '14:05'))
+
+    def test_migration_parser_matches(self):
+        for date_str, time_str in [('05-03-2024', '14:05'), ('2024-03-05', None), ('bad', '14:05'), ('', '')]:
+            self.assertEqual(migration_0004.parse_datetime(date_str, time_str), parse_datetime(date_str, time_str))
+
+
+class OrderDatetimeTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(NAME='FRESH FARMS')
+
+    def test_save_fills_order_datetime(self):
+        order = PurchaseOrder.objects.create(SUPPLIER=self.supplier, DATE='05-03-2024', TIME='14:05:00')
+        self.assertEqual(order.ORDER_DATETIME, timezone.make_aware(datetime(2024, 3, 5, 14, 5)))
+
+    def test_unparseable_date_clears_order_datetime(self):
+        order = PurchaseOrder.objects.create(SUPPLIER=self.supplier, DATE='05-03-2024')
+        order.DATE = 'unknown'
+        order.save()
+        order.refresh_from_db()
+        self.assertIsNone(order.ORDER_DATETIME)
+
+    def test_migration_backfill(self):
+        order = PurchaseOrder.objects.create(SUPPLIER=self.supplier, DATE='05-03-2024', TIME='09:00')
+        PurchaseOrder.objects.filter(pk=order.pk).update(ORDER_DATETIME=None)
+        migration_0004.backfill_order_datetime(apps, None)
+        order.refresh_from_db()
+        self.assertEqual(order.ORDER_DATETIME, timezone.make_aware(datetime(2024, 3, 5, 9, 0)))
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Product, Stock
+
+
+class ListETagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.milk = Product.objects.create(PRODUCT_NAME='MILK', STOCK=5)
+        Stock.objects.create(PRODUCT=self.milk, STOCK=5)
+
+    def etag(self, name):
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        return response['ETag']
+
+    def get(self, name, etag):
+        return self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+
+    def raw_update(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"UPDATE {Product._meta.db_table} SET MRP = 1")
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.etag('product-list')
+        response = self.get('product-list', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_bulk_writes_change_the_etag(self):
+        writes = {
+            'queryset update': lambda: Product.objects.update(STOCK=0),
+            'bulk_create': lambda: Product.objects.bulk_create([Product(PRODUCT_NAME='RICE'), Product(PRODUCT_NAME='DAL')]),
+            'bulk_update': lambda: Product.objects.bulk_update([Product(id=self.milk.id, PRODUCT_NAME='TONED MILK')], ['PRODUCT_NAME']),
+            'queryset delete': lambda: Product.objects.filter(PRODUCT_NAME='DAL').delete(),
+            'raw SQL': self.raw_update,
+        }
+        for label, write in writes.items():
+            with self.subTest(write=label):
+                etag = self.etag('product-list')
+                write()
+                response = self.get('product-list', etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertEqual(self.get('product-list', response['ETag']).status_code, 304)
+
+    def test_bulk_write_to_a_related_table_changes_the_etag(self):
+        # The stock list renders product names, so a product write invalidates it
+        etag = self.etag('stock-list')
+        Product.objects.filter(pk=self.milk.pk).update(PRODUCT_NAME='TONED MILK')
+        response = self.get('stock-list', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['PRODUCTNAME'], 'TONED MILK')
+
+    def test_write_to_an_unrelated_table_keeps_the_etag(self):
+        etag = self.etag('product-list')
+        Stock.objects.update(STOCK=1)
+        self.assertEqual(self.get('product-list', etag).status_code, 304)
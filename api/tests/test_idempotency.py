@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import idempotency
+from ..models import Billing, IdempotencyKey, Product
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('billing-list')
+        self.product = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY', STOCK=10)
+
+    def post(self, key, quantity=2):
+        body = {'PRODUCT': self.product.pk, 'QUANTITY': quantity, 'PRICE': '25.00', 'BILL_DATE': str(date.today())}
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.STOCK
+
+    def test_retry_replays_without_writing_again(self):
+        first = self.post('till-1-0001')
+        retry = self.post('till-1-0001')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Billing.objects.count(), 1)
+        self.assertEqual(self.stock(), 8)
+
+    def test_key_reused_for_a_different_body(self):
+        self.post('till-1-0001')
+        response = self.post('till-1-0001', quantity=3)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Billing.objects.count(), 1)
+
+    def test_without_key_every_post_writes(self):
+        self.post(None)
+        self.post(None)
+        self.assertEqual(Billing.objects.count(), 2)
+        self.assertEqual(self.stock(), 6)
+
+    def test_errors_are_not_stored(self):
+        self.assertEqual(self.post('till-1-0002', quantity=50).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.product.STOCK = 100
+        self.product.save()
+        self.assertEqual(self.post('till-1-0002', quantity=50).status_code, 201)
+
+    def test_expired_key_runs_again(self):
+        self.post('till-1-0003')
+        IdempotencyKey.objects.update(CREATED_AT=timezone.now() - idempotency.key_ttl() - timedelta(minutes=1))
+        response = self.post('till-1-0003')
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(Billing.objects.count(), 2)
+
+    def test_concurrent_retry_replays_the_winner(self):
+        self.post('till-1-0004')
+        # The retry's lookup ran before the first request committed its key
+        with mock.patch.object(idempotency, '_find', side_effect=[None, IdempotencyKey.objects.get()]):
+            response = self.post('till-1-0004')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Billing.objects.count(), 1)
+        self.assertEqual(self.stock(), 8)
+
+    def test_purge_command(self):
+        self.post('old')
+        IdempotencyKey.objects.update(CREATED_AT=timezone.now() - idempotency.key_ttl() - timedelta(minutes=1))
+        self.post('new')
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1 expired', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('KEY', flat=True)), ['new'])
@@ -0,0 +1,183 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job, Product
+
+
+class EnqueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('job-list')
+
+    def post(self, task, params=None):
+        return self.client.post(self.url, {'TASK': task, 'PARAMS': params or {}}, content_type='application/json')
+
+    @override_settings(JOBS_RUN_IN_PROCESS=True)
+    def test_queued_job_is_submitted_after_commit(self):
+        with mock.patch.object(jobs, 'executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            response = self.post('billing_summary')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['STATUS'], Job.QUEUED)
+        executor.return_value.submit.assert_called_once_with(jobs.run_job, response.json()['JOB_ID'])
+
+    @override_settings(JOBS_RUN_IN_PROCESS=False)
+    def test_left_for_run_jobs(self):
+        with mock.patch.object(jobs, 'executor') as executor, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.post('billing_summary').status_code, 202)
+        executor.assert_not_called()
+
+    def test_bad_task_or_params(self):
+        self.assertEqual(self.post('nope').status_code, 400)
+        self.assertEqual(self.post('export', {'model': 'user'}).status_code, 400)
+        self.assertEqual(self.post('billing_summary', {'unknown': 1}).status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_RUN_IN_PROCESS=False)
+    def test_destructive_tasks_are_staff_only(self):
+        for task in ('import_data', 'payroll', 'archive_billing'):
+            with self.subTest(task=task):
+                self.assertEqual(self.post(task, {'month': '2024-03'} if task == 'payroll' else {}).status_code, 403)
+        self.assertFalse(Job.objects.exists())
+
+        user = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(user)
+        self.assertEqual(self.post('import_data').status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.post('import_data').status_code, 202)
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=False)
+class RunJobTests(TestCase):
+    def test_success_records_result(self):
+        Product.objects.create(PRODUCT_NAME='MILK')
+        job = jobs.enqueue('billing_summary')
+        jobs.run_job(job.JOB_ID)
+        job.refresh_from_db()
+        self.assertEqual((job.STATUS, job.PROGRESS), (Job.SUCCEEDED, 100))
+        self.assertEqual(job.RESULT['LINES'], 0)
+        self.assertIsNotNone(job.FINISHED_AT)
+
+    def test_failure_records_traceback(self):
+        job = jobs.enqueue('export', {'model': 'product'})
+        with mock.patch.object(jobs, '_export', side_effect=RuntimeError('disk full')), self.assertLogs('api.jobs', 'ERROR'):
+            jobs.run_job(job.JOB_ID)
+        job.refresh_from_db()
+        self.assertEqual(job.STATUS, Job.FAILED)
+        self.assertIn('disk full', job.ERROR)
+
+    def test_claimed_job_is_not_run_twice(self):
+        job = jobs.enqueue('billing_summary')
+        self.assertEqual(jobs.claim_next(), job.JOB_ID)
+        self.assertIsNone(jobs.claim_next())
+        with mock.patch.dict(jobs.TASKS, {'billing_summary': mock.Mock()}) as tasks:
+            jobs.run_job(job.JOB_ID)
+            tasks['billing_summary'].assert_not_called()
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = jobs.enqueue('billing_summary')
+        fresh = jobs.enqueue('billing_summary')
+        Job.objects.filter(pk=stale.pk).update(STATUS=Job.RUNNING, STARTED_AT=timezone.now() - timedelta(hours=2))
+        Job.objects.filter(pk=fresh.pk).update(STATUS=Job.RUNNING, STARTED_AT=timezone.now())
+        self.assertEqual(jobs.requeue_stale(timedelta(hours=1)), 1)
+        self.assertEqual(jobs.claim_next(), stale.JOB_ID)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.STATUS, Job.RUNNING)
+
+    def test_import_data_output_stays_with_the_job(self):
+        import import_data
+
+        with tempfile.TemporaryDirectory() as data_dir, \
+                mock.patch.object(import_data, 'DATA_DIR', data_dir), \
+                mock.patch.object(import_data, 'REJECTIONS_FILE', os.path.join(data_dir, 'REJECTED.csv')):
+            job = jobs.enqueue('import_data')
+            stdout = StringIO()
+            with redirect_stdout(stdout):
+                jobs.run_job(job.JOB_ID)
+        job.refresh_from_db()
+        self.assertEqual(job.STATUS, Job.SUCCEEDED, job.ERROR)
+        self.assertIn('File not found: SUPPLIER.json', job.RESULT['log_tail'])
+        self.assertEqual(stdout.getvalue(), '')
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=True, JOB_STALE_MINUTES=60)
+class RecoveryTests(TestCase):
+    """In-process jobs a dead worker left behind have no run_jobs to requeue them."""
+
+    def setUp(self):
+        cache.clear()
+        with override_settings(JOBS_RUN_IN_PROCESS=False):
+            self.job = jobs.enqueue('billing_summary')
+
+    def abandon(self, hours=2):
+        Job.objects.filter(pk=self.job.pk).update(STATUS=Job.RUNNING, STARTED_AT=timezone.now() - timedelta(hours=hours))
+
+    def test_starting_the_pool_recovers_once(self):
+        self.abandon()
+        with mock.patch.object(jobs, '_executor', None), mock.patch.object(jobs, 'ThreadPoolExecutor') as pool, \
+                self.assertLogs('api.jobs', 'WARNING'):
+            jobs.executor()
+            jobs.executor()
+        pool.return_value.submit.assert_called_once_with(jobs.run_job, self.job.JOB_ID)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.STATUS, Job.QUEUED)
+
+    def test_polling_resumes_an_abandoned_job(self):
+        with mock.patch.object(jobs, 'executor') as executor:
+            self.abandon(hours=0)
+            self.assertEqual(self.client.get(reverse('job-detail', args=[self.job.JOB_ID])).json()['STATUS'], Job.RUNNING)
+            executor.assert_not_called()
+
+            self.abandon()
+            self.assertEqual(self.client.get(reverse('job-detail', args=[self.job.JOB_ID])).json()['STATUS'], Job.QUEUED)
+        executor.return_value.submit.assert_called_once_with(jobs.run_job, self.job.JOB_ID)
+
+    def test_queued_job_lost_before_submit_is_resumed(self):
+        Job.objects.filter(pk=self.job.pk).update(CREATED_AT=timezone.now() - timedelta(hours=2))
+        self.job.refresh_from_db()
+        with mock.patch.object(jobs, 'executor') as executor:
+            self.assertTrue(jobs.resume_stale(self.job))
+        executor.return_value.submit.assert_called_once_with(jobs.run_job, self.job.JOB_ID)
+
+
+@override_settings(JOBS_RUN_IN_PROCESS=False)
+class ExportDownloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        override = override_settings(EXPORT_DIR=export_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        Product.objects.create(PRODUCT_NAME='MILK')
+        Product.objects.create(PRODUCT_NAME='RICE')
+
+    def download(self, job):
+        return self.client.get(reverse('job-download', args=[job.JOB_ID]))
+
+    def test_download_finished_export(self):
+        job = jobs.enqueue('export', {'model': 'product'})
+        self.assertEqual(self.download(job).status_code, 404)
+        jobs.run_job(job.JOB_ID)
+        response = self.download(job)
+        self.assertEqual(response.status_code, 200)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['PRODUCTNAME'] for row in rows], ['MILK', 'RICE'])
+
+    def test_removed_file_is_gone(self):
+        job = jobs.enqueue('export', {'model': 'product'})
+        jobs.run_job(job.JOB_ID)
+        os.remove(jobs.export_path(job.JOB_ID))
+        self.assertEqual(self.download(job).status_code, 410)
@@ -0,0 +1,107 @@
+import importlib
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..loyalty import rebuild_customer_stats
+from ..models import Billing, ChangeLog, Customer, CustomerCategoryStats, CustomerStats, Product, Stock
+
+migration_0007 = importlib.import_module('api.migrations.0007_customer_stats')
+migration_0013 = importlib.import_module('api.migrations.0013_top_categories_decimal_spend')
+
+
+class LoyaltyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = Customer.objects.create(NAME='PRIYA', MOBILE_NO='9654284717')
+        self.milk = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY', STOCK=100)
+        self.chips = Product.objects.create(PRODUCT_NAME='CHIPS', CATEGORY='SNACKS', STOCK=100)
+
+    def bill(self, product, quantity, price, day):
+        return Billing.objects.create(
+            PRODUCT=product, CUSTOMER=self.customer, CATEGORY=product.CATEGORY,
+            QUANTITY=quantity, PRICE=Decimal(price), BILL_DATE=day,
+        )
+
+    def stats(self):
+        return CustomerStats.objects.get(CUSTOMER=self.customer)
+
+    def snapshot(self):
+        stats = self.stats()
+        return (stats.TOTAL_SPEND, stats.LINES, stats.VISITS, stats.LAST_VISIT, stats.TOP_CATEGORIES)
+
+    def test_add_bill(self):
+        self.bill(self.milk, 3, '0.10', date(2024, 3, 1))
+        self.bill(self.chips, 1, '20.00', date(2024, 3, 1))
+        self.bill(self.milk, 1, '0.20', date(2024, 3, 5))
+        self.assertEqual(self.snapshot(), (
+            Decimal('20.50'), 3, 2, date(2024, 3, 5),
+            [
+                {'CATEGORY': 'SNACKS', 'SPEND': '20.00', 'QUANTITY': 1},
+                # 0.1 * 3 + 0.2 would be 0.5000000000000001 as floats
+                {'CATEGORY': 'DAIRY', 'SPEND': '0.50', 'QUANTITY': 4},
+            ],
+        ))
+
+    def test_remove_bill(self):
+        self.bill(self.milk, 1, '10.00', date(2024, 3, 1))
+        last = self.bill(self.chips, 2, '5.00', date(2024, 3, 9))
+        last.delete()
+        self.assertEqual(self.snapshot(), (
+            Decimal('10.00'), 1, 1, date(2024, 3, 1), [{'CATEGORY': 'DAIRY', 'SPEND': '10.00', 'QUANTITY': 1}],
+        ))
+        self.assertFalse(CustomerCategoryStats.objects.filter(CATEGORY='SNACKS').exists())
+
+    def test_update_bill(self):
+        bill = self.bill(self.milk, 1, '10.00', date(2024, 3, 1))
+        bill.QUANTITY = 4
+        bill.BILL_DATE = date(2024, 3, 2)
+        bill.save()
+        self.assertEqual(self.snapshot(), (
+            Decimal('40.00'), 1, 1, date(2024, 3, 2), [{'CATEGORY': 'DAIRY', 'SPEND': '40.00', 'QUANTITY': 4}],
+        ))
+
+    def test_rebuild_matches_incremental(self):
+        self.bill(self.milk, 3, '0.10', date(2024, 3, 1))
+        self.bill(self.chips, 1, '20.00', date(2024, 3, 4))
+        incremental = self.snapshot()
+        rebuild_customer_stats()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_migration_backfill_matches(self):
+        self.bill(self.milk, 3, '0.10', date(2024, 3, 1))
+        self.bill(self.chips, 1, '20.00', date(2024, 3, 4))
+        incremental = self.snapshot()
+        CustomerStats.objects.all().delete()
+        CustomerCategoryStats.objects.all().delete()
+        migration_0007.backfill_customer_stats(apps, None)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_float_spend_converted(self):
+        self.bill(self.milk, 1, '10.00', date(2024, 3, 1))
+        CustomerStats.objects.update(TOP_CATEGORIES=[{'CATEGORY': 'DAIRY', 'SPEND': 0.5, 'QUANTITY': 4}])
+        migration_0013.spend_to_decimal_strings(apps, None)
+        self.assertEqual(self.stats().TOP_CATEGORIES, [{'CATEGORY': 'DAIRY', 'SPEND': '0.50', 'QUANTITY': 4}])
+
+    def test_failed_bill_post_leaves_no_trace(self):
+        Stock.objects.create(PRODUCT=self.milk, STOCK=100)
+        changes = ChangeLog.objects.count()
+        body = {'PRODUCT': self.milk.pk, 'QUANTITY': 2, 'PRICE': '10.00', 'BILL_DATE': date.today().isoformat(), 'CUSTOMER': self.customer.pk}
+        # The bill and its loyalty rows are written before the stock rows
+        with mock.patch.object(Stock, 'save', side_effect=RuntimeError('disk full')), self.assertRaises(RuntimeError):
+            self.client.post(reverse('billing-list'), body, content_type='application/json')
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.STOCK, 100)
+        self.assertFalse(Billing.objects.exists())
+        self.assertFalse(CustomerStats.objects.filter(CUSTOMER=self.customer, LINES__gt=0).exists())
+        self.assertEqual(ChangeLog.objects.count(), changes)
+
+    def test_endpoint_renders_spend_as_number(self):
+        self.bill(self.milk, 3, '0.10', date(2024, 3, 1))
+        data = self.client.get(reverse('customer-loyalty', args=[self.customer.pk])).json()
+        self.assertEqual(data['TOP_CATEGORIES'], [{'CATEGORY': 'DAIRY', 'SPEND': 0.3, 'QUANTITY': 3}])
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsAccessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('metrics')
+
+    def test_anonymous_is_forbidden(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_wrong_token_is_forbidden(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer nope')
+        self.assertEqual(response.status_code, 403)
+
+    def test_token(self):
+        self.client.get(reverse('product-list'))
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'product-list', response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_empty_token_setting_accepts_no_token(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_and_non_staff(self):
+        user = User.objects.create_user('clerk', password='pw')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,86 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..jobs import validate_params
+from ..models import Billing, Employee, Product
+
+
+@override_settings(PAYROLL_INCENTIVE_RATE='0.01')
+class PayrollTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('manager', password='pw', is_staff=True))
+        self.url = reverse('employee-payroll')
+        self.employee = Employee.objects.create(NAME='RAVI', BASIC_PAY=Decimal('10000.00'))
+        product = Product.objects.create(PRODUCT_NAME='RICE', STOCK=100)
+        Billing.objects.create(PRODUCT=product, EMPLOYEE=self.employee, QUANTITY=10, PRICE=Decimal('100.00'), BILL_DATE=date(2024, 3, 5))
+        Billing.objects.create(PRODUCT=product, EMPLOYEE=self.employee, QUANTITY=10, PRICE=Decimal('100.00'), BILL_DATE=date(2024, 4, 5))
+
+    def post(self, data, **kwargs):
+        return self.client.post(self.url, data, content_type=kwargs.pop('content_type', 'application/json'), **kwargs)
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.post({'month': '2024-03'}).status_code, 403)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.INCENTIVE, 0)
+
+    def test_month(self):
+        response = self.post({'month': '2024-03', 'rate': '0.05'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.employee.refresh_from_db()
+        self.assertEqual((self.employee.INCENTIVE, self.employee.NET_PAY), (Decimal('50.00'), Decimal('10050.00')))
+
+    def test_date_range_and_default_rate(self):
+        response = self.post({'date_from': '2024-03-01', 'date_to': '2024-04-30'})
+        self.assertEqual(response.status_code, 200)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.INCENTIVE, Decimal('20.00'))
+
+    def test_invalid_rates(self):
+        for rate in ['Infinity', '-Infinity', 'NaN', '-0.01', '1.5', 'abc']:
+            with self.subTest(rate=rate):
+                response = self.post({'month': '2024-03', 'rate': rate})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('rate', response.json())
+
+    def test_invalid_periods(self):
+        for data in [{}, {'month': '2024-13'}, {'date_from': '2024-03-01'}, {'date_from': '2024-04-01', 'date_to': '2024-03-01'}]:
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+
+    def test_form_encoded_dry_run_false_commits(self):
+        response = self.client.post(self.url, {'month': '2024-03', 'dry_run': 'false'})
+        self.assertEqual(response.status_code, 200)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.INCENTIVE, Decimal('10.00'))
+
+    def test_dry_run_does_not_save(self):
+        response = self.post({'month': '2024-03', 'dry_run': True})
+        self.assertEqual(response.json()['EMPLOYEES'][0]['INCENTIVE'], 10.0)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.INCENTIVE, Decimal('0.00'))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('run_payroll', '--month', '2024-04', '--rate', '0.02', stdout=out)
+        self.assertIn('Updated payroll for 1 employees', out.getvalue())
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.INCENTIVE, Decimal('20.00'))
+
+    def test_command_rejects_bad_rate(self):
+        for rate in ['Infinity', 'NaN', '-1']:
+            with self.subTest(rate=rate), self.assertRaisesMessage(CommandError, 'rate:'):
+                call_command('run_payroll', '--month', '2024-04', '--rate', rate, stdout=StringIO())
+
+    def test_job_params(self):
+        self.assertIsNone(validate_params('payroll', {'month': '2024-03', 'rate': '0.02'}))
+        self.assertIn('rate:', validate_params('payroll', {'month': '2024-03', 'rate': 'NaN'}))
+        self.assertIn('month:', validate_params('payroll', {'month': '2024-3x'}))
@@ -0,0 +1,213 @@
+"""
+Query-plan regression tests for the API's read paths.
+
+Every GET route of the router in api/urls.py has a case below. Each case is
+requested against seeded data, and every SELECT it runs goes through
+SQLite's EXPLAIN QUERY PLAN. A case fails when:
+
+- a query scans a table the case does not list in its allowed scans (a
+  missing index), or
+- the number of queries grows once the tables hold twice as many rows (an
+  N+1 in a serializer or view).
+
+A new GET route without a case fails test_every_get_route_is_covered.
+"""
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..loyalty import rebuild_customer_stats
+from ..models import (
+    ArchivedBilling, Billing, BillingMonthSummary, Customer, Employee, ItemEntry, Job, Pincode, Product, PurchaseOrder,
+    Stock, Supplier,
+)
+from ..sync import record_changes
+from ..urls import router
+
+ROWS = 20
+CATEGORIES = ['GROCERIES', 'DAIRY', 'SNACKS']
+HOT_START = date(2023, 1, 1)
+ARCHIVED_START = date(2019, 1, 1)
+
+# SQLite before 3.36 prints "SCAN TABLE x", later versions "SCAN x"
+re_scan = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+# (url name, args, query string, tables the case may scan in full)
+CASES = [
+    ('product-list', [], '', {'api_product'}),
+    ('product-detail', ['product'], '', set()),
+    ('stock-list', [], '', {'api_stock'}),
+    ('stock-detail', ['stock'], '', set()),
+    ('supplier-list', [], '', {'api_supplier'}),
+    ('supplier-detail', ['supplier'], '', set()),
+    ('purchaseorder-list', [], '', {'api_purchaseorder'}),
+    ('purchaseorder-list', [], 'date_from=2023-01-01&date_to=2023-01-15', set()),
+    ('purchaseorder-detail', ['order'], '', set()),
+    ('itementry-list', [], '', {'api_itementry'}),
+    ('itementry-detail', ['entry'], '', set()),
+    ('billing-list', [], '', {'api_billing', 'api_archivedbilling'}),
+    ('billing-list', [], 'date_from=2023-01-01&date_to=2023-01-15', set()),
+    ('billing-list', [], 'date_from=2019-01-10&date_to=2023-01-15', set()),
+    ('billing-detail', ['bill'], '', set()),
+    ('billing-detail', ['archived_bill'], '', set()),
+    ('billing-summary', [], '', {'api_billing', 'api_billingmonthsummary'}),
+    ('billing-summary', [], 'date_from=2023-01-01&date_to=2023-01-15', set()),
+    ('billing-summary', [], 'date_from=2019-01-10&date_to=2023-01-15', set()),
+    ('employee-list', [], '', {'api_employee'}),
+    ('employee-detail', ['employee'], '', set()),
+    ('customer-list', [], '', {'api_customer'}),
+    ('customer-detail', ['customer'], '', set()),
+    ('customer-lookup', [], 'mobile=9000000000', set()),
+    ('customer-lookup', [], 'mobile=9000000000&days=5000', set()),
+    ('customer-loyalty', ['customer'], '', set()),
+    ('pincode-list', [], '', {'api_pincode'}),
+    ('pincode-detail', ['pincode'], '', set()),
+    ('sync-list', [], 'since=0&limit=100', set()),
+    ('job-list', [], '', {'api_job'}),
+    ('job-detail', ['job'], '', set()),
+]
+# GET routes that need no case, and why
+EXEMPT = {
+    'api-root': 'static list of links',
+    'job-download': 'serves a file from disk; its lookup is job-detail',
+}
+
+
+def seed(batch):
+    """ROWS rows of every model read by the API; each batch adds as many again."""
+    offset = batch * ROWS
+    Pincode.objects.bulk_create([Pincode(PINCODE=600000 + offset + i, CITY='Chennai') for i in range(ROWS)])
+    suppliers = Supplier.objects.bulk_create([
+        Supplier(NAME=f'SUPPLIER {offset + i}', COMPANY_NAME=f'TRADERS {offset + i}', CATEGORY=CATEGORIES[i % 3])
+        for i in range(ROWS)
+    ])
+    products = Product.objects.bulk_create([
+        Product(PRODUCT_NAME=f'PRODUCT {offset + i}', BRAND_NAME='AMUL', CATEGORY=CATEGORIES[i % 3], STOCK=100, MRP=Decimal('10.00'))
+        for i in range(ROWS)
+    ])
+    Stock.objects.bulk_create([Stock(PRODUCT=product, STOCK=100) for product in products])
+    customers = Customer.objects.bulk_create([
+        Customer(NAME=f'CUSTOMER {offset + i}', MOBILE_NO=str(9_000_000_000 + offset + i), MOBILE_KEY=str(9_000_000_000 + offset + i))
+        for i in range(ROWS)
+    ])
+    employees = Employee.objects.bulk_create([Employee(NAME=f'EMPLOYEE {offset + i}') for i in range(ROWS)])
+    orders = PurchaseOrder.objects.bulk_create([
+        PurchaseOrder(
+            SUPPLIER=suppliers[i], PRODUCTNAME=products[i].PRODUCT_NAME, CATEGORY=products[i].CATEGORY,
+            PRICE=Decimal('8.00'), QUANTITY_REQUIRED=10, TOTAL_PRICE=Decimal('80.00'),
+            ORDER_DATETIME=timezone.make_aware(datetime.combine(HOT_START + timedelta(days=i), datetime.min.time())),
+        )
+        for i in range(ROWS)
+    ])
+    ItemEntry.objects.bulk_create([
+        ItemEntry(ORDER=order, PRODUCTNAME=order.PRODUCTNAME, RECEIVED_QUANTITY=5, ORDERED_QUANTITY=10, RECEIVED_DATE=HOT_START)
+        for order in orders
+    ])
+
+    def lines(model, start):
+        return [
+            model(
+                PRODUCT=products[i], CUSTOMER=customers[i], EMPLOYEE=employees[i], CATEGORY=products[i].CATEGORY,
+                QUANTITY=2, PRICE=Decimal('10.00'), BILL_DATE=start + timedelta(days=i),
+            )
+            for i in range(ROWS)
+        ]
+
+    Billing.objects.bulk_create(lines(Billing, HOT_START))
+    archived = ArchivedBilling.objects.bulk_create(lines(ArchivedBilling, ARCHIVED_START))
+    BillingMonthSummary.objects.bulk_create([
+        BillingMonthSummary(MONTH=ARCHIVED_START, CATEGORY=f'{category} {batch}', LINES=1, QUANTITY=2, TOTAL_SALES=Decimal('20.00'))
+        for category in CATEGORIES
+    ])
+    rebuild_customer_stats([customer.pk for customer in customers])
+    record_changes('product', [product.pk for product in products])
+    Job.objects.bulk_create([Job(TASK='billing_summary', PARAMS={}) for _ in range(ROWS)])
+    return {
+        'product': products[0].pk, 'stock': Stock.objects.filter(PRODUCT=products[0]).first().pk,
+        'supplier': suppliers[0].pk, 'order': orders[0].pk,
+        'entry': ItemEntry.objects.filter(ORDER=orders[0]).first().pk,
+        'bill': Billing.objects.filter(PRODUCT=products[0]).first().pk, 'archived_bill': archived[0].pk,
+        'employee': employees[0].pk, 'customer': customers[0].pk,
+        'pincode': Pincode.objects.order_by('id').first().pk, 'job': Job.objects.order_by('JOB_ID').first().pk,
+    }
+
+
+def case_url(case, ids):
+    name, args, query, _ = case
+    url = reverse(name, args=[ids[arg] for arg in args])
+    return f'{url}?{query}' if query else url
+
+
+def scanned_tables(queries):
+    """Tables SQLite reads in full for any of the captured SELECTs."""
+    tables = set(connection.introspection.table_names())
+    scanned = {}
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for row in cursor.fetchall():
+                match = re_scan.match(row[-1])
+                if match and match.group(1) in tables:
+                    scanned.setdefault(match.group(1), sql)
+    return scanned
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = seed(0)
+
+    def run_case(self, case):
+        url = case_url(case, self.ids)
+        # Budgets are per client; this test is one client making every request
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return url, queries.captured_queries
+
+    def test_no_unexpected_table_scans(self):
+        for case in CASES:
+            url, queries = self.run_case(case)
+            with self.subTest(url=url):
+                unexpected = {table: sql for table, sql in scanned_tables(queries).items() if table not in case[3]}
+                self.assertEqual(unexpected, {}, f'{url} scans tables without an index')
+
+    def test_query_count_does_not_grow_with_rows(self):
+        before = [len(self.run_case(case)[1]) for case in CASES]
+        seed(1)
+        for case, count in zip(CASES, before):
+            url, queries = self.run_case(case)
+            with self.subTest(url=url):
+                self.assertEqual(
+                    len(queries), count,
+                    f'{url} ran {count} queries with {ROWS} rows per table and {len(queries)} with {2 * ROWS}:\n'
+                    + '\n'.join(query['sql'] for query in queries),
+                )
+
+    def test_every_get_route_is_covered(self):
+        routes = {
+            pattern.name
+            for pattern in router.urls
+            if 'get' in (getattr(pattern.callback, 'actions', None) or {}) or pattern.name == 'api-root'
+        }
+        covered = {case[0] for case in CASES} | set(EXEMPT)
+        self.assertEqual(sorted(routes - covered), [], 'add a case to CASES for these routes')
+
+
+class ScanPatternTests(TestCase):
+    def test_matches_old_and_new_sqlite_plan_output(self):
+        self.assertEqual(re_scan.match('SCAN api_billing').group(1), 'api_billing')
+        self.assertEqual(re_scan.match('SCAN TABLE api_billing').group(1), 'api_billing')
+        self.assertEqual(re_scan.match('SCAN TABLE api_billing USING INDEX x').group(1), 'api_billing')
+        self.assertIsNone(re_scan.match('SEARCH api_billing USING INDEX billing_date (BILLDATE>?)'))
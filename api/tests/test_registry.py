@@ -0,0 +1,116 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import PurchaseOrder, Supplier
+from ..registry import SupplierRegistry, _Snapshot, supplier_registry
+
+
+def delete_elsewhere(supplier):
+    """Delete as another worker would: no signals reach this process's registry."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM api_supplier WHERE "SUPPLIERID" = %s', [supplier.pk])
+
+
+class SupplierRegistryTests(TestCase):
+    def setUp(self):
+        self.registry = SupplierRegistry()
+        self.supplier = Supplier.objects.create(NAME='FRESH FARMS')
+
+    def test_delete_by_another_worker_is_seen(self):
+        self.assertTrue(self.registry.exists(self.supplier.pk))
+        delete_elsewhere(self.supplier)
+        self.assertFalse(self.registry.exists(self.supplier.pk))
+
+    def test_insert_by_another_worker_is_seen(self):
+        self.assertIsNone(self.registry.get_name(self.supplier.pk + 1))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO api_supplier ("SUPPLIERID", "SUPPLIERNAME", "COMPANYNAME", "MOBILENO", "EMAILID", "CATEGORY") '
+                "VALUES (%s, 'DAIRY CO', 'DAIRY CO', '0', 'a@example.com', 'DAIRY')",
+                [self.supplier.pk + 1],
+            )
+        self.assertEqual(self.registry.get_name(self.supplier.pk + 1), 'DAIRY CO')
+
+    def test_unknown_id_is_cached(self):
+        self.assertFalse(self.registry.exists(999))
+        # Only the change counter is read
+        with self.assertNumQueries(1):
+            self.assertFalse(self.registry.exists(999))
+
+    def test_pinned_reads_counter_once(self):
+        with self.registry.pinned():
+            with self.assertNumQueries(0):
+                self.assertEqual(self.registry.get_name(self.supplier.pk), 'FRESH FARMS')
+                self.assertFalse(self.registry.exists(999))
+
+    def test_ttl_without_counter(self):
+        with mock.patch.object(self.registry, '_version', return_value=None):
+            self.assertTrue(self.registry.exists(self.supplier.pk))
+            delete_elsewhere(self.supplier)
+            # Within the TTL the map is trusted
+            self.assertTrue(self.registry.exists(self.supplier.pk))
+            with self.settings(SUPPLIER_REGISTRY_TTL=-1):
+                self.assertFalse(self.registry.exists(self.supplier.pk))
+
+    def test_reload_rechecks_after_lock(self):
+        registry = SupplierRegistry()
+        with mock.patch.object(registry, '_version', return_value=7), \
+                mock.patch.object(registry, '_load', return_value={1: 'FRESH FARMS'}) as load:
+            threads = [threading.Thread(target=registry.names) for _ in range(4)]
+            with registry._lock:
+                for thread in threads:
+                    thread.start()
+                # Loaded by whoever held the lock while the others waited
+                registry._snapshot = _Snapshot({1: 'FRESH FARMS'}, 7)
+            for thread in threads:
+                thread.join()
+        load.assert_not_called()
+
+
+class PurchaseOrderSupplierTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        supplier_registry.invalidate()
+        self.supplier = Supplier.objects.create(NAME='FRESH FARMS')
+
+    def order(self, supplier_id):
+        return {
+            'SUPPLIER_ID': supplier_id, 'CATEGORY': 'DAIRY', 'PRODUCTNAME': 'MILK', 'PRICE': '20.00',
+            'QUANTITY_REQUIRED': 5, 'TOTAL_PRICE': '100.00', 'PENDING_QUANTITY': 5, 'DATE': '01-02-2024',
+        }
+
+    def test_bulk_create_uses_registry_names(self):
+        response = self.client.post(
+            reverse('purchaseorder-list'), [self.order(self.supplier.pk)] * 3, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual([order['SUPPLIER_NAME'] for order in response.json()], ['FRESH FARMS'] * 3)
+
+    def test_supplier_deleted_elsewhere_is_rejected(self):
+        supplier_registry.names()
+        delete_elsewhere(self.supplier)
+        response = self.client.post(
+            reverse('purchaseorder-list'), self.order(self.supplier.pk), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_create_reads_the_counter_once(self):
+        supplier_registry.names()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('purchaseorder-list'), self.order(self.supplier.pk), content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['SUPPLIER_NAME'], 'FRESH FARMS')
+        counter_reads = [query for query in queries if 'api_tableversion' in query['sql']]
+        self.assertEqual(len(counter_reads), 1)
+
+    def test_saves_outside_the_api_still_fill_the_name(self):
+        order = PurchaseOrder.objects.create(SUPPLIER=self.supplier)
+        self.assertEqual(order.SUPPLIER_NAME, 'FRESH FARMS')
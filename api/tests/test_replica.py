@@ -0,0 +1,136 @@
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .. import middleware, routers
+from ..middleware import ReplicaRoutingMiddleware
+from ..models import Billing, Product
+from ..routers import LagGuard, ReplicaRouter, replica_reads
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(routers, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fresh = mock.patch.object(routers.lag_guard, 'replica_is_fresh', return_value=True)
+        self.fresh.start()
+        self.addCleanup(self.fresh.stop)
+
+    def test_reporting_reads_go_to_the_replica(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Billing))
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Billing), routers.REPLICA)
+            self.assertIsNone(router.db_for_read(Product))
+            self.assertEqual(router.db_for_write(Billing), 'default')
+
+    def test_stale_replica_is_not_used(self):
+        with mock.patch.object(routers.lag_guard, 'replica_is_fresh', return_value=False), replica_reads():
+            self.assertIsNone(ReplicaRouter().db_for_read(Billing))
+
+    def test_reads_inside_a_write_transaction_stay_on_the_primary(self):
+        with replica_reads(), mock.patch.dict(routers.connections['default'].__dict__, {'in_atomic_block': True}):
+            self.assertIsNone(ReplicaRouter().db_for_read(Billing))
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(ReplicaRouter().allow_migrate(routers.REPLICA, 'api'))
+        self.assertTrue(ReplicaRouter().allow_migrate('default', 'api'))
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=60)
+class LagGuardTests(SimpleTestCase):
+    def fresh(self, lag):
+        with mock.patch.object(routers, 'replica_lag', **({'side_effect': lag} if isinstance(lag, Exception) else {'return_value': lag})):
+            return LagGuard().replica_is_fresh()
+
+    def test_lag_within_the_limit(self):
+        self.assertTrue(self.fresh(0.0))
+        self.assertTrue(self.fresh(60))
+        self.assertFalse(self.fresh(61))
+
+    def test_unknown_lag_is_not_fresh(self):
+        self.assertFalse(self.fresh(None))
+        self.assertFalse(self.fresh(RuntimeError('replica down')))
+
+    def test_lag_is_checked_at_most_once_per_interval(self):
+        guard = LagGuard()
+        with mock.patch.object(routers, 'replica_lag', side_effect=[0.0, None]) as lag, \
+                mock.patch.object(routers.time, 'monotonic', side_effect=[100.0, 100.5, 101.5]):
+            self.assertTrue(guard.replica_is_fresh())
+            self.assertTrue(guard.replica_is_fresh())
+            self.assertFalse(guard.replica_is_fresh())
+        self.assertEqual(lag.call_count, 2)
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=60)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        for target in (middleware, routers):
+            patcher = mock.patch.object(target, 'replica_configured', return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(routers.lag_guard, 'replica_is_fresh', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_request(self, request, status=200):
+        seen = {}
+
+        def get_response(request):
+            seen['replica'] = routers._replica_reads.get()
+            return HttpResponse(status=status)
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return response, seen['replica']
+
+    def test_reads_use_the_replica(self):
+        response, replica = self.run_request(self.factory.get('/api/billing/'))
+        self.assertTrue(replica)
+        self.assertNotIn(ReplicaRoutingMiddleware.PIN_HEADER, response)
+
+    def test_successful_write_pins_the_client(self):
+        response, replica = self.run_request(self.factory.post('/api/billing/'), status=201)
+        self.assertFalse(replica)
+        expiry = int(response[ReplicaRoutingMiddleware.PIN_HEADER])
+        self.assertAlmostEqual(expiry, time.time() + 60, delta=2)
+        self.assertEqual(response.cookies[ReplicaRoutingMiddleware.PIN_COOKIE]['max-age'], 60)
+
+    def test_failed_write_does_not_pin(self):
+        for status in (400, 409, 500):
+            with self.subTest(status=status):
+                response, _ = self.run_request(self.factory.post('/api/billing/'), status=status)
+                self.assertNotIn(ReplicaRoutingMiddleware.PIN_HEADER, response)
+                self.assertNotIn(ReplicaRoutingMiddleware.PIN_COOKIE, response.cookies)
+
+    def test_echoed_pin_reads_from_the_primary(self):
+        cases = {
+            str(int(time.time()) + 30): False,
+            str(int(time.time()) - 1): True,
+            'garbage': True,
+        }
+        for pin, replica in cases.items():
+            with self.subTest(pin=pin):
+                _, used_replica = self.run_request(self.factory.get('/api/billing/', HTTP_PRIMARY_PIN=pin))
+                self.assertEqual(used_replica, replica)
+
+    def test_pin_cookie_reads_from_the_primary(self):
+        request = self.factory.get('/api/billing/')
+        request.COOKIES[ReplicaRoutingMiddleware.PIN_COOKIE] = '1'
+        self.assertFalse(self.run_request(request)[1])
+
+    def test_no_replica_no_pin(self):
+        with mock.patch.object(middleware, 'replica_configured', return_value=False):
+            response, replica = self.run_request(self.factory.post('/api/billing/'), status=201)
+        self.assertFalse(replica)
+        self.assertNotIn(ReplicaRoutingMiddleware.PIN_HEADER, response)
+
+    def test_pin_header_passes_cors(self):
+        response = self.client.options(
+            '/api/billing/', HTTP_ORIGIN='https://amrsupermarket.vercel.app',
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD='GET', HTTP_ACCESS_CONTROL_REQUEST_HEADERS='primary-pin',
+        )
+        self.assertIn('primary-pin', response['Access-Control-Allow-Headers'])
@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Billing, Product
+from ..reports import billing_summary
+
+
+class BillingSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        milk = Product.objects.create(PRODUCT_NAME='MILK', CATEGORY='DAIRY')
+        chips = Product.objects.create(PRODUCT_NAME='CHIPS', CATEGORY='SNACKS')
+        Billing.objects.bulk_create([
+            Billing(PRODUCT=milk, CATEGORY='DAIRY', QUANTITY=2, PRICE=Decimal('25.50'), BILL_DATE=date(2024, 3, 1)),
+            Billing(PRODUCT=milk, CATEGORY='DAIRY', QUANTITY=1, PRICE=Decimal('25.50'), BILL_DATE=date(2024, 3, 20)),
+            Billing(PRODUCT=chips, CATEGORY='SNACKS', QUANTITY=3, PRICE=Decimal('10.10'), BILL_DATE=date(2024, 4, 2)),
+        ])
+
+    def test_totals_by_category(self):
+        self.assertEqual(billing_summary(), {
+            'LINES': 3,
+            'QUANTITY': 6,
+            'TOTAL_SALES': Decimal('106.80'),
+            'BY_CATEGORY': [
+                {'CATEGORY': 'DAIRY', 'LINES': 2, 'QUANTITY': 3, 'TOTAL_SALES': Decimal('76.50')},
+                {'CATEGORY': 'SNACKS', 'LINES': 1, 'QUANTITY': 3, 'TOTAL_SALES': Decimal('30.30')},
+            ],
+        })
+
+    def test_date_range_is_inclusive(self):
+        summary = billing_summary(date(2024, 3, 20), date(2024, 4, 2))
+        self.assertEqual((summary['LINES'], summary['TOTAL_SALES']), (2, Decimal('55.80')))
+
+    def test_empty_range(self):
+        self.assertEqual(billing_summary(date(2025, 1, 1)), {
+            'LINES': 0, 'QUANTITY': 0, 'TOTAL_SALES': Decimal('0.00'), 'BY_CATEGORY': [],
+        })
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('billing-summary'), {'date_from': '2024-03-01', 'date_to': '2024-03-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['LINES'], 2)
+        self.assertEqual(Decimal(str(response.json()['TOTAL_SALES'])), Decimal('76.50'))
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import ChangeLog, Pincode, Product, Stock
+from ..sync import changes_since
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(PRODUCT_NAME='MILK 500ML', BRAND_NAME='AMUL', CATEGORY='DAIRY')
+        self.stock = Stock.objects.create(PRODUCT=self.product, STOCK=10)
+        self.seq = ChangeLog.objects.order_by('-SEQ').values_list('SEQ', flat=True).first()
+
+    def changes(self):
+        return changes_since(self.seq, 100)
+
+    def test_product_rename_resends_its_stock_rows(self):
+        self.product.PRODUCT_NAME = 'MILK 1L'
+        self.product.save()
+        changes = self.changes()
+        self.assertEqual([row['PRODUCTNAME'] for row in changes['CHANGED']['stock']], ['MILK 1L'])
+        self.assertEqual([row['id'] for row in changes['CHANGED']['product']], [self.product.pk])
+
+    def test_product_stock_change_leaves_stock_rows_alone(self):
+        self.product.STOCK = 5
+        self.product.save()
+        self.assertEqual(self.changes()['CHANGED']['stock'], [])
+
+    def test_pincode_key_change_deletes_the_old_key(self):
+        pincode = Pincode.objects.create(PINCODE=600001, CITY='PARRYS')
+        self.seq = ChangeLog.objects.order_by('-SEQ').values_list('SEQ', flat=True).first()
+        pincode.PINCODE = 600002
+        pincode.save()
+        changes = self.changes()
+        self.assertEqual(changes['DELETED']['pincode'], [600001])
+        self.assertEqual([row['PINCODE'] for row in changes['CHANGED']['pincode']], [600002])
+
+    def test_delete(self):
+        stock_id = self.stock.pk
+        self.stock.delete()
+        self.assertEqual(self.changes()['DELETED']['stock'], [stock_id])
+
+    def test_pages(self):
+        Product.objects.create(PRODUCT_NAME='CURD')
+        Product.objects.create(PRODUCT_NAME='GHEE')
+        first = changes_since(self.seq, 1)
+        self.assertTrue(first['HAS_MORE'])
+        second = changes_since(first['SEQ'], 1)
+        self.assertFalse(second['HAS_MORE'])
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('sync-list'), {'since': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['CHANGED']['stock'][0]['PRODUCTNAME'], 'MILK 500ML')
+        self.assertEqual(self.client.get(reverse('sync-list'), {'since': 'x'}).status_code, 400)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Product
+from ..throttling import CostBudgetThrottle
+
+COSTS = {'read': 1, 'write': 1, 'batch': 10, 'list': 10, 'report': 20, 'export': 50}
+
+
+@override_settings(API_THROTTLE_COSTS=COSTS)
+class CostBudgetThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        for patcher in (
+            mock.patch.object(CostBudgetThrottle, 'THROTTLE_RATES', {'till': '3/min', 'reports': '20/min'}),
+            mock.patch.object(CostBudgetThrottle, 'timer', lambda throttle: self.now),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.product = Product.objects.create(PRODUCT_NAME='MILK')
+        self.detail = reverse('product-detail', args=[self.product.pk])
+        self.list = reverse('product-list')
+
+    def get(self, url, client='10.0.0.1'):
+        return self.client.get(url, REMOTE_ADDR=client)
+
+    def test_exhausted_budget_gets_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.get(self.detail).status_code, 200)
+        response = self.get(self.detail)
+        self.assertEqual(response.status_code, 429)
+        # One token of a 3/min bucket comes back every 20 seconds
+        self.assertEqual(response['Retry-After'], '20')
+
+    def test_budget_refills_over_time(self):
+        for _ in range(3):
+            self.get(self.detail)
+        self.now += 19
+        self.assertEqual(self.get(self.detail).status_code, 429)
+        self.now += 1
+        self.assertEqual(self.get(self.detail).status_code, 200)
+
+    def test_till_and_report_buckets_are_separate(self):
+        for _ in range(3):
+            self.get(self.detail)
+        self.assertEqual(self.get(self.detail).status_code, 429)
+        # Lists cost 10 from the 20-token reports bucket
+        self.assertEqual(self.get(self.list).status_code, 200)
+        self.assertEqual(self.get(self.list).status_code, 200)
+        self.assertEqual(self.get(self.list).status_code, 429)
+
+        self.now += 20
+        self.assertEqual(self.get(self.detail).status_code, 200)
+
+    def test_clients_have_their_own_buckets(self):
+        for _ in range(3):
+            self.get(self.detail)
+        self.assertEqual(self.get(self.detail).status_code, 429)
+        self.assertEqual(self.get(self.detail, client='10.0.0.2').status_code, 200)
+
+    def test_cost_above_the_budget_is_capped(self):
+        # An export costs 50; a 20-token bucket still lets one through when full
+        def post():
+            return self.client.post(reverse('job-list'), {'TASK': 'nope'}, content_type='application/json', REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(post().status_code, 400)
+        self.assertEqual(post().status_code, 429)
+
+    def test_empty_rate_disables_the_scope(self):
+        with mock.patch.object(CostBudgetThrottle, 'THROTTLE_RATES', {'till': None, 'reports': '20/min'}):
+            for _ in range(10):
+                self.assertEqual(self.get(self.detail).status_code, 200)
@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..archive import archive_billing
+from ..models import ArchivedBilling, Billing, Customer, Product
+from ..reports import billing_summary
+from ..validation import FILES, validate_file, validate_files, write_report
+
+
+def product(pid, **extra):
+    return {'PRODUCTID': pid, 'PRODUCTNAME': f'P{pid}', 'STOCK': 1, 'MRP': '10.00', **extra}
+
+
+def bill(pid, **extra):
+    return {'PRODUCTID': pid, 'QUANTITY': 1, 'PRICE': '10.00', 'DATE': '01-03-2024', **extra}
+
+
+class ValidateFileTests(TestCase):
+    def check(self, filename, items, known=None):
+        return validate_file(filename, items, FILES[filename], {} if known is None else known)
+
+    def errors(self, result):
+        return [(rejection['ROW'], rejection['COLUMN'], rejection['ERROR']) for rejection in result.rejections]
+
+    def test_types(self):
+        result = self.check('PRODUCTWITHSTOCK.json', [
+            product('abc'), product(2, STOCK=1.5), product(3, MRP='NaN'), product(4, MRP=True), product(5, PRODUCTNAME=['x']),
+        ])
+        self.assertEqual(self.errors(result), [
+            (1, 'PRODUCTID', 'must be a whole number'),
+            (2, 'STOCK', 'must be a whole number'),
+            (3, 'MRP', 'must be a number'),
+            (4, 'MRP', 'must be a number'),
+            (5, 'PRODUCTNAME', 'must be text'),
+        ])
+        self.assertEqual(result.rows, [])
+
+    def test_ranges_and_lengths(self):
+        result = self.check('PRODUCTWITHSTOCK.json', [
+            product(0), product(2, STOCK=-1), product(3, MRP='-0.01'), product(4, PRODUCTNAME='x' * 500), product(5),
+        ])
+        self.assertEqual([row for row, _, _ in self.errors(result)], [1, 2, 3, 4])
+        self.assertEqual(self.errors(result)[0][2], 'must be at least 1')
+        self.assertEqual(result.rows, [product(5)])
+
+    def test_blank_prices_and_quantities_are_required(self):
+        result = self.check('BILLING.json', [bill(1, PRICE=''), bill(1, QUANTITY=None, DATE='02-03-2024'), bill(1, QUANTITY=0, DATE='03-03-2024')])
+        self.assertEqual(self.errors(result), [
+            (1, 'PRICE', 'is required'),
+            (2, 'QUANTITY', 'is required'),
+            (3, 'QUANTITY', 'must be at least 1'),
+        ])
+        result = self.check('PRODUCTWITHSTOCK.json', [product(1, MRP='  ')])
+        self.assertEqual(self.errors(result), [(1, 'MRP', 'is required')])
+
+    def test_optional_columns_may_be_blank(self):
+        result = self.check('PRODUCTWITHSTOCK.json', [product(1, STOCK=None, BRANDNAME=None)])
+        self.assertEqual(result.rejections, [])
+
+    def test_duplicate_keys(self):
+        result = self.check('BILLING.json', [bill(1), bill(2), bill(1), bill(1, DATE='02-03-2024')], known={'product': {1, 2}})
+        self.assertEqual(self.errors(result), [(3, 'PRODUCTID, DATE', 'duplicate of row 1')])
+
+    def test_non_object_rows(self):
+        result = self.check('STOCK.json', ['oops'])
+        self.assertEqual(self.errors(result)[0], (1, '', 'must be an object'))
+
+    def test_dangling_references(self):
+        Product.objects.create(id=7, PRODUCT_NAME='IN DB')
+        result = self.check('STOCK.json', [{'PRODUCTID': 1}, {'PRODUCTID': 7}, {'PRODUCTID': 9}], known={'product': {1}})
+        self.assertEqual(self.errors(result), [(3, 'PRODUCTID', 'no product 9')])
+
+    def test_duplicate_mobile_numbers(self):
+        Customer.objects.create(CUSTOMER_ID=1, NAME='IN DB', MOBILE_NO='9000000001')
+        result = self.check('CUSTOMER.json', [
+            {'CUSTOMER ID': 10, 'MOBILE NUMBER': '9876543210'},
+            {'CUSTOMER ID': 11, 'MOBILE NUMBER': '+91 98765 43210'},
+            {'CUSTOMER ID': 12, 'MOBILE NUMBER': '090000 00001'},
+            # The holder itself, reformatted, and placeholders are fine
+            {'CUSTOMER ID': 1, 'MOBILE NUMBER': '+91 90000 00001'},
+            {'CUSTOMER ID': 13, 'MOBILE NUMBER': '0000000000'},
+            {'CUSTOMER ID': 14, 'MOBILE NUMBER': '0000000000'},
+        ])
+        self.assertEqual(self.errors(result), [
+            (2, 'MOBILE NUMBER', 'same mobile number as row 1'),
+            (3, 'MOBILE NUMBER', 'same mobile number as customer 1'),
+        ])
+
+    def test_customers_import_with_duplicate_mobiles_completes(self):
+        import import_data
+
+        results = validate_files({'CUSTOMER.json': [
+            {'CUSTOMER ID': 1, 'MOBILE NUMBER': '9876543210'},
+            {'CUSTOMER ID': 2, 'MOBILE NUMBER': '+91 98765 43210'},
+            {'CUSTOMER ID': 3, 'MOBILE NUMBER': '9000000003'},
+        ]})
+        import_data.load_customers(results['CUSTOMER.json'].rows, StringIO())
+        self.assertEqual(list(Customer.objects.order_by('pk').values_list('pk', 'MOBILE_KEY')), [(1, '9876543210'), (3, '9000000003')])
+        # Re-importing the same file is still clean
+        self.assertEqual(validate_files({'CUSTOMER.json': results['CUSTOMER.json'].rows})['CUSTOMER.json'].rejections, [])
+
+    def test_rejected_rows_cannot_be_referenced(self):
+        results = validate_files({
+            'PRODUCTWITHSTOCK.json': [product(1), product(2, MRP='')],
+            'STOCK.json': [{'PRODUCTID': 1}, {'PRODUCTID': 2}],
+        })
+        self.assertEqual(self.errors(results['STOCK.json']), [(2, 'PRODUCTID', 'no product 2')])
+        self.assertEqual(results['SUPPLIER.json'].rejections, [])
+
+
+class ReportTests(TestCase):
+    def test_write_report(self):
+        results = validate_files({'PRODUCTWITHSTOCK.json': [product(1, MRP='x'), product(1)]})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'REJECTED.csv')
+            self.assertEqual(write_report(results, path), 1)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(rows, [
+            {'FILE': 'PRODUCTWITHSTOCK.json', 'ROW': '1', 'COLUMN': 'MRP', 'VALUE': 'x', 'ERROR': 'must be a number'},
+        ])
+
+    def test_import_check_only_writes_the_report_and_nothing_else(self):
+        import import_data
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'PRODUCTWITHSTOCK.json'), 'w', encoding='utf-8') as f:
+                json.dump([product(1), product(2, MRP='')], f)
+            report = os.path.join(tmp, 'REJECTED.csv')
+            with mock.patch.object(import_data, 'DATA_DIR', tmp), mock.patch.object(import_data, 'REJECTIONS_FILE', report):
+                out = StringIO()
+                self.assertEqual(import_data.run(check_only=True, out=out), 1)
+                self.assertTrue(os.path.exists(report))
+                self.assertIn('PRODUCTWITHSTOCK.json: 1 rows rejected, 1 clean', out.getvalue())
+                self.assertFalse(Product.objects.exists())
+
+                # A clean run removes the stale report
+                with open(os.path.join(tmp, 'PRODUCTWITHSTOCK.json'), 'w', encoding='utf-8') as f:
+                    json.dump([product(1)], f)
+                self.assertEqual(import_data.run(check_only=True, out=StringIO()), 0)
+                self.assertFalse(os.path.exists(report))
+
+
+class ArchivedBillImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reimport_does_not_put_archived_bills_back(self):
+        import import_data
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for filename, items in {
+                'PRODUCTWITHSTOCK.json': [product(1)],
+                'BILLING.json': [bill(1, QUANTITY=2, PRICE='100.00', DATE='15-06-2019')],
+            }.items():
+                with open(os.path.join(tmp, filename), 'w', encoding='utf-8') as f:
+                    json.dump(items, f)
+            report = os.path.join(tmp, 'REJECTED.csv')
+            with mock.patch.object(import_data, 'DATA_DIR', tmp), mock.patch.object(import_data, 'REJECTIONS_FILE', report):
+                self.assertEqual(import_data.run(out=StringIO()), 0)
+                archive_billing(before=date(2020, 1, 1))
+                before = billing_summary()
+
+                self.assertEqual(import_data.run(out=StringIO()), 1)
+                with open(report, newline='', encoding='utf-8') as f:
+                    [rejection] = csv.DictReader(f)
+
+        self.assertEqual((rejection['FILE'], rejection['COLUMN']), ('BILLING.json', 'DATE'))
+        self.assertIn('archived', rejection['ERROR'])
+        self.assertEqual((Billing.objects.count(), ArchivedBilling.objects.count()), (0, 1))
+        self.assertEqual(billing_summary(), before)
+        self.assertEqual(before['TOTAL_SALES'], Decimal('200.00'))
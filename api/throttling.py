@@ -0,0 +1,82 @@
+"""
+Request-cost budgets for the API.
+
+Every request has a kind, and every kind a cost (settings.API_THROTTLE_COSTS)
+and a scope. Each client gets a token bucket per scope, sized and refilled by
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"][scope]: "600/min" holds 600 tokens
+and earns them back over a minute. A request that cannot pay its cost gets
+429 with Retry-After.
+
+Tills (point reads, writes, syncs) and reports (lists, summaries, exports)
+spend from separate buckets, so a dashboard that exhausts its report budget
+does not slow down checkout.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from rest_framework.throttling import SimpleRateThrottle
+
+READ, WRITE, BATCH, LIST, REPORT, EXPORT = 'read', 'write', 'batch', 'list', 'report', 'export'
+SCOPES = {
+    READ: 'till',
+    WRITE: 'till',
+    BATCH: 'till',
+    LIST: 'reports',
+    REPORT: 'reports',
+    EXPORT: 'reports',
+}
+DEFAULT_COSTS = {READ: 1, WRITE: 1, BATCH: 10, LIST: 10, REPORT: 20, EXPORT: 50}
+
+
+def request_kind(request, view):
+    """The view's throttle_kinds entry for its action, else list/read/write."""
+    action = getattr(view, 'action', None)
+    kinds = getattr(view, 'throttle_kinds', {})
+    if action in kinds:
+        return kinds[action]
+    if action == 'list':
+        return LIST
+    return READ if request.method in ('GET', 'HEAD', 'OPTIONS') else WRITE
+
+
+def request_cost(kind):
+    return getattr(settings, 'API_THROTTLE_COSTS', {}).get(kind, DEFAULT_COSTS[kind])
+
+
+class CostBudgetThrottle(SimpleRateThrottle):
+    """Token bucket per client and scope in the default cache, charged by request cost."""
+
+    cache = default_cache
+
+    def __init__(self):
+        # Scope and rate depend on the request; see allow_request()
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        kind = request_kind(request, view)
+        self.scope = SCOPES[kind]
+        rate = self.THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return True
+        capacity, duration = self.parse_rate(rate)
+        cost = min(request_cost(kind), capacity)
+
+        self.key = self.get_cache_key(request, view)
+        now = self.timer()
+        tokens, stamp = self.cache.get(self.key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * capacity / duration)
+        if tokens < cost:
+            self.wait_seconds = (cost - tokens) * duration / capacity
+            return False
+        self.cache.set(self.key, (tokens - cost, now), duration)
+        return True
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+    def timer(self):
+        return time.time()
+
+    def wait(self):
+        return self.wait_seconds
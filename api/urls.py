@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import *
+from .views import (
+    BillingViewSet, CustomerViewSet, EmployeeViewSet, ItemEntryViewSet, JobViewSet, PincodeViewSet, ProductViewSet,
+    PurchaseOrderViewSet, StockViewSet, SupplierViewSet, SyncViewSet, metrics,
+)
 
 router = DefaultRouter()
 router.register(r'product', ProductViewSet)
@@ -12,7 +15,10 @@ router.register(r'billing', BillingViewSet)
 router.register(r'employee', EmployeeViewSet, basename='employee')
 router.register(r'customer', CustomerViewSet)
 router.register(r'pincode', PincodeViewSet)
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
+    path('metrics/', metrics, name='metrics'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,389 @@
+"""
+Validation stage of import_data.py.
+
+Every input file is checked before anything is written, one column at a
+time over all of its rows. The checks cover:
+
+- types and ranges;
+- lengths of text stored in CharFields;
+- duplicate keys, and customers' mobile numbers as normalize_mobile()
+  keys them, since Customer.MOBILE_KEY is unique;
+- references to products, purchase orders and customers. A reference
+  matches a clean row of the referenced file or a row already in the
+  database;
+- bill dates in archived months, which are closed (see api/archive.py).
+
+Each failed check becomes a rejection (FILE, ROW, COLUMN, VALUE, ERROR), and
+only rows without any are loaded.
+"""
+import csv
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from .archive import archive_boundary, is_archived
+from .dates import parse_date
+from .models import Billing, Customer, Employee, ItemEntry, Pincode, Product, PurchaseOrder, Supplier, normalize_mobile
+
+# Stay under SQLite's bound-parameter limit in __in lookups
+IN_BATCH_SIZE = 500
+
+INVALID = object()
+
+REPORT_COLUMNS = ['FILE', 'ROW', 'COLUMN', 'VALUE', 'ERROR']
+
+
+# ----------------- Column parsers -----------------
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def to_int(value):
+    if _blank(value):
+        return None
+    if isinstance(value, bool):
+        return INVALID
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else INVALID
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return INVALID
+
+
+def to_money(value):
+    if _blank(value):
+        return None
+    if isinstance(value, bool):
+        return INVALID
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        return INVALID
+    return amount.quantize(Decimal('0.01')) if amount.is_finite() else INVALID
+
+
+def to_date(value):
+    if _blank(value):
+        return None
+    parsed = parse_date(value)
+    return INVALID if parsed is None else parsed
+
+
+def to_text(value):
+    if value is None:
+        return None
+    return str(value) if isinstance(value, (str, int, float)) and not isinstance(value, bool) else INVALID
+
+
+PARSERS = {'int': to_int, 'money': to_money, 'date': to_date, 'text': to_text}
+TYPE_NAMES = {'int': 'a whole number', 'money': 'a number', 'date': 'a DD-MM-YYYY date', 'text': 'text'}
+
+
+@dataclass
+class Column:
+    name: str
+    kind: str
+    required: bool = False
+    min_value: object = None
+    max_value: object = None
+    max_length: int = None
+
+    def check(self, values):
+        """Parse the whole column; returns (parsed values, {row index: error})."""
+        parsed = [PARSERS[self.kind](value) for value in values]
+        errors = {}
+        for row, value in enumerate(parsed):
+            if value is INVALID:
+                errors[row] = f'must be {TYPE_NAMES[self.kind]}'
+            elif value is None:
+                if self.required:
+                    errors[row] = 'is required'
+            elif self.min_value is not None and value < self.min_value:
+                errors[row] = f'must be at least {self.min_value}'
+            elif self.max_value is not None and value > self.max_value:
+                errors[row] = f'must be at most {self.max_value}'
+            elif self.max_length is not None and len(value) > self.max_length:
+                errors[row] = f'must be at most {self.max_length} characters'
+        return parsed, errors
+
+
+def text(name, model, field_name):
+    return Column(name, 'text', max_length=model._meta.get_field(field_name).max_length)
+
+
+@dataclass
+class FileSpec:
+    columns: list
+    # Columns identifying a row; later rows with the same values are duplicates
+    key: tuple = ()
+    # Column -> name of the REFERENCES entry it points to
+    references: dict = field(default_factory=dict)
+    # Name of the REFERENCES entry this file's key column adds to
+    provides: str = None
+    # Date column of rows that must not fall in an archived month
+    open_date: str = None
+    # Customer mobile number column; no two customers may share its key
+    mobile: str = None
+
+
+@dataclass
+class FileResult:
+    rows: list
+    rejections: list
+
+
+# Referenced key -> model and field holding it in the database
+REFERENCES = {
+    'product': (Product, 'id'),
+    'order': (PurchaseOrder, 'ORDERID'),
+    'customer': (Customer, 'CUSTOMER_ID'),
+}
+
+# In dependency order: a file's references are resolved against the files above it.
+# Prices and quantities are required where import_data would load a blank as 0.
+FILES = {
+    'PRODUCTWITHSTOCK.json': FileSpec(
+        columns=[
+            Column('PRODUCTID', 'int', required=True, min_value=1),
+            text('PRODUCTNAME', Product, 'PRODUCT_NAME'),
+            text('BRANDNAME', Product, 'BRAND_NAME'),
+            text('CATEGORY', Product, 'CATEGORY'),
+            Column('STOCK', 'int', min_value=0),
+            Column('MRP', 'money', required=True, min_value=0),
+        ],
+        key=('PRODUCTID',),
+        provides='product',
+    ),
+    'SUPPLIER.json': FileSpec(
+        columns=[
+            Column('SUPPLIER ID', 'int', required=True, min_value=1),
+            text('SUPPLIER NAME', Supplier, 'NAME'),
+            text('COMPANY NAME', Supplier, 'COMPANY_NAME'),
+            text('MOBILE NO', Supplier, 'MOBILE_NO'),
+            text('EMAIL ID', Supplier, 'EMAIL_ID'),
+            text('CATEGORY', Supplier, 'CATEGORY'),
+        ],
+        key=('SUPPLIER ID',),
+    ),
+    'STOCK.json': FileSpec(
+        columns=[
+            Column('PRODUCTID', 'int', required=True, min_value=1),
+            Column('STOCK', 'int', min_value=0),
+        ],
+        key=('PRODUCTID',),
+        references={'PRODUCTID': 'product'},
+    ),
+    'PURCHASEORDER.json': FileSpec(
+        columns=[
+            Column('ORDERID', 'int', required=True, min_value=1),
+            Column('SUPPLIER ID', 'int', min_value=0),
+            text('SUPPLIER NAME', PurchaseOrder, 'SUPPLIER_NAME'),
+            text('CATEGORY', PurchaseOrder, 'CATEGORY'),
+            text('PRODUCTNAME', PurchaseOrder, 'PRODUCTNAME'),
+            Column('PRICE', 'money', required=True, min_value=0),
+            Column('QUANTITY REQUIRED', 'int', required=True, min_value=1),
+            Column('TOTAL PRICE', 'money', min_value=0),
+            Column('PENDING QUANTITY', 'int', min_value=0),
+            Column('DATE', 'date'),
+        ],
+        key=('ORDERID',),
+        provides='order',
+    ),
+    'ITEMENTRY.json': FileSpec(
+        columns=[
+            Column('ORDERID', 'int', required=True, min_value=1),
+            Column('SUPPLIER ID', 'int', min_value=0),
+            text('SUPPLIER NAME', ItemEntry, 'SUPPLIER_NAME'),
+            text('PRODUCTNAME', ItemEntry, 'PRODUCTNAME'),
+            text('CATEGORY', ItemEntry, 'CATEGORY'),
+            Column('ORDERED QUANTITY', 'int', required=True, min_value=1),
+            Column('RECEIVED QUANTITY', 'int', required=True, min_value=0),
+            Column('RECEIVED DATE', 'date'),
+        ],
+        references={'ORDERID': 'order'},
+    ),
+    'EMPLOYEE.json': FileSpec(
+        columns=[
+            Column('EMPLOYEEID', 'int', required=True, min_value=1),
+            text('EMPLOYEE NAME', Employee, 'NAME'),
+            text('MOBILE NUMBER', Employee, 'MOBILE_NO'),
+            Column('DOB', 'date'),
+            Column('AGE', 'int', min_value=0, max_value=120),
+            Column('DOJ', 'date'),
+            text('GENDER', Employee, 'GENDER'),
+            text('EMAIL ID', Employee, 'EMAIL_ID'),
+            text('QUALIFICATION', Employee, 'QUALIFICATION'),
+            text('DESIGNATION', Employee, 'DESIGNATION'),
+            Column('BASIC PAY', 'money', min_value=0),
+            Column('INCENTIVE', 'money', min_value=0),
+            Column('NET PAY', 'money', min_value=0),
+        ],
+        key=('EMPLOYEEID',),
+    ),
+    'CUSTOMER.json': FileSpec(
+        columns=[
+            Column('CUSTOMER ID', 'int', required=True, min_value=1),
+            text('CUSTOMER NAME', Customer, 'NAME'),
+            text('MOBILE NUMBER', Customer, 'MOBILE_NO'),
+            text('CITY', Customer, 'CITY'),
+            text('TOWN', Customer, 'TOWN'),
+            Column('PINCODE', 'int', min_value=0),
+        ],
+        key=('CUSTOMER ID',),
+        provides='customer',
+        mobile='MOBILE NUMBER',
+    ),
+    'BILLING.json': FileSpec(
+        columns=[
+            Column('PRODUCTID', 'int', required=True, min_value=1),
+            Column('CUSTOMER ID', 'int', min_value=0),
+            text('CATEGORY', Billing, 'CATEGORY'),
+            Column('QUANTITY', 'int', required=True, min_value=1),
+            Column('PRICE', 'money', required=True, min_value=0),
+            Column('DATE', 'date', required=True),
+        ],
+        # import_data updates the bill line of a product on a date
+        key=('PRODUCTID', 'DATE'),
+        references={'PRODUCTID': 'product', 'CUSTOMER ID': 'customer'},
+        open_date='DATE',
+    ),
+    'PINCODES.json': FileSpec(
+        columns=[
+            Column('PINCODE', 'int', required=True, min_value=100000, max_value=999999),
+            text('CITY', Pincode, 'CITY'),
+        ],
+        # A pincode covers several localities (CITY); only repeats of both are duplicates
+        key=('PINCODE', 'CITY'),
+    ),
+}
+
+
+# ----------------- Validation -----------------
+def _in_chunks(queryset, field_name, values, *fields):
+    values = list(values)
+    for start in range(0, len(values), IN_BATCH_SIZE):
+        yield from queryset.filter(**{f'{field_name}__in': values[start:start + IN_BATCH_SIZE]}).values_list(*fields)
+
+
+def _existing(reference, values):
+    model, field_name = REFERENCES[reference]
+    return {value for value, in _in_chunks(model.objects, field_name, values, field_name)}
+
+
+def _mobile_clashes(mobiles, customer_ids, errors):
+    """
+    {row index: error} for customer rows whose number has the MOBILE_KEY of
+    an earlier row or of another customer in the database. A customer whose
+    stored number already has that key keeps it (see Customer.save()).
+    """
+    keys = {row: normalize_mobile(mobile) for row, mobile in enumerate(mobiles) if row not in errors}
+    keys = {row: key for row, key in keys.items() if key}
+    holders = dict(_in_chunks(Customer.objects, 'MOBILE_KEY', set(keys.values()), 'MOBILE_KEY', 'CUSTOMER_ID'))
+    stored = {
+        customer_id: normalize_mobile(mobile)
+        for customer_id, mobile in _in_chunks(
+            Customer.objects, 'CUSTOMER_ID', {customer_ids[row] for row in keys}, 'CUSTOMER_ID', 'MOBILE_NO',
+        )
+    }
+
+    clashes, first_seen = {}, {}
+    for row, key in keys.items():
+        customer_id = customer_ids[row]
+        if key in first_seen:
+            clashes[row] = f'same mobile number as row {first_seen[key] + 1}'
+            continue
+        holder = holders.get(key)
+        if holder is not None and holder != customer_id and stored.get(customer_id) != key:
+            clashes[row] = f'same mobile number as customer {holder}'
+        else:
+            first_seen[key] = row
+    return clashes
+
+
+def validate_file(filename, items, spec, known):
+    """
+    Check every column of ``items`` and return a FileResult with the clean
+    rows and the rejections. ``known`` maps reference names to keys already
+    accepted from earlier files and is extended with this file's.
+    """
+    rejections = []
+    errors = {}
+
+    def reject(row, column, value, error):
+        errors.setdefault(row, []).append(error)
+        rejections.append({'FILE': filename, 'ROW': row + 1, 'COLUMN': column, 'VALUE': value, 'ERROR': error})
+
+    rows = []
+    for row, item in enumerate(items):
+        if isinstance(item, dict):
+            rows.append(item)
+        else:
+            rows.append({})
+            reject(row, '', item, 'must be an object')
+
+    parsed = {}
+    for column in spec.columns:
+        raw = [item.get(column.name) for item in rows]
+        parsed[column.name], column_errors = column.check(raw)
+        for row, error in column_errors.items():
+            reject(row, column.name, raw[row], error)
+
+    if spec.open_date:
+        boundary = archive_boundary()
+        for row, value in enumerate(parsed[spec.open_date]):
+            if row not in errors and is_archived(value, boundary):
+                reject(row, spec.open_date, rows[row].get(spec.open_date), f'is before {boundary}; archived months are closed')
+
+    if spec.key:
+        first_seen = {}
+        for row, key in enumerate(zip(*(parsed[name] for name in spec.key))):
+            if row in errors:
+                continue
+            if key in first_seen:
+                value = ', '.join(str(rows[row].get(name)) for name in spec.key)
+                reject(row, ', '.join(spec.key), value, f'duplicate of row {first_seen[key] + 1}')
+            else:
+                first_seen[key] = row
+
+    if spec.mobile:
+        for row, error in _mobile_clashes(parsed[spec.mobile], parsed[spec.key[0]], errors).items():
+            reject(row, spec.mobile, rows[row].get(spec.mobile), error)
+
+    for name, reference in spec.references.items():
+        values = parsed[name]
+        candidates = {value for row, value in enumerate(values) if row not in errors and value}
+        missing = candidates - known.get(reference, set())
+        missing -= _existing(reference, missing)
+        for row, value in enumerate(values):
+            if row not in errors and value in missing:
+                reject(row, name, rows[row].get(name), f'no {reference} {value}')
+
+    clean = [item for row, item in enumerate(rows) if row not in errors]
+    if spec.provides:
+        key_column = parsed[spec.key[0]]
+        known.setdefault(spec.provides, set()).update(
+            value for row, value in enumerate(key_column) if row not in errors
+        )
+    rejections.sort(key=lambda rejection: rejection['ROW'])
+    return FileResult(rows=clean, rejections=rejections)
+
+
+def validate_files(data):
+    """Validate ``{filename: items}`` for every file in FILES; returns {filename: FileResult}."""
+    known = {}
+    return {
+        filename: validate_file(filename, data.get(filename, []), spec, known)
+        for filename, spec in FILES.items()
+    }
+
+
+def write_report(results, path):
+    """Write every rejection to a CSV file at ``path``; returns how many there were."""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        for result in results.values():
+            writer.writerows(result.rejections)
+            count += len(result.rejections)
+    return count
@@ -0,0 +1,84 @@
+"""
+Per-table change counters and the weak ETags list endpoints derive from them.
+
+Each tracked table has a TableVersion row that SQLite triggers bump on every
+insert, update and delete. A list's ETag hashes the request with the versions
+of the tables its rows are read from, so it changes exactly when one of them
+was written to.
+"""
+import hashlib
+
+from django.db import connections
+from django.utils.http import parse_etags
+
+from .models import TableVersion
+
+TRACKED_MODELS = ['Product', 'Stock', 'Supplier', 'PurchaseOrder', 'ItemEntry', 'Billing', 'ArchivedBilling', 'Employee', 'Customer', 'Pincode']
+OPERATIONS = ['INSERT', 'UPDATE', 'DELETE']
+
+
+def trigger_sql(table, operation, quote):
+    name = quote(f'tableversion_{table}_{operation.lower()}')
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON {quote(table)} "
+        f"BEGIN UPDATE {quote(TableVersion._meta.db_table)} SET {quote('VERSION')} = {quote('VERSION')} + 1 "
+        f"WHERE {quote('TABLENAME')} = '{table}'; END"
+    )
+
+
+def install_triggers(app_config, using='default', apps=None, **kwargs):
+    """
+    post_migrate receiver: make sure every tracked table has its counter row
+    and triggers. Runs after each migrate because SQLite drops a table's
+    triggers whenever a migration rebuilds it.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    existing = set(connection.introspection.table_names())
+    if TableVersion._meta.db_table not in existing:
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model_name in TRACKED_MODELS:
+            table = app_config.get_model(model_name)._meta.db_table
+            if table not in existing:
+                continue
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {quote(TableVersion._meta.db_table)} ({quote('TABLENAME')}, {quote('VERSION')}) "
+                "VALUES (%s, 0)",
+                [table],
+            )
+            for operation in OPERATIONS:
+                cursor.execute(trigger_sql(table, operation, quote))
+
+
+def table_versions(models, using='default'):
+    tables = [model._meta.db_table for model in models]
+    return dict(TableVersion.objects.using(using).filter(TABLE_NAME__in=tables).values_list('TABLE_NAME', 'VERSION'))
+
+
+def list_etag(request, models, using='default'):
+    """
+    Weak ETag for a list of ``models`` rows as rendered for ``request``, or
+    None when one of the tables has no counter (and so no reliable version).
+    """
+    if connections[using].vendor != 'sqlite':
+        return None
+    versions = table_versions(models, using)
+    if len(versions) < len(set(models)):
+        return None
+    key = '|'.join([
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', ''),
+        *(f'{table}={version}' for table, version in sorted(versions.items())),
+    ])
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    tags = parse_etags(if_none_match)
+    return '*' in tags or any(tag.removeprefix('W/') == etag.removeprefix('W/') for tag in tags)
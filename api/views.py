@@ -1,37 +1,198 @@
-from rest_framework import viewsets
+import heapq
+import os
+from collections import Counter
+from operator import attrgetter
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.db.models.functions import Coalesce
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date
+from django.utils.timezone import make_aware, now
+from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from .models import Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, Employee, Customer
-from .serializers import *
+from .models import Product, Stock, Supplier, PurchaseOrder, ItemEntry, Billing, ArchivedBilling, Employee, Customer, CustomerStats, Pincode, Job, normalize_mobile
+from .serializers import (
+    BillingSerializer, CustomerLookupSerializer, CustomerSerializer, CustomerStatsSerializer, EmployeeSerializer,
+    ItemEntrySerializer, JobSerializer, PayrollSerializer, PincodeSerializer, ProductSerializer,
+    PurchaseOrderSerializer, StockSerializer, SupplierSerializer,
+)
+from . import jobs, throttling
+from .archive import archive_boundary, billing_sources, is_archived
+from .batch import ingest_bills, max_batch_size
+from .idempotency import idempotent
+from .metrics import metrics_registry
+from .payroll import run_payroll
+from .registry import supplier_registry
+from .reports import billing_summary
+from .sync import changes_since
+from .versions import etag_matches, list_etag
 from rest_framework import status
 
-class ProductViewSet(viewsets.ModelViewSet):
+SYNC_MAX_LIMIT = 5000
+EXPORT_BLOCK_SIZE = 256 * 1024
+
+
+def date_range_params(request):
+    """Parse ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (either may be missing)."""
+    date_from = parse_date(request.query_params.get('date_from') or '')
+    date_to = parse_date(request.query_params.get('date_to') or '')
+    return date_from, date_to
+
+class ConditionalListMixin:
+    """
+    list() with a weak ETag built from the change counters of the view's
+    model and ``etag_models`` (the models its serializer reads fields from).
+    A matching If-None-Match gets a 304 before the queryset is evaluated.
+    """
+    etag_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs))
+
+    def conditional_response(self, request, respond):
+        """``respond()``, or a 304 when the client's copy is still current."""
+        queryset = self.get_queryset()
+        etag = list_etag(request, [queryset.model, *self.etag_models], using=queryset.db)
+        if etag is None:
+            return respond()
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = respond()
+        response['ETag'] = etag
+        # Let clients keep the body but revalidate it on every use
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+class ProductViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
 
-class StockViewSet(viewsets.ModelViewSet):
-    queryset = Stock.objects.all()
+class StockViewSet(ConditionalListMixin, viewsets.ModelViewSet):
+    queryset = Stock.objects.select_related('PRODUCT')
     serializer_class = StockSerializer
+    etag_models = (Product,)
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+class PurchaseOrderViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
 
-class ItemEntryViewSet(viewsets.ModelViewSet):
-    queryset = ItemEntry.objects.all()
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD -> range scan on the ORDER_DATETIME index
+        date_from, date_to = date_range_params(self.request)
+        # Compare against datetimes, not __date, so SQLite can use the index
+        if date_from:
+            queryset = queryset.filter(ORDER_DATETIME__gte=make_aware(datetime.combine(date_from, time.min)))
+        if date_to:
+            queryset = queryset.filter(ORDER_DATETIME__lt=make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+        if date_from or date_to:
+            queryset = queryset.order_by('ORDER_DATETIME')
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        # One supplier change-counter read for validation and the saves
+        with supplier_registry.pinned():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with supplier_registry.pinned():
+            return super().update(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        # Accept a list of orders in one POST and bulk-create them
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+class ItemEntryViewSet(ConditionalListMixin, viewsets.ModelViewSet):
+    queryset = ItemEntry.objects.select_related('ORDER')
     serializer_class = ItemEntrySerializer
+    etag_models = (PurchaseOrder,)
 
-class BillingViewSet(viewsets.ModelViewSet):
-    queryset = Billing.objects.all()
+class BillingViewSet(ConditionalListMixin, viewsets.ModelViewSet):
+    """
+    Bills of archived months (see api/archive.py) are still listed and
+    retrieved, but are read-only: only bills in Billing can be changed.
+    """
+    queryset = Billing.objects.select_related('PRODUCT', 'CUSTOMER', 'EMPLOYEE')
     serializer_class = BillingSerializer
+    etag_models = (ArchivedBilling, Product, Customer, Employee)
+    # The list is unpaginated: price it as a report
+    throttle_kinds = {'list': throttling.REPORT, 'batch': throttling.BATCH, 'summary': throttling.REPORT}
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        # ?date_from=&date_to= -> BILL_DATE range scans, on the archive only if the range reaches it
+        date_from, date_to = date_range_params(request)
+
+        def respond():
+            sources = [
+                source.select_related('PRODUCT', 'CUSTOMER', 'EMPLOYEE').order_by('BILL_NO')
+                for source in billing_sources(date_from, date_to)
+            ]
+            bills = heapq.merge(*sources, key=attrgetter('BILL_NO'))
+            return Response(self.get_serializer(bills, many=True).data)
+
+        return self.conditional_response(request, respond)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            bill = get_object_or_404(ArchivedBilling.objects.select_related('PRODUCT', 'CUSTOMER', 'EMPLOYEE'), pk=kwargs[self.lookup_field])
+            return Response(self.get_serializer(bill).data)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Upload bills queued offline by a terminal: {"TERMINAL": "till-1",
+        "BILLS": [{CLIENT_ID, CLIENT_TIMESTAMP, PRODUCT, QUANTITY, PRICE,
+        BILL_DATE, CUSTOMER, EMPLOYEE}, ...]}. CLIENT_ID only has to be
+        unique per TERMINAL. Returns one outcome per bill; safe to resend.
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        terminal = data.get('TERMINAL')
+        if not isinstance(terminal, str) or not terminal.strip() or len(terminal) > 50:
+            return Response({"detail": "TERMINAL must name the uploading till (at most 50 characters)."}, status=status.HTTP_400_BAD_REQUEST)
+        bills = data.get('BILLS')
+        if not isinstance(bills, list):
+            return Response({"detail": "Expected a list of bills in BILLS."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(bills) > max_batch_size():
+            return Response(
+                {"detail": f"At most {max_batch_size()} bills per batch."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        results = ingest_bills(terminal.strip(), bills)
+        summary = Counter(result['STATUS'] for result in results)
+        return Response({'SUMMARY': summary, 'RESULTS': results})
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Sales totals for ?date_from=&date_to=; archived months come from their rollups."""
+        date_from, date_to = date_range_params(request)
+        return Response(billing_summary(date_from, date_to))
+
+class EmployeeViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    throttle_kinds = {'payroll': throttling.REPORT}
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -48,10 +209,193 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
         return Response(serializer.data)
 
-class CustomerViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def payroll(self, request):
+        """
+        Recompute INCENTIVE/NET_PAY for all employees from their sales.
+
+        Body: {"month": "YYYY-MM"} or {"date_from": ..., "date_to": ...},
+        plus optional "rate" and "dry_run". Staff only.
+        """
+        params = PayrollSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        date_from, date_to = params.validated_data['date_from'], params.validated_data['date_to']
+        rows = run_payroll(
+            date_from, date_to,
+            rate=params.validated_data.get('rate'),
+            commit=not params.validated_data['dry_run'],
+        )
+        return Response({'DATE_FROM': date_from, 'DATE_TO': date_to, 'EMPLOYEES': rows})
+
+def save_customer_by_mobile(key, data):
+    """Create the customer with MOBILE_KEY ``key`` or update the given fields of theirs; True if created."""
+    instance = Customer.objects.filter(MOBILE_KEY=key).first()
+    serializer = CustomerSerializer(instance, data=data, partial=instance is not None)
+    serializer.is_valid(raise_exception=True)
+    try:
+        with transaction.atomic():
+            serializer.save()
+    except IntegrityError:
+        # Another till created them since the read above; update theirs instead
+        instance = Customer.objects.filter(MOBILE_KEY=key).first()
+        if instance is None:
+            raise
+        serializer = CustomerSerializer(instance, data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    return instance is None
+
+class CustomerViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
 
-class PincodeViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get', 'post'])
+    def lookup(self, request):
+        """
+        GET ?mobile=<number>[&days=90] finds a customer by phone number.
+        POST {MOBILE_NO, ...} does the same but creates the customer, or
+        updates the given fields, first.
+
+        The customer comes back with their billing summary for the last
+        ``days`` days, read in one query through the MOBILE_KEY unique index
+        (and one more on the archive when the window reaches archived months).
+        """
+        if request.method == 'POST':
+            mobile = request.data.get('MOBILE_NO')
+        else:
+            mobile = request.query_params.get('mobile')
+        key = normalize_mobile(mobile)
+        if key is None:
+            return Response({"detail": "A valid mobile number is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            days = int(request.query_params.get('days', 90))
+        except ValueError:
+            days = 90
+
+        created = request.method == 'POST' and save_customer_by_mobile(key, request.data)
+
+        since = now().date() - timedelta(days=days)
+        recent = Q(billing__BILL_DATE__gte=since)
+        customer = Customer.objects.filter(MOBILE_KEY=key).annotate(
+            RECENT_VISITS=Count('billing__BILL_DATE', filter=recent, distinct=True),
+            RECENT_LINES=Count('billing', filter=recent),
+            RECENT_SPEND=Coalesce(Sum('billing__TOTAL_PRICE', filter=recent), Value(Decimal('0.00'))),
+            # Hot bills are the newest; with none, the last visit is in the archive
+            LAST_VISIT=Coalesce(Max('billing__BILL_DATE'), F('STATS__LAST_VISIT')),
+        ).first()
+        if customer is None:
+            return Response({"detail": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if is_archived(since, archive_boundary()):
+            # A window reaching into archived months; the tables hold disjoint dates, so the counts add up
+            archived = ArchivedBilling.objects.filter(CUSTOMER=customer, BILL_DATE__gte=since).aggregate(
+                VISITS=Count('BILL_DATE', distinct=True),
+                LINES=Count('BILL_NO'),
+                SPEND=Coalesce(Sum('TOTAL_PRICE'), Value(Decimal('0.00'))),
+            )
+            customer.RECENT_VISITS += archived['VISITS']
+            customer.RECENT_LINES += archived['LINES']
+            customer.RECENT_SPEND += archived['SPEND']
+
+        return Response(
+            CustomerLookupSerializer(customer).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=['get'])
+    def loyalty(self, request, pk=None):
+        """Lifetime spend, visits, last visit and top categories, read from CustomerStats."""
+        stats = CustomerStats.objects.filter(CUSTOMER_id=pk).first()
+        if stats is None:
+            # No bills yet; only now is it worth checking the customer exists
+            customer = self.get_object()
+            stats = CustomerStats(CUSTOMER=customer)
+        return Response(CustomerStatsSerializer(stats).data)
+
+class PincodeViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = Pincode.objects.all()
-    serializer_class = PincodeSerializer
\ No newline at end of file
+    serializer_class = PincodeSerializer
+
+
+def metrics_allowed(request):
+    """Staff sessions, or the METRICS_TOKEN bearer token when one is configured."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and constant_time_compare(credentials.strip(), token)
+
+
+def metrics(request):
+    """Per-endpoint request metrics in the Prometheus text format."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden("Metrics are restricted to staff and the metrics token.\n", content_type="text/plain")
+    return HttpResponse(
+        metrics_registry.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """
+    GET /api/sync/?since=<SEQ>&limit=<n> returns the products, stock rows,
+    customers and pincodes changed or deleted after SEQ. Start with since=0
+    and keep passing back the returned SEQ while HAS_MORE is true.
+    """
+    # Tills sync their catalogue; charge it to their budget, not to reports
+    throttle_kinds = {'list': throttling.BATCH}
+
+    def list(self, request):
+        try:
+            since = max(0, int(request.query_params.get('since', 0)))
+            limit = min(SYNC_MAX_LIMIT, max(1, int(request.query_params.get('limit', SYNC_MAX_LIMIT))))
+        except ValueError:
+            return Response({"detail": "since and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes_since(since, limit))
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    POST {"TASK": ..., "PARAMS": {...}} queues a background job and returns
+    202 with its JOB_ID; GET /api/jobs/<id>/ reports STATUS and PROGRESS.
+    Tasks in jobs.ADMIN_ONLY can only be queued by staff.
+    """
+    queryset = Job.objects.order_by('-JOB_ID')
+    serializer_class = JobSerializer
+    # Polling a job's status stays a cheap read
+    throttle_kinds = {'create': throttling.EXPORT, 'download': throttling.EXPORT}
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task_name = serializer.validated_data['TASK']
+        params = serializer.validated_data.get('PARAMS') or {}
+        if task_name in jobs.ADMIN_ONLY and not IsAdminUser().has_permission(request, self):
+            self.permission_denied(request, message=f"Only staff can queue {task_name} jobs.")
+        error = jobs.validate_params(task_name, params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        job = jobs.enqueue(task_name, params)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        if jobs.runs_in_process() and jobs.resume_stale(job):
+            job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The file written by a finished export job."""
+        job = self.get_object()
+        if job.TASK != 'export' or job.STATUS != Job.SUCCEEDED:
+            return Response({"detail": "Only finished export jobs have a file."}, status=status.HTTP_404_NOT_FOUND)
+        path = jobs.export_path(job.JOB_ID)
+        if not os.path.exists(path):
+            return Response({"detail": "Export file has been removed."}, status=status.HTTP_410_GONE)
+        response = FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path), content_type='application/json')
+        # The compression middleware flushes once per chunk; FileResponse's
+        # default 4 KB blocks would compress poorly
+        response.block_size = EXPORT_BLOCK_SIZE
+        return response
@@ -0,0 +1,21 @@
+"""
+Reproducible performance benchmarks for the AMR supermarket API.
+
+    python -m benchmarks.run --scale 0.01 --output bench.json
+    python -m benchmarks.run --scale 0.01 --baseline bench.json
+
+The run creates a throwaway test database, seeds it with
+benchmarks.dataset, times the key operations and writes the results as
+JSON. With --baseline it exits non-zero when an operation's median got
+slower than the allowed regression.
+
+    python -m benchmarks.startup --output startup.json --importtime importtime.txt
+
+times cold starts of the settings, django.setup() and the WSGI app the same
+way, and writes a -X importtime report.
+
+    python -m benchmarks.loadtest --db bench.sqlite3
+
+load-tests gunicorn.conf.py against gunicorn's defaults on a database left
+by `benchmarks.run --db bench.sqlite3 --keepdb`.
+"""
@@ -0,0 +1,22 @@
+import json
+
+
+def compare(results, baseline_path, max_regression):
+    """Regressions of ``results`` against a previous run's JSON output, as messages."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    failures = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = previous["median"] * (1 + max_regression)
+        if result["median"] > limit:
+            failures.append(
+                f"{name}: median {result['median'] * 1000:.1f} ms > "
+                f"{previous['median'] * 1000:.1f} ms baseline (+{max_regression:.0%} allowed)"
+            )
+        if result.get("queries", 0) > previous.get("queries", 0):
+            failures.append(f"{name}: {result['queries']} queries > {previous['queries']} in baseline")
+    return failures
@@ -0,0 +1,211 @@
+import json
+import os
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.loyalty import rebuild_customer_stats
+from api.sync import SYNC_MODELS, record_changes
+from api.models import (
+    Billing, Customer, Employee, ItemEntry, Pincode, Product, PurchaseOrder, Stock, Supplier,
+)
+
+# Row counts at --scale 1.0
+FULL_VOLUMES = {
+    "suppliers": 10_000,
+    "products": 200_000,
+    "customers": 100_000,
+    "employees": 500,
+    "purchase_orders": 100_000,
+    "item_entries": 100_000,
+    "billing": 5_000_000,
+}
+
+CATEGORIES = [
+    "GROCERIES", "FROZEN", "SNACKS", "BEVERAGES", "DAIRY", "HOUSEHOLDS",
+    "PERSONAL CARE", "BAKERY", "FRUITS", "VEGETABLES",
+]
+BRANDS = ["SPICE ISLAND", "AMUL", "NESTLE", "BRITANNIA", "ITC", "DABUR", "HUL", "PARLE", "MTR", "TATA"]
+NAMES = ["ARUN", "DIVYA", "KUMAR", "LAKSHMI", "PRIYA", "RAVI", "SARANYA", "SURESH", "VIJAY", "YAMUNA"]
+DESIGNATIONS = ["sales", "cashier", "manager", "stock keeper", "STAFF"]
+
+BATCH_SIZE = 5000
+BILLING_START = date(2019, 1, 1)
+BILLING_DAYS = 5 * 365
+
+
+def volumes(scale):
+    return {name: max(1, int(count * scale)) for name, count in FULL_VOLUMES.items()}
+
+
+def _money(rng, low, high):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def _bulk(model, rows):
+    """bulk_create a generator of unsaved instances in BATCH_SIZE chunks."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def load_pincodes():
+    path = os.path.join(settings.BASE_DIR, "data", "PINCODES.json")
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    Pincode.objects.bulk_create(
+        [Pincode(PINCODE=int(item["PINCODE"]), CITY=item.get("CITY", "")) for item in items],
+        ignore_conflicts=True,
+    )
+    return list(Pincode.objects.values_list("PINCODE", "CITY"))
+
+
+def seed(scale=1.0, seed=42, log=print):
+    """
+    Seed every model in api.models with synthetic data.
+
+    Volumes are FULL_VOLUMES multiplied by ``scale``; the same ``seed`` always
+    produces the same rows. Returns the row counts that were generated.
+    """
+    rng = random.Random(seed)
+    counts = volumes(scale)
+
+    with transaction.atomic():
+        pincodes = load_pincodes()
+        log(f"pincodes: {len(pincodes)}")
+
+        _bulk(Supplier, (
+            Supplier(
+                NAME=f"{rng.choice(NAMES)} {i}",
+                COMPANY_NAME=f"{rng.choice(NAMES)} TRADERS {i}",
+                MOBILE_NO=str(rng.randint(6_000_000_000, 9_999_999_999)),
+                EMAIL_ID=f"supplier{i}@example.com",
+                CATEGORY=rng.choice(CATEGORIES),
+            )
+            for i in range(counts["suppliers"])
+        ))
+        supplier_ids = list(Supplier.objects.values_list("SUPPLIER_ID", flat=True))
+        log(f"suppliers: {counts['suppliers']}")
+
+        _bulk(Product, (
+            Product(
+                CATEGORY=rng.choice(CATEGORIES),
+                PRODUCT_NAME=f"PRODUCT {i}",
+                BRAND_NAME=rng.choice(BRANDS),
+                STOCK=rng.randint(0, 5000),
+                MRP=_money(rng, 5, 2000),
+            )
+            for i in range(counts["products"])
+        ))
+        products = list(Product.objects.values_list("id", "CATEGORY", "MRP", "STOCK"))
+        _bulk(Stock, (Stock(PRODUCT_id=pid, STOCK=stock) for pid, _, _, stock in products))
+        log(f"products + stock: {counts['products']}")
+
+        _bulk(Customer, (
+            Customer(
+                NAME=f"{rng.choice(NAMES).title()} {i}",
+                # bulk_create skips Customer.save(), so set the unique lookup key here
+                MOBILE_NO=str(9_000_000_000 + i),
+                MOBILE_KEY=str(9_000_000_000 + i),
+                ADDRESS=f"No {rng.randint(1, 200)} {rng.randint(1, 20)}th street",
+                CITY="Chennai",
+                TOWN=town,
+                PINCODE=pincode,
+            )
+            for i, (pincode, town) in ((i, rng.choice(pincodes)) for i in range(counts["customers"]))
+        ))
+        customer_ids = list(Customer.objects.values_list("CUSTOMER_ID", flat=True))
+        log(f"customers: {counts['customers']}")
+
+        _bulk(Employee, (
+            Employee(
+                NAME=f"{rng.choice(NAMES)} {i}",
+                MOBILE_NO=str(rng.randint(6_000_000_000, 9_999_999_999)),
+                AGE=rng.randint(19, 60),
+                DOJ=BILLING_START - timedelta(days=rng.randint(0, 3000)),
+                GENDER=rng.choice(["male", "female"]),
+                EMAIL_ID=f"employee{i}@example.com",
+                DESIGNATION=rng.choice(DESIGNATIONS),
+                BASIC_PAY=_money(rng, 8000, 30000),
+            )
+            for i in range(counts["employees"])
+        ))
+        employee_ids = list(Employee.objects.values_list("EMPLOYEE_ID", flat=True))
+        log(f"employees: {counts['employees']}")
+
+        def purchase_orders():
+            for _ in range(counts["purchase_orders"]):
+                pid, category, mrp, _ = rng.choice(products)
+                quantity = rng.randint(1, 500)
+                price = (mrp * Decimal("0.8")).quantize(Decimal("0.01"))
+                ordered = datetime.combine(
+                    BILLING_START + timedelta(days=rng.randrange(BILLING_DAYS)),
+                    time(rng.randint(8, 21), rng.randint(0, 59)),
+                )
+                yield PurchaseOrder(
+                    SUPPLIER_id=rng.choice(supplier_ids),
+                    CATEGORY=category,
+                    PRODUCTNAME=f"PRODUCT {pid}",
+                    PRICE=price,
+                    QUANTITY_REQUIRED=quantity,
+                    TOTAL_PRICE=price * quantity,
+                    DATE=ordered.strftime("%d-%m-%Y 00:00:00"),
+                    TIME=ordered.strftime("30-12-1899 %H:%M:%S"),
+                    ORDER_DATETIME=timezone.make_aware(ordered),
+                    PENDING_QUANTITY=rng.randint(0, quantity),
+                )
+
+        _bulk(PurchaseOrder, purchase_orders())
+        orders = list(PurchaseOrder.objects.values_list("ORDERID", "SUPPLIER_id", "PRODUCTNAME", "CATEGORY", "QUANTITY_REQUIRED"))
+        log(f"purchase orders: {counts['purchase_orders']}")
+
+        def item_entries():
+            for _ in range(counts["item_entries"]):
+                oid, sid, name, category, ordered_qty = rng.choice(orders)
+                received = rng.randint(0, ordered_qty)
+                yield ItemEntry(
+                    ORDER_id=oid,
+                    SUPPLIER_ID=sid or 0,
+                    PRODUCTNAME=name,
+                    CATEGORY=category,
+                    RECEIVED_QUANTITY=received,
+                    RECEIVED_DATE=BILLING_START + timedelta(days=rng.randrange(BILLING_DAYS)),
+                    ORDERED_QUANTITY=ordered_qty,
+                    PENDING_QUANTITY=ordered_qty - received,
+                )
+
+        _bulk(ItemEntry, item_entries())
+        log(f"item entries: {counts['item_entries']}")
+
+        def billing():
+            for _ in range(counts["billing"]):
+                pid, category, mrp, _ = rng.choice(products)
+                yield Billing(
+                    PRODUCT_id=pid,
+                    CUSTOMER_id=rng.choice(customer_ids) if rng.random() < 0.7 else None,
+                    EMPLOYEE_id=rng.choice(employee_ids),
+                    CATEGORY=category,
+                    QUANTITY=rng.randint(1, 6),
+                    PRICE=mrp,
+                    BILL_DATE=BILLING_START + timedelta(days=rng.randrange(BILLING_DAYS)),
+                )
+
+        _bulk(Billing, billing())
+        log(f"billing lines: {counts['billing']}")
+
+        # bulk_create bypasses the signals that maintain the loyalty aggregates and change log
+        rebuild_customer_stats()
+        for label, (model, _, key_field) in SYNC_MODELS.items():
+            record_changes(label, model.objects.values_list(key_field, flat=True))
+        log("customer stats and change log rebuilt")
+
+    return counts
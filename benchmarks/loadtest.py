@@ -0,0 +1,180 @@
+"""
+Local load test of the gunicorn configuration: starts gunicorn with the
+checked-in gunicorn.conf.py and with gunicorn's defaults, drives both with
+the same concurrent keep-alive clients and reports throughput and latency.
+
+    python -m benchmarks.run --scale 0.01 --db bench.sqlite3 --keepdb
+    python -m benchmarks.loadtest --db bench.sqlite3 --output loadtest.json
+
+The first command leaves a seeded database behind for the servers to use.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGS = {
+    "repo": os.path.join(ROOT, "gunicorn.conf.py"),
+    "default": os.devnull,
+}
+PATHS = [
+    "/api/product/1/",
+    "/api/customer/1/loyalty/",
+    "/api/billing/summary/?date_from=2019-01-01&date_to=2019-01-31",
+    "/api/sync/?since=0&limit=200",
+    "/api/supplier/",
+]
+
+
+def start_server(config, db, port):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE="AMRSUPERMARKETBACKEND.settings",
+        DJANGO_DB_NAME=os.path.abspath(db),
+        DJANGO_ALLOWED_HOSTS="127.0.0.1",
+        GUNICORN_ACCESS_LOG="",
+        # Every client connects from 127.0.0.1; don't let the budgets throttle the test
+        API_TILL_BUDGET="",
+        API_REPORTS_BUDGET="",
+    )
+    command = [
+        sys.executable, "-m", "gunicorn", "AMRSUPERMARKETBACKEND.wsgi",
+        "--config", config, "--bind", f"127.0.0.1:{port}",
+    ]
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while True:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", PATHS[0])
+            connection.getresponse().read()
+            return proc, time.perf_counter() - start
+        except OSError:
+            if proc.poll() is not None or time.perf_counter() - start > 30:
+                proc.kill()
+                raise RuntimeError(f"gunicorn did not start with {config}")
+            time.sleep(0.05)
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def get(connection, path):
+    connection.request("GET", path)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def client(port, paths, deadline, latencies, errors, offset):
+    # One connection per client, reused while the server keeps it alive;
+    # http.client reconnects by itself after a "Connection: close"
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            try:
+                status = get(connection, path)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The kept-alive connection was closed by a recycled worker
+                # (max_requests); retry once on a new one, as HTTP clients do
+                connection.close()
+                status = get(connection, path)
+            ok = status < 500
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(path)
+
+
+def load(port, paths, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, paths, deadline, latencies, errors, n))
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / duration,
+        "median": statistics.median(latencies),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare gunicorn.conf.py against gunicorn's defaults under load.")
+    parser.add_argument("--db", required=True, help="seeded SQLite file (see python -m benchmarks.run --db ... --keepdb)")
+    parser.add_argument("--configs", nargs="*", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load per configuration")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--max-error-rate", type=float, default=0.001, help="fail above this share of failed requests")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.configs:
+        proc, boot = start_server(CONFIGS[name], args.db, args.port)
+        try:
+            # Warm every worker before measuring
+            load(args.port, PATHS, args.concurrency, 2)
+            result = load(args.port, PATHS, args.concurrency, args.duration)
+        finally:
+            stop_server(proc)
+        results[f"gunicorn:{name}"] = {"boot": boot, **result}
+        print(
+            f"gunicorn:{name:<8} {result['rps']:8.1f} req/s  median {result['median'] * 1000:7.1f} ms"
+            f"  p95 {result['p95'] * 1000:7.1f} ms  p99 {result['p99'] * 1000:7.1f} ms"
+            f"  errors {result['errors']}  boot {boot:.2f} s"
+        )
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "cores": os.cpu_count(),
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    failed = [name for name, result in results.items() if result["errors"] > result["requests"] * args.max_error_rate]
+    for name in failed:
+        print(f"ERRORS {name}: {results[name]['errors']} of {results[name]['requests']} requests failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMRSUPERMARKETBACKEND.settings")
+# Measure the endpoints, not the request budgets of a single client
+os.environ.setdefault("API_TILL_BUDGET", "")
+os.environ.setdefault("API_REPORTS_BUDGET", "")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+import import_data  # noqa: E402
+from api.middleware import QueryRecorder  # noqa: E402
+from api.models import Customer, Employee, Product  # noqa: E402
+from benchmarks import dataset  # noqa: E402
+from benchmarks.baseline import compare  # noqa: E402
+
+LIST_ENDPOINTS = [
+    "product", "stock", "supplier", "purchaseorder", "itementry",
+    "billing", "employee", "customer", "pincode",
+]
+BASKET_SIZE = 5
+
+
+class Benchmark:
+    def __init__(self, repeat, only=None):
+        self.repeat = repeat
+        self.only = only
+        self.results = {}
+
+    def measure(self, name, fn, repeat=None):
+        if self.only and not any(pattern in name for pattern in self.only):
+            return
+        samples, queries = [], []
+        for _ in range(repeat or self.repeat):
+            recorder = QueryRecorder(keep_sql=False)
+            with connection.execute_wrapper(recorder):
+                start = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - start)
+            queries.append(recorder.count)
+        self.results[name] = {
+            "runs": len(samples),
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "max": max(samples),
+            "queries": max(queries),
+        }
+        print(f"{name:<32} median {self.results[name]['median'] * 1000:10.1f} ms  queries {max(queries)}")
+
+
+def run_import_data():
+    import_data.run(out=io.StringIO())
+
+
+def run_operations(bench, rng):
+    client = Client()
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+
+    for endpoint in LIST_ENDPOINTS:
+        bench.measure(f"list:{endpoint}", lambda endpoint=endpoint: get(f"/api/{endpoint}/"))
+
+    # A client revalidating its cached catalog while nothing changed
+    etag = client.get("/api/product/")["ETag"]
+
+    def revalidate():
+        response = client.get("/api/product/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, response.status_code
+
+    bench.measure("list:product-not-modified", revalidate)
+
+    bench.measure("sync:first-page", lambda: get("/api/sync/?since=0"))
+    bench.measure("report:billing-summary", lambda: get("/api/billing/summary/"))
+    bench.measure(
+        "report:billing-summary-month",
+        lambda: get("/api/billing/summary/?date_from=2020-06-01&date_to=2020-06-30"),
+    )
+
+    product_ids = list(Product.objects.filter(STOCK__gte=100).values_list("id", flat=True)[:1000])
+    customer_ids = list(Customer.objects.values_list("CUSTOMER_ID", flat=True)[:1000])
+    employee_ids = list(Employee.objects.values_list("EMPLOYEE_ID", flat=True)[:100])
+
+    def bill_line():
+        return {
+            "PRODUCT": rng.choice(product_ids),
+            "QUANTITY": 1,
+            "PRICE": 10,
+            "BILL_DATE": datetime.now().date().isoformat(),
+            "CUSTOMER": rng.choice(customer_ids),
+            "EMPLOYEE": rng.choice(employee_ids),
+        }
+
+    def create_bill():
+        response = client.post("/api/billing/", bill_line(), content_type="application/json")
+        assert response.status_code == 201, response.content
+
+    def checkout():
+        # There is no basket endpoint: a checkout is one billing POST per line
+        for _ in range(BASKET_SIZE):
+            create_bill()
+
+    bench.measure("write:create-bill", create_bill)
+    bench.measure("write:checkout-basket", checkout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset and time the key API operations.")
+    parser.add_argument("--scale", type=float, default=0.01, help="fraction of the full dataset (1.0 = 5M billing lines)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="only run operations whose name contains one of these")
+    parser.add_argument("--db", help="SQLite file for the benchmark database (default: in memory)")
+    parser.add_argument("--keepdb", action="store_true", help="reuse an already seeded --db file")
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--baseline", help="previous JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    setup_test_environment()
+    if args.db:
+        connection.settings_dict["TEST"]["NAME"] = args.db
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+
+    bench = Benchmark(args.repeat, args.only)
+    counts = None
+    if not Product.objects.exists():
+        # import_data.py is timed once on the empty database, then the synthetic rows go on top
+        bench.measure("import:import_data", run_import_data, repeat=1)
+        start = time.perf_counter()
+        counts = dataset.seed(args.scale, args.seed)
+        print(f"seeded in {time.perf_counter() - start:.1f} s")
+
+    run_operations(bench, random.Random(args.seed))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "volumes": counts or dataset.volumes(args.scale),
+        },
+        "results": bench.results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.keepdb:
+        connection.creation.destroy_test_db(connection.settings_dict["NAME"], verbosity=0)
+
+    if args.baseline:
+        failures = compare(bench.results, args.baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to get each stage
+of the project ready, measured in subprocesses so nothing is cached.
+
+    python -m benchmarks.startup --output startup.json --importtime importtime.txt
+    python -m benchmarks.startup --baseline startup.json
+
+Besides timing, each stage lists modules it must not import (e.g. DRF during
+django.setup(), which every manage.py command pays for); pulling one in
+fails the run just like a timing regression.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.baseline import compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (code run in a fresh interpreter, modules it must not import)
+STAGES = {
+    "startup:python": ("pass", []),
+    "startup:settings": ("import AMRSUPERMARKETBACKEND.settings", ["django.db.models"]),
+    "startup:django-setup": ("import django; django.setup()", ["rest_framework.serializers", "api.serializers"]),
+    "startup:wsgi": ("import AMRSUPERMARKETBACKEND.wsgi", []),
+}
+REPORT_STAGE = "startup:wsgi"
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(elapsed, *[name for name in {forbidden!r} if name in sys.modules])
+"""
+
+
+def run_stage(code, forbidden, importtime=False):
+    """Run ``code`` in a new interpreter; returns (wall seconds, in-process seconds, forbidden modules loaded, stderr)."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="AMRSUPERMARKETBACKEND.settings")
+    command = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    command += ["-c", PROBE.format(code=code, forbidden=forbidden)]
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    elapsed, *loaded = proc.stdout.split()
+    return wall, float(elapsed), loaded, proc.stderr
+
+
+def importtime_report(stderr, top):
+    """The ``top`` slowest imports by cumulative time, and the total per top-level package."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:  # the header line
+            continue
+        rows.append((fields[2].strip(), self_us, cumulative_us))
+
+    packages = {}
+    for module, self_us, _ in rows:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    lines = [f"{'cumulative ms':>14}  {'self ms':>8}  module"]
+    for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"{cumulative_us / 1000:14.1f}  {self_us / 1000:8.1f}  {module}")
+    lines += ["", f"{'self ms':>14}  package"]
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"{self_us / 1000:14.1f}  {package}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cold starts of settings, django.setup() and the WSGI app.")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON results here")
+    parser.add_argument("--baseline", help="previous JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--importtime", help=f"write a -X importtime report for {REPORT_STAGE} here")
+    parser.add_argument("--top", type=int, default=30, help="rows in the importtime report")
+    args = parser.parse_args(argv)
+
+    results, failures = {}, []
+    for name, (code, forbidden) in STAGES.items():
+        walls, samples = [], []
+        for _ in range(args.repeat):
+            wall, elapsed, loaded, _ = run_stage(code, forbidden)
+            walls.append(wall)
+            samples.append(elapsed)
+        if loaded:
+            failures.append(f"{name}: imports {', '.join(loaded)}")
+        results[name] = {
+            "runs": len(samples),
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "max": max(samples),
+            "wall_median": statistics.median(walls),
+        }
+        print(
+            f"{name:<24} median {results[name]['median'] * 1000:8.1f} ms"
+            f"  (process wall {results[name]['wall_median'] * 1000:.1f} ms)"
+        )
+
+    if args.importtime:
+        *_, stderr = run_stage(STAGES[REPORT_STAGE][0], [], importtime=True)
+        with open(args.importtime, "w", encoding="utf-8") as f:
+            f.write(importtime_report(stderr, args.top))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        failures += compare(results, args.baseline, args.max_regression)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import os
+import runpy
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from benchmarks.loadtest import ROOT
+
+GUNICORN_CONF = os.path.join(ROOT, "gunicorn.conf.py")
+SETTINGS = os.path.join(ROOT, "AMRSUPERMARKETBACKEND", "settings.py")
+
+
+def load(path, cores=8, **env):
+    """Evaluate a config module with ``env`` as the only GUNICORN_*/DJANGO_* variables."""
+    environ = {
+        name: value for name, value in os.environ.items()
+        if not name.startswith(("GUNICORN_", "DJANGO_")) and name not in ("WEB_CONCURRENCY", "PORT")
+    }
+    environ.update(env)
+    with mock.patch.dict(os.environ, environ, clear=True), \
+            mock.patch("os.sched_getaffinity", return_value=set(range(cores)), create=True):
+        return runpy.run_path(path)
+
+
+class GunicornConfTests(SimpleTestCase):
+    def test_defaults(self):
+        conf = load(GUNICORN_CONF, cores=1)
+        self.assertEqual(conf["workers"], 2)
+        self.assertEqual((conf["worker_class"], conf["threads"]), ("gthread", 2))
+        self.assertEqual(conf["bind"], "0.0.0.0:8000")
+        self.assertTrue(conf["preload_app"])
+
+    def test_workers_capped(self):
+        self.assertEqual(load(GUNICORN_CONF, cores=16)["workers"], 4)
+        self.assertEqual(load(GUNICORN_CONF, cores=16, GUNICORN_MAX_WORKERS="8")["workers"], 8)
+
+    def test_environment_overrides(self):
+        conf = load(
+            GUNICORN_CONF, WEB_CONCURRENCY="3", PORT="9000", GUNICORN_TIMEOUT="30",
+            GUNICORN_ACCESS_LOG="", GUNICORN_PRELOAD="False",
+        )
+        self.assertEqual((conf["workers"], conf["bind"], conf["timeout"]), (3, "0.0.0.0:9000", 30))
+        self.assertIsNone(conf["accesslog"])
+        self.assertFalse(conf["preload_app"])
+
+    def test_post_fork_closes_inherited_connections(self):
+        conf = load(GUNICORN_CONF)
+        server = mock.Mock()
+        with mock.patch("django.db.connections.close_all") as close_all:
+            server.cfg.preload_app = True
+            conf["post_fork"](server, None)
+            server.cfg.preload_app = False
+            conf["post_fork"](server, None)
+        close_all.assert_called_once_with()
+
+
+class SettingsEnvironmentTests(SimpleTestCase):
+    def test_allowed_hosts_and_database(self):
+        settings = load(SETTINGS, DJANGO_ALLOWED_HOSTS="a.example.com,127.0.0.1", DJANGO_DB_NAME="/tmp/bench.sqlite3")
+        self.assertEqual(settings["ALLOWED_HOSTS"], ["a.example.com", "127.0.0.1"])
+        self.assertEqual(settings["DATABASES"]["default"]["NAME"], "/tmp/bench.sqlite3")
+
+    def test_defaults(self):
+        settings = load(SETTINGS)
+        self.assertEqual(settings["ALLOWED_HOSTS"], ["amrsupermarketbackend.onrender.com"])
+        self.assertEqual(settings["DATABASES"]["default"]["NAME"], settings["BASE_DIR"] / "db.sqlite3")
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from django.db import transaction
+from django.test import TestCase
+
+from api.models import Billing, Customer, CustomerStats, Product, Stock, Supplier
+from benchmarks import dataset
+from benchmarks.baseline import compare
+from benchmarks.run import Benchmark
+
+SCALE = 0.0001
+
+
+def result(median, queries=1):
+    return {"runs": 3, "min": median, "median": median, "max": median, "queries": queries}
+
+
+class DatasetTests(TestCase):
+    def test_volumes_scale_with_a_floor_of_one(self):
+        counts = dataset.volumes(SCALE)
+        self.assertEqual(counts["billing"], 500)
+        self.assertEqual(counts["employees"], 1)
+
+    def test_seed_creates_the_volumes(self):
+        counts = dataset.seed(SCALE, log=lambda message: None)
+        self.assertEqual(Supplier.objects.count(), counts["suppliers"])
+        self.assertEqual(Product.objects.count(), counts["products"])
+        self.assertEqual(Stock.objects.count(), counts["products"])
+        self.assertEqual(Customer.objects.count(), counts["customers"])
+        self.assertEqual(Billing.objects.count(), counts["billing"])
+        # bulk_create skips the signals; seed() rebuilds the aggregates itself
+        self.assertTrue(CustomerStats.objects.exists())
+
+    def test_same_seed_same_rows(self):
+        def rows():
+            with transaction.atomic():
+                dataset.seed(SCALE, seed=7, log=lambda message: None)
+                seeded = list(Billing.objects.order_by("BILL_NO").values_list("QUANTITY", "PRICE", "BILL_DATE"))
+                transaction.set_rollback(True)
+            return seeded
+
+        self.assertEqual(rows(), rows())
+
+
+class BenchmarkTests(TestCase):
+    def test_measure_records_runs_and_queries(self):
+        bench = Benchmark(repeat=3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bench.measure("count:product", lambda: Product.objects.count())
+        self.assertEqual(bench.results["count:product"]["runs"], 3)
+        self.assertEqual(bench.results["count:product"]["queries"], 1)
+
+    def test_only_filters_operations(self):
+        bench = Benchmark(repeat=1, only=["list:"])
+        bench.measure("write:create-bill", lambda: None)
+        self.assertEqual(bench.results, {})
+
+
+class CompareTests(TestCase):
+    def compare(self, results, baseline, max_regression=0.25):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"results": baseline}, f)
+            return compare(results, path, max_regression)
+
+    def test_within_allowed_regression(self):
+        self.assertEqual(self.compare({"list:product": result(0.012)}, {"list:product": result(0.010)}), [])
+
+    def test_slower_median_fails(self):
+        failures = self.compare({"list:product": result(0.013)}, {"list:product": result(0.010)})
+        self.assertEqual(len(failures), 1)
+        self.assertIn("list:product: median 13.0 ms", failures[0])
+
+    def test_more_queries_fails(self):
+        failures = self.compare({"list:stock": result(0.010, queries=3)}, {"list:stock": result(0.010, queries=2)})
+        self.assertEqual(failures, ["list:stock: 3 queries > 2 in baseline"])
+
+    def test_new_operation_is_not_compared(self):
+        self.assertEqual(self.compare({"write:create-bill": result(1.0)}, {}), [])
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from benchmarks.startup import STAGES, importtime_report, run_stage
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:      2000 |       5000 |     django.utils
+import time:      3000 |       8000 |   django
+import time:       500 |        500 | rest_framework
+"""
+
+
+class ImporttimeReportTests(SimpleTestCase):
+    def test_slowest_modules_and_package_totals(self):
+        lines = importtime_report(IMPORTTIME, top=2).splitlines()
+        self.assertEqual([line.split()[-1] for line in lines[1:3]], ["django", "django.utils"])
+        # Self time summed per top-level package: django 3000 + 2000 us
+        self.assertEqual(lines[5].split(), ["5.0", "django"])
+
+
+class StageTests(SimpleTestCase):
+    def test_django_setup_does_not_import_drf(self):
+        code, forbidden = STAGES["startup:django-setup"]
+        _, elapsed, loaded, _ = run_stage(code, forbidden)
+        self.assertEqual(loaded, [])
+        self.assertGreater(elapsed, 0)
+
+    def test_forbidden_import_is_reported(self):
+        _, _, loaded, _ = run_stage("import json", ["json", "csv"])
+        self.assertEqual(loaded, ["json"])
@@ -0,0 +1,79 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from the
+project root:
+
+    gunicorn AMRSUPERMARKETBACKEND.wsgi
+
+Every value can be overridden from the environment (GUNICORN_*), and the
+usual command-line flags still win over this file.
+"""
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def available_cores():
+    # Cores this process may run on; a container's CPU set can be smaller than the host
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# ----------------- Workers -----------------
+# A request is mostly Python time (serializers, in-process SQLite), so
+# processes are what scale: one per core plus one to cover a worker blocked on
+# the SQLite write lock. gthread adds a couple of threads per process so a
+# slow client or lock wait does not stall the whole worker, and unlike sync
+# workers it honours keepalive.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = env_int("GUNICORN_THREADS", 2)
+# Capped: every process holds its own copy of the app and writes to the same SQLite file
+workers = env_int("WEB_CONCURRENCY", min(available_cores() + 1, env_int("GUNICORN_MAX_WORKERS", 4)))
+
+# Import Django, the URLconf and DRF once in the master (see wsgi.py) and
+# fork; workers boot faster and share those pages copy-on-write.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True") == "True"
+
+# Recycle workers to bound memory growth; the jitter keeps them from all
+# restarting at once. A recycled worker only gets graceful_timeout to finish
+# in-process jobs (JOBS_RUN_IN_PROCESS): a longer import or export is killed
+# and only rerun once it has been running for JOB_STALE_MINUTES. Deployments
+# with long jobs should set JOBS_RUN_IN_PROCESS=False and run
+# `manage.py run_jobs` as its own process, or set GUNICORN_MAX_REQUESTS=0.
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+# ----------------- Timeouts -----------------
+# Imports and exports run as background jobs (/api/jobs/), so requests are
+# bounded by the largest synchronous write: a full /api/billing/batch/ of
+# BILLING_BATCH_MAX_SIZE bills.
+timeout = env_int("GUNICORN_TIMEOUT", 120)
+# Time a recycled or stopping worker gets to finish in-flight requests and
+# in-process jobs (JOBS_RUN_IN_PROCESS) before it is killed; see max_requests
+# for jobs that take longer.
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 60)
+# Longer than the default 2 s so a POS terminal or proxy reuses connections
+# between requests; keep it below the load balancer's idle timeout.
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+# Heartbeat files on tmpfs: a slow disk otherwise stalls workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# ----------------- Logging -----------------
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    # A connection the preloaded master opened must not be shared by workers
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
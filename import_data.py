@@ -1,27 +1,29 @@
 import os
+import sys
 import json
 import django
-from datetime import datetime
+from decimal import Decimal
+from django.apps import apps
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMRSUPERMARKETBACKEND.settings")
-django.setup()
+# Run as a script this sets Django up; imported by the import_data job it must
+# not, since django.setup() again would re-apply LOGGING in a running worker.
+if not apps.ready:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AMRSUPERMARKETBACKEND.settings")
+    django.setup()
 
 from api.models import Product, Stock, Supplier, PurchaseOrder, ItemEntry, Employee, Billing, Customer, Pincode
+from api.dates import parse_date
+from api.validation import validate_files, write_report
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+# Rows that failed validation, written on every run that rejects any
+REJECTIONS_FILE = os.path.join(DATA_DIR, "REJECTED.csv")
 
 # ---------------- Helper Functions ----------------
 
-def parse_date(date_str):
-    if not date_str:
-        return None
-    for fmt in ("%d-%m-%Y %H:%M:%S", "%d-%m-%Y", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    return None
+def money(value, default=0):
+    return Decimal(str(value if value is not None else default)).quantize(Decimal("0.01"))
 
 def safe_int(value, default=0):
     try:
@@ -29,18 +31,18 @@ def safe_int(value, default=0):
     except (ValueError, TypeError):
         return default
 
-def load_json(filename):
+def load_json(filename, out):
     path = os.path.join(DATA_DIR, filename)
     if not os.path.exists(path):
-        print(f"File not found: {filename}")
+        print(f"File not found: {filename}", file=out)
         return []
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 # ---------------- Import Functions ----------------
 
-def load_suppliers():
-    for item in load_json("SUPPLIER.json"):
+def load_suppliers(rows, out):
+    for item in rows:
         Supplier.objects.update_or_create(
             SUPPLIER_ID=safe_int(item.get("SUPPLIER ID")),
             defaults={
@@ -52,60 +54,65 @@ def load_suppliers():
             }
         )
 
-def load_products():
-    for item in load_json("PRODUCTWITHSTOCK.json"):
+def load_products(rows, out):
+    for item in rows:
         Product.objects.update_or_create(
             id=safe_int(item.get("PRODUCTID")),
             defaults={
                 "PRODUCT_NAME": item.get("PRODUCTNAME", "UNKNOWN"),
                 "BRAND_NAME": item.get("BRANDNAME", "UNKNOWN"),
                 "STOCK": safe_int(item.get("STOCK")),
-                "MRP": float(item.get("MRP", 0)),
+                "MRP": money(item.get("MRP")),
                 "CATEGORY": item.get("CATEGORY", "GENERAL")
             }
         )
 
-def load_stock():
-    for item in load_json("STOCK.json"):
+def load_stock(rows, out):
+    for item in rows:
         pid = safe_int(item.get("PRODUCTID"))
         try:
             product = Product.objects.get(id=pid)
         except Product.DoesNotExist:
-            print(f"Product {pid} not found, skipping Stock")
+            print(f"Product {pid} not found, skipping Stock", file=out)
             continue
         Stock.objects.update_or_create(
             PRODUCT=product,
             defaults={"STOCK": safe_int(item.get("STOCK"))}
         )
 
-def load_purchase_orders():
-    for item in load_json("PURCHASEORDER.json"):
+def load_purchase_orders(rows, out):
+    supplier_names = dict(Supplier.objects.values_list("SUPPLIER_ID", "NAME"))
+    for item in rows:
+        sid = safe_int(item.get("SUPPLIER ID"))
+        if sid not in supplier_names:
+            print(f"Supplier {sid} not found, importing Order {item.get('ORDERID')} without supplier", file=out)
+            sid = None
         PurchaseOrder.objects.update_or_create(
             ORDERID=safe_int(item.get("ORDERID")),
             defaults={
-                "SUPPLIER_ID": safe_int(item.get("SUPPLIER ID")),
+                "SUPPLIER_id": sid,
                 "SUPPLIER_NAME": item.get("SUPPLIER NAME", "UNKNOWN"),
                 "CATEGORY": item.get("CATEGORY", "GENERAL"),
                 "PRODUCTNAME": item.get("PRODUCTNAME", "UNKNOWN"),
-                "PRICE": float(item.get("PRICE", 0)),
+                "PRICE": money(item.get("PRICE")),
                 "QUANTITY_REQUIRED": safe_int(item.get("QUANTITY REQUIRED")),
-                "TOTAL_PRICE": float(item.get("TOTAL PRICE", 0)),
+                "TOTAL_PRICE": money(item.get("TOTAL PRICE")),
                 "PENDING_QUANTITY": safe_int(item.get("PENDING QUANTITY")),
                 "DATE": item.get("DATE", "N/A"),
                 "TIME": item.get("TIME", "N/A")
             }
         )
 
-def load_item_entries():
-    print("🗑️ Clearing old Item Entries...")
+def load_item_entries(rows, out):
+    print("🗑️ Clearing old Item Entries...", file=out)
     ItemEntry.objects.all().delete()   # remove duplicates on each import
 
-    for item in load_json("ITEMENTRY.json"):
+    for item in rows:
         oid = safe_int(item.get("ORDERID"))
         try:
             order = PurchaseOrder.objects.get(ORDERID=oid)
         except PurchaseOrder.DoesNotExist:
-            print(f"Order {oid} not found, skipping ItemEntry")
+            print(f"Order {oid} not found, skipping ItemEntry", file=out)
             continue
 
         ordered_qty = safe_int(item.get("ORDERED QUANTITY"))
@@ -146,11 +153,11 @@ def load_item_entries():
         stock.save()
 
         print(f"✔️ ItemEntry saved: Order {oid} - {product.PRODUCT_NAME}, "
-              f"Ordered={ordered_qty}, Received={received_qty}, Pending={pending_qty}")
+              f"Ordered={ordered_qty}, Received={received_qty}, Pending={pending_qty}", file=out)
 
 
-def load_employees():
-    for item in load_json("EMPLOYEE.json"):
+def load_employees(rows, out):
+    for item in rows:
         Employee.objects.update_or_create(
             EMPLOYEE_ID=safe_int(item.get("EMPLOYEEID")),
             defaults={
@@ -164,19 +171,19 @@ def load_employees():
                 "EMAIL_ID": item.get("EMAIL ID", "unknown@example.com"),
                 "QUALIFICATION": item.get("QUALIFICATION", "N/A"),
                 "DESIGNATION": item.get("DESIGNATION", "STAFF"),
-                "BASIC_PAY": float(item.get("BASIC PAY", 0)),
-                "INCENTIVE": float(item.get("INCENTIVE", 0)),
-                "NET_PAY": float(item.get("NET PAY", 0))
+                "BASIC_PAY": money(item.get("BASIC PAY")),
+                "INCENTIVE": money(item.get("INCENTIVE")),
+                "NET_PAY": money(item.get("NET PAY"))
             }
         )
 
-def load_billing():
-    for item in load_json("BILLING.json"):
+def load_billing(rows, out):
+    for item in rows:
         pid = safe_int(item.get("PRODUCTID"))
         try:
             product = Product.objects.get(id=pid)
         except Product.DoesNotExist:
-            print(f"Product {pid} not found, skipping Billing")
+            print(f"Product {pid} not found, skipping Billing", file=out)
             continue
 
         # ✅ Link customer if available
@@ -195,13 +202,12 @@ def load_billing():
                 "CUSTOMER": customer,
                 "CATEGORY": item.get("CATEGORY", "GENERAL"),
                 "QUANTITY": safe_int(item.get("QUANTITY")),
-                "PRICE": float(item.get("PRICE", 0)),
-                "TOTAL_PRICE": float(item.get("TOTAL PRICE", 0)),
+                "PRICE": money(item.get("PRICE")),
             }
         )
 
-def load_customers():
-    for item in load_json("CUSTOMER.json"):
+def load_customers(rows, out):
+    for item in rows:
         Customer.objects.update_or_create(
             CUSTOMER_ID=safe_int(item.get("CUSTOMER ID")),
             defaults={
@@ -214,8 +220,8 @@ def load_customers():
             }
         )
 
-def load_pincodes():
-    for item in load_json("PINCODES.json"):
+def load_pincodes(rows, out):
+    for item in rows:
         pincode = safe_int(item.get("PINCODE"))
         Pincode.objects.get_or_create(
             PINCODE=pincode,
@@ -228,14 +234,59 @@ def load_pincodes():
 
 # ----------------- Run all imports -----------------
 
-load_suppliers()
-load_products()
-load_stock()
-load_purchase_orders()
-load_item_entries()
-load_employees()
-load_billing()
-load_customers()
-load_pincodes()
-
-print("\n✅ All data imported successfully!")
+# (loader, input file); customers come before the bills that link to them
+STEPS = [
+    (load_suppliers, "SUPPLIER.json"),
+    (load_products, "PRODUCTWITHSTOCK.json"),
+    (load_stock, "STOCK.json"),
+    (load_purchase_orders, "PURCHASEORDER.json"),
+    (load_item_entries, "ITEMENTRY.json"),
+    (load_employees, "EMPLOYEE.json"),
+    (load_customers, "CUSTOMER.json"),
+    (load_billing, "BILLING.json"),
+    (load_pincodes, "PINCODES.json"),
+]
+
+def validate(out):
+    """Read and check every input file; returns {filename: FileResult} (see api/validation.py)."""
+    results = validate_files({filename: load_json(filename, out) for _, filename in STEPS})
+    for filename, result in results.items():
+        if result.rejections:
+            rejected = len({rejection["ROW"] for rejection in result.rejections})
+            print(f"⚠️ {filename}: {rejected} rows rejected, {len(result.rows)} clean", file=out)
+    return results
+
+def run(progress=None, check_only=False, out=None):
+    """
+    Validate every input file, then load the clean rows; ``progress(done,
+    total, step_name)`` is called after each step. Rejected rows are listed
+    in REJECTIONS_FILE. With ``check_only`` nothing is written to the
+    database. Messages go to ``out`` (default stdout). Returns the number of
+    rejections.
+    """
+    out = out or sys.stdout
+    total = len(STEPS) + 1
+    results = validate(out)
+    rejections = sum(len(result.rejections) for result in results.values())
+    if rejections:
+        write_report(results, REJECTIONS_FILE)
+        print(f"⚠️ {rejections} problems found, see {REJECTIONS_FILE}", file=out)
+    elif os.path.exists(REJECTIONS_FILE):
+        # Don't leave an earlier run's report next to clean data
+        os.remove(REJECTIONS_FILE)
+    if progress:
+        progress(1, total, "validate")
+    if check_only:
+        return rejections
+
+    for done, (step, filename) in enumerate(STEPS, start=2):
+        step(results[filename].rows, out)
+        if progress:
+            progress(done, total, step.__name__)
+
+    print("\n✅ All data imported successfully!" if not rejections else "\n✅ Clean rows imported.", file=out)
+    return rejections
+
+if __name__ == "__main__":
+    # --check: validate the files and write the report only
+    run(check_only="--check" in sys.argv[1:])